@@ -1,10 +1,52 @@
-from database import get_db_connection, dict_from_row, json_dumps
+from database import get_db_connection, stream_rows
+from table_versions import changed
+from models import Artwork
 from auth import verify_token
 import json
 import os
 import base64
 import time
 from decimal import Decimal
+from datetime import datetime
+from pagination import encode_cursor, decode_cursor
+from fieldsets import parse_fields, select_columns
+
+# Response fields and the columns they are read from (?fields= whitelist)
+ARTWORK_FIELDS = Artwork.json_columns()
+
+# Page sizes for GET /artworks
+ARTWORKS_PAGE_SIZE = 100
+ARTWORKS_MAX_PAGE_SIZE = 100
+
+# Most ids GET /artworks?ids= resolves in one request
+ARTWORKS_MAX_BATCH = 100
+
+# Read queries; {columns} is the SELECT list. check_indexes.py EXPLAINs
+# these same strings.
+ARTWORKS_PAGE_QUERY = """
+SELECT {columns}
+FROM artworks
+{where}
+ORDER BY created_at DESC, id DESC
+LIMIT %s
+"""
+# {where} of ARTWORKS_PAGE_QUERY for the page after (created_at, id)
+ARTWORKS_AFTER = "WHERE created_at < %s OR (created_at = %s AND id < %s)"
+ARTWORKS_EXPORT_QUERY = """
+SELECT {columns}
+FROM artworks
+ORDER BY created_at DESC, id DESC
+"""
+ARTWORKS_BY_IDS_QUERY = """
+SELECT {columns}
+FROM artworks
+WHERE id IN ({placeholders})
+"""
+ARTWORK_QUERY = """
+SELECT {columns}
+FROM artworks
+WHERE id = %s
+"""
 
 # Create the uploads directory if it doesn't exist
 def ensure_uploads_directory():
@@ -66,8 +108,37 @@ def save_image_from_base64(base64_str, name_prefix="artwork"):
         print(f"Error saving image: {e}")
         return None
 
-def get_all_artworks():
-    """Get all artworks from the database"""
+def format_artwork(artwork):
+    """Prepare an Artwork row for the API response"""
+    # Format image URL if needed - ALWAYS ensure it has the correct prefix
+    image_url = getattr(artwork, 'image_url', None)
+    if image_url:
+        # Handle base64 images
+        if image_url.startswith('data:') or 'base64' in image_url:
+            # Save the base64 image to a file and get its path
+            saved_path = save_image_from_base64(image_url)
+            if saved_path:
+                # Update the database with the new path
+                update_artwork_image(artwork.id, saved_path)
+                artwork.image_url = saved_path
+                print(f"Converted base64 image to file: {saved_path}")
+        elif not image_url.startswith('/static/'):
+            artwork.image_url = f"/static/uploads/{os.path.basename(image_url)}"
+    
+    return artwork.to_json()
+
+def get_all_artworks(limit=ARTWORKS_PAGE_SIZE, after=None, fields=None):
+    """Get a page of artworks, newest first.
+
+    after is the opaque cursor returned as "next" by the previous page.
+    fields is a comma separated list of ARTWORK_FIELDS to return.
+    Raises ValueError for an invalid cursor or unknown fields.
+    """
+    limit = min(limit, ARTWORKS_MAX_PAGE_SIZE)
+    after_key = decode_cursor(after, (datetime, int)) if after else None
+    fields = parse_fields(fields, ARTWORK_FIELDS)
+    columns = select_columns(fields, ARTWORK_FIELDS, required=('created_at',))
+    
     connection = get_db_connection()
     if connection is None:
         return {"error": "Database connection failed"}
@@ -75,42 +146,99 @@ def get_all_artworks():
     cursor = connection.cursor()
     
     try:
-        query = """
-        SELECT id, title, artist, description, price, image_url, 
-               dimensions, medium, year, status
-        FROM artworks
-        ORDER BY created_at DESC
-        """
-        cursor.execute(query)
+        # Keyset pagination over (created_at, id), served by idx_artworks_created_at
+        where = ""
+        params = []
+        if after_key:
+            where = ARTWORKS_AFTER
+            params = [after_key[0], after_key[0], after_key[1]]
+        query = ARTWORKS_PAGE_QUERY.format(columns=', '.join(columns), where=where)
+        # Fetch one extra row to know whether there is a next page
+        cursor.execute(query, params + [limit + 1])
         rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        # The sort key only feeds the cursor, it isn't part of the response
+        artworks = Artwork.mapper(cursor.column_names).load_all(rows)
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(artworks[-1].created_at, artworks[-1].id)
+        
+        return {"artworks": [format_artwork(artwork) for artwork in artworks], "next": next_cursor}
+    except Exception as e:
+        print(f"Error getting artworks: {e}")
+        return {"error": str(e)}
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def stream_all_artworks(fields=None):
+    """Stream every artwork, newest first (for exports).
+
+    Returns a RowStream, or None if no connection is available.
+    Raises ValueError for unknown fields.
+    """
+    columns = select_columns(parse_fields(fields, ARTWORK_FIELDS), ARTWORK_FIELDS)
+    query = ARTWORKS_EXPORT_QUERY.format(columns=', '.join(columns))
+    return stream_rows(query, (), Artwork, format_artwork)
+
+def parse_artwork_ids(value):
+    """Parse ?ids=1,2,3 into a list of unique ints, keeping the request order"""
+    ids = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            artwork_id = int(part)
+        except ValueError:
+            raise ValueError(f"Invalid artwork id: {part}")
+        if artwork_id not in ids:
+            ids.append(artwork_id)
+    if not ids:
+        raise ValueError("ids must list at least one artwork id")
+    if len(ids) > ARTWORKS_MAX_BATCH:
+        raise ValueError(f"At most {ARTWORKS_MAX_BATCH} ids can be requested at once")
+    return ids
+
+def get_artworks_by_ids(ids, fields=None):
+    """Get several artworks with a single query.
+
+    ids is the raw ?ids= value. Artworks come back in the requested order;
+    ids that don't exist are listed in "notFound".
+    Raises ValueError for invalid ids or unknown fields.
+    """
+    ids = parse_artwork_ids(ids)
+    columns = select_columns(parse_fields(fields, ARTWORK_FIELDS), ARTWORK_FIELDS)
+    
+    connection = get_db_connection()
+    if connection is None:
+        return {"error": "Database connection failed"}
+    
+    cursor = connection.cursor()
+    
+    try:
+        placeholders = ', '.join(['%s'] * len(ids))
+        query = ARTWORKS_BY_IDS_QUERY.format(columns=', '.join(columns), placeholders=placeholders)
+        cursor.execute(query, ids)
+        
+        load = Artwork.mapper(cursor.column_names).load
+        found = {}
+        for row in cursor.fetchall():
+            artwork = format_artwork(load(row))
+            found[artwork['id']] = artwork
         
         artworks = []
-        for row in rows:
-            artwork = dict_from_row(row, cursor)
-            
-            # Convert id to string to match frontend expectations
-            artwork['id'] = str(artwork['id'])
-            
-            # Format image URL if needed - ALWAYS ensure it has the correct prefix
-            if artwork['image_url']:
-                # Handle base64 images
-                if artwork['image_url'].startswith('data:') or 'base64' in artwork['image_url']:
-                    # Save the base64 image to a file and get its path
-                    saved_path = save_image_from_base64(artwork['image_url'])
-                    if saved_path:
-                        # Update the database with the new path
-                        update_artwork_image(artwork['id'], saved_path)
-                        artwork['image_url'] = saved_path
-                        print(f"Converted base64 image to file: {saved_path}")
-                elif not artwork['image_url'].startswith('/static/'):
-                    artwork['image_url'] = f"/static/uploads/{os.path.basename(artwork['image_url'])}"
-                
-                # Log the final image URL for debugging
-                print(f"Final image URL for {artwork['title']}: {artwork['image_url']}")
-                
-            artworks.append(artwork)
+        not_found = []
+        for artwork_id in map(str, ids):
+            if artwork_id in found:
+                artworks.append(found[artwork_id])
+            else:
+                not_found.append(artwork_id)
         
-        return {"artworks": artworks}
+        return {"artworks": artworks, "notFound": not_found}
     except Exception as e:
         print(f"Error getting artworks: {e}")
         return {"error": str(e)}
@@ -135,6 +263,7 @@ def update_artwork_image(artwork_id, image_path):
         """
         cursor.execute(query, (image_path, artwork_id))
         connection.commit()
+        changed('artworks', artwork_id)
         return True
     except Exception as e:
         print(f"Error updating artwork image: {e}")
@@ -144,8 +273,14 @@ def update_artwork_image(artwork_id, image_path):
             cursor.close()
             connection.close()
 
-def get_artwork(artwork_id):
-    """Get a specific artwork by ID"""
+def get_artwork(artwork_id, fields=None):
+    """Get a specific artwork by ID
+
+    fields is a comma separated list of ARTWORK_FIELDS to return.
+    Raises ValueError for unknown fields.
+    """
+    columns = select_columns(parse_fields(fields, ARTWORK_FIELDS), ARTWORK_FIELDS)
+    
     connection = get_db_connection()
     if connection is None:
         return {"error": "Database connection failed"}
@@ -153,37 +288,14 @@ def get_artwork(artwork_id):
     cursor = connection.cursor()
     
     try:
-        query = """
-        SELECT id, title, artist, description, price, image_url, 
-               dimensions, medium, year, status
-        FROM artworks
-        WHERE id = %s
-        """
+        query = ARTWORK_QUERY.format(columns=', '.join(columns))
         cursor.execute(query, (artwork_id,))
         row = cursor.fetchone()
         
         if not row:
             return {"error": "Artwork not found"}
         
-        artwork = dict_from_row(row, cursor)
-        # Convert id to string to match frontend expectations
-        artwork['id'] = str(artwork['id'])
-        
-        # Format image URL if needed
-        if artwork['image_url']:
-            # Handle base64 images
-            if artwork['image_url'].startswith('data:') or 'base64' in artwork['image_url']:
-                # Save the base64 image to a file and get its path
-                saved_path = save_image_from_base64(artwork['image_url'])
-                if saved_path:
-                    # Update the database with the new path
-                    update_artwork_image(artwork['id'], saved_path)
-                    artwork['image_url'] = saved_path
-                    print(f"Converted base64 image to file: {saved_path}")
-            elif not artwork['image_url'].startswith('/static/'):
-                artwork['image_url'] = f"/static/uploads/{os.path.basename(artwork['image_url'])}"
-        
-        return artwork
+        return format_artwork(Artwork.mapper(cursor.column_names).load(row))
     except Exception as e:
         print(f"Error getting artwork: {e}")
         return {"error": str(e)}
@@ -282,6 +394,7 @@ def create_artwork(auth_header, artwork_data):
         
         # Return the newly created artwork
         new_artwork_id = cursor.lastrowid
+        changed('artworks', new_artwork_id)
         print(f"Artwork created successfully with ID: {new_artwork_id}")
         return get_artwork(new_artwork_id)
     except Exception as e:
@@ -367,6 +480,7 @@ def update_artwork(auth_header, artwork_id, artwork_data):
         # Check if artwork was found and updated
         if cursor.rowcount == 0:
             return {"error": "Artwork not found"}
+        changed('artworks', artwork_id)
         
         # Return the updated artwork
         return get_artwork(artwork_id)
@@ -419,6 +533,7 @@ def delete_artwork(auth_header, artwork_id):
         # Check if artwork was found and deleted
         if cursor.rowcount == 0:
             return {"error": "Artwork not found"}
+        changed('artworks', artwork_id)
         
         return {"success": True, "message": "Artwork deleted successfully"}
     except Exception as e:
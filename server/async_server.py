@@ -0,0 +1,219 @@
+import io
+import socket
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from worker_server import SERVER_THREADS, SERVER_QUEUE_DEPTH, SERVER_RETRY_AFTER, overloaded_response
+
+# asyncio server engine (SERVER_MODE=asyncio).
+#
+# The event loop owns every connection: reading requests, waiting on idle
+# clients and writing responses cost a coroutine, not a thread, so one
+# process can hold thousands of open connections. A request is read in full
+# by the loop and then handed to the regular RequestHandler on a bounded
+# executor, since the route handlers call the database, Daraja and the file
+# system synchronously. Responses are passed back to the loop as they are
+# written; large (streamed) responses wait for the socket to drain, so a slow
+# client never buffers a whole export in memory.
+
+# Largest request line plus headers accepted
+MAX_HEADER_BYTES = 64 * 1024
+# Response bytes collected on the executor thread before they're handed to
+# the event loop; smaller responses are sent in one piece after the handler
+FLUSH_SIZE = 64 * 1024
+# Seconds in-flight requests get to finish on shutdown
+SHUTDOWN_GRACE = 30
+
+class _ResponseWriter:
+    """wfile for a handler running on an executor thread"""
+
+    def __init__(self, loop, writer):
+        self._loop = loop
+        self._writer = writer
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= FLUSH_SIZE:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            # Blocks this thread until the socket has taken the data
+            asyncio.run_coroutine_threadsafe(self._send(data), self._loop).result()
+        return len(data)
+
+    def flush(self):
+        # The rest is sent by the event loop once the handler returns
+        pass
+
+    def take(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    async def _send(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+def _content_length(head):
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            try:
+                return max(int(value.strip()), 0)
+            except ValueError:
+                return 0
+    return 0
+
+def _expects_continue(head):
+    if not head.split(b'\r\n', 1)[0].endswith(b'HTTP/1.1'):
+        return False
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'expect':
+            return value.strip().lower() == b'100-continue'
+    return False
+
+class AsyncHTTPServer:
+    """HTTP server running on an asyncio event loop.
+
+    Has the serve_forever() / shutdown() / server_close() interface of the
+    socketserver servers, so server.serve() and prefork run it unchanged.
+
+    threads:     executor threads running route handlers
+    queue_depth: requests allowed to wait for an executor thread before 503
+    """
+
+    def __init__(self, server_address, handler_class, threads=SERVER_THREADS,
+                 queue_depth=SERVER_QUEUE_DEPTH, retry_after=SERVER_RETRY_AFTER,
+                 reuse_port=False):
+        self.handler_class = handler_class
+        self.retry_after = retry_after
+        self.max_pending = threads + max(queue_depth, 0)
+        self.socket = socket.create_server(server_address, backlog=1024, reuse_port=reuse_port)
+        self.server_address = self.socket.getsockname()
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http-handler')
+        self._threads = threads
+        self._pending = 0
+        self._connections = set()
+        # Connections waiting for their next request, closed at once on shutdown
+        self._idle = set()
+        self._loop = None
+        self._stop = None
+        self._stopped = threading.Event()
+        self.served = 0
+        self.rejected = 0
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    def shutdown(self):
+        """Stop serve_forever() after in-flight requests finish; call from another thread"""
+        loop = self._loop
+        if loop is not None and not self._stopped.is_set():
+            loop.call_soon_threadsafe(self._stop.set)
+            self._stopped.wait()
+
+    def server_close(self):
+        self.socket.close()
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        return {
+            'threads': self._threads,
+            'connections': len(self._connections),
+            'pending': self._pending,
+            'served': self.served,
+            'rejected': self.rejected,
+        }
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        server = await asyncio.start_server(self._handle_connection, sock=self.socket, limit=MAX_HEADER_BYTES)
+        try:
+            await self._stop.wait()
+        finally:
+            server.close()
+            for task in list(self._idle):
+                task.cancel()
+            if self._connections:
+                _, still_running = await asyncio.wait(self._connections, timeout=SHUTDOWN_GRACE)
+                for task in still_running:
+                    task.cancel()
+            self._stopped.set()
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            await self._serve_connection(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except asyncio.CancelledError:
+            # Closed by shutdown; end the task normally, the server is stopping
+            pass
+        except Exception as e:
+            print(f"Error serving connection: {e}")
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _serve_connection(self, reader, writer):
+        client_address = writer.get_extra_info('peername')
+        task = asyncio.current_task()
+        # Idle timeout and request count carry over between requests on a
+        # kept-alive connection (see RequestHandler)
+        idle_timeout = getattr(self.handler_class, 'timeout', None)
+        requests_handled = 0
+        while not self._stop.is_set():
+            self._idle.add(task)
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), idle_timeout)
+            except asyncio.TimeoutError:
+                return
+            finally:
+                self._idle.discard(task)
+            length = _content_length(head)
+            if length and _expects_continue(head):
+                writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            body = await reader.readexactly(length) if length else b''
+
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                writer.write(overloaded_response(self.retry_after))
+                await writer.drain()
+                return
+
+            response = _ResponseWriter(self._loop, writer)
+            self._pending += 1
+            try:
+                handler = await self._loop.run_in_executor(
+                    self._executor, self._run_handler, head + body, client_address, response, requests_handled)
+            finally:
+                self._pending -= 1
+            self.served += 1
+
+            writer.write(response.take())
+            await writer.drain()
+            if handler.close_connection:
+                return
+            requests_handled = handler.requests_handled
+
+    def _run_handler(self, request, client_address, wfile, requests_handled):
+        """Run one request through handler_class; called on an executor thread"""
+        handler = self.handler_class.__new__(self.handler_class)
+        handler.server = self
+        handler.request = None
+        handler.client_address = client_address
+        handler.rfile = io.BytesIO(request)
+        handler.wfile = wfile
+        handler.close_connection = True
+        handler.requests_handled = requests_handled
+        # 100 Continue was sent by the event loop before reading the body
+        handler.handle_expect_100 = lambda: True
+        handler.handle_one_request()
+        return handler
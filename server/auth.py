@@ -1,12 +1,16 @@
 import hashlib
 import secrets
-from database import get_db_connection, json_dumps
+from database import get_db_connection
 import jwt
 import datetime
 import os
 from decimal import Decimal
 from middleware import SECRET_KEY  # Import the shared SECRET_KEY
 
+# Login lookups (EXPLAINed by check_indexes.py)
+LOGIN_USER_QUERY = "SELECT id, name FROM users WHERE email = %s AND password = %s"
+LOGIN_ADMIN_QUERY = "SELECT id, name FROM admins WHERE email = %s AND password = %s"
+
 def hash_password(password):
     """Hash a password using SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -64,8 +68,7 @@ def login_user(email, password):
     
     try:
         # Check user credentials
-        query = "SELECT id, name FROM users WHERE email = %s AND password = %s"
-        cursor.execute(query, (email, hashed_password))
+        cursor.execute(LOGIN_USER_QUERY, (email, hashed_password))
         user = cursor.fetchone()
         
         if not user:
@@ -99,8 +102,7 @@ def login_admin(email, password):
     
     try:
         # Check admin credentials
-        query = "SELECT id, name FROM admins WHERE email = %s AND password = %s"
-        cursor.execute(query, (email, hashed_password))
+        cursor.execute(LOGIN_ADMIN_QUERY, (email, hashed_password))
         admin = cursor.fetchone()
         
         if not admin:
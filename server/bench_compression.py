@@ -0,0 +1,38 @@
+import timeit
+from compression import compress, CompressedCache
+from serialization import dumps
+from bench_serialization import artworks_payload, orders_payloads, best_of
+
+# Micro-benchmark: bytes saved versus CPU spent compressing API responses.
+#
+#   python bench_compression.py
+#
+# "cached" is a hit in the compressed-body cache that cacheable routes use:
+# the cost is hashing the uncompressed body instead of compressing it.
+
+LEVELS = (1, 6, 9)
+
+def run():
+    _, orders = orders_payloads()
+    for name, payload, number in (
+        ("/artworks (100 rows)", artworks_payload(), 200),
+        ("/orders (1000 rows)", orders, 20),
+    ):
+        body = dumps(payload)
+        print(f"{name}: {len(body)} bytes")
+        for encoding in ('gzip', 'deflate'):
+            for level in LEVELS:
+                compressed = compress(body, encoding, level)
+                elapsed = best_of(lambda b: compress(b, encoding, level), body, number)
+                saved = len(body) - len(compressed)
+                print(f"  {encoding:7} -{level}  {len(compressed):8} bytes  "
+                      f"saved {saved / len(body):6.1%}  {elapsed:8.1f} us  "
+                      f"({elapsed / (saved / 1024):5.2f} us per KiB saved)")
+
+        cache = CompressedCache(8 * 1024 * 1024)
+        cache.compress(body, 'gzip')
+        elapsed = min(timeit.repeat(lambda: cache.compress(body, 'gzip'), number=number * 10, repeat=5)) / (number * 10) * 1e6
+        print(f"  gzip cached   {elapsed:8.1f} us")
+
+if __name__ == "__main__":
+    run()
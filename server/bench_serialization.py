@@ -0,0 +1,73 @@
+import json
+import timeit
+from decimal import Decimal
+from datetime import datetime
+from models import Artwork, Order
+import serialization
+
+# Micro-benchmark: JSON encoding of the /artworks and /orders payloads.
+#
+#   python bench_serialization.py
+#
+# "legacy" is the encoder the modules used before serialization.py:
+# json.dumps with a JSONEncoder.default hook per Decimal/datetime, then
+# str.encode() for the socket.
+
+class LegacyEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return super(LegacyEncoder, self).default(obj)
+
+def legacy_dumps(obj):
+    return json.dumps(obj, cls=LegacyEncoder).encode()
+
+ARTWORK_COLUMNS = ('id', 'title', 'artist', 'description', 'price', 'image_url',
+                   'dimensions', 'medium', 'year', 'status')
+ORDER_COLUMNS = ('id', 'user_id', 'user_name', 'artwork_id', 'item_title', 'artwork_image_url',
+                 'order_date', 'total_amount', 'payment_status')
+
+def artworks_payload(count=100):
+    """A full GET /artworks page"""
+    mapper = Artwork.mapper(ARTWORK_COLUMNS)
+    rows = [(i, f"Artwork {i}", "Artist Name", "A description of the piece. " * 8,
+             Decimal('1250.00'), f"/static/uploads/artwork_{i}.jpg", "60x90 cm",
+             "Oil on canvas", 2021, "available") for i in range(count)]
+    return {"artworks": [mapper.load(row).to_json() for row in rows], "next": None}
+
+def orders_payloads(count=1000):
+    """GET /orders as built before (raw Decimal/datetime) and with Order models"""
+    mapper = Order.mapper(ORDER_COLUMNS)
+    rows = [(i, i % 50, "Customer Name", i, f"Artwork {i}", f"/static/uploads/artwork_{i}.jpg",
+             datetime(2025, 4, 1, 12, 30, 15), Decimal('1250.00'), "completed") for i in range(count)]
+    legacy = {"orders": [dict(zip(('id', 'user_id', 'user_name', 'reference_id', 'item_title',
+                                    'image_url', 'date', 'amount', 'status'), row), type='artwork')
+                         for row in rows]}
+    return legacy, {"orders": [mapper.load(row).to_json() for row in rows]}
+
+def best_of(func, payload, number):
+    return min(timeit.repeat(lambda: func(payload), number=number, repeat=5)) / number * 1e6
+
+def run():
+    artworks = artworks_payload()
+    legacy_orders, orders = orders_payloads()
+
+    encoders = [("stdlib", serialization.dumps_stdlib)]
+    if serialization.dumps_orjson is not None:
+        encoders.append(("orjson", serialization.dumps_orjson))
+
+    for name, legacy_payload, payload, number in (
+        ("/artworks (100 rows)", artworks, artworks, 500),
+        ("/orders (1000 rows)", legacy_orders, orders, 50),
+    ):
+        baseline = best_of(legacy_dumps, legacy_payload, number)
+        print(f"{name}: {len(serialization.dumps(payload))} bytes")
+        print(f"  legacy   {baseline:9.1f} us")
+        for encoder_name, encoder in encoders:
+            elapsed = best_of(encoder, payload, number)
+            print(f"  {encoder_name:8} {elapsed:9.1f} us  ({baseline / elapsed:.1f}x)")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,319 @@
+import os
+import time
+import socket
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+# Cache storage backends.
+#
+# A backend stores byte values under string keys with a TTL and a set of
+# string tags, evicts by tag, and carries broadcast messages between the
+# processes using it:
+#
+#   get(key)                      -> value or None
+#   set(key, value, ttl, tags=()) store value for ttl seconds
+#   delete(key)
+#   invalidate(tags)              evict every key stored with one of tags;
+#                                 returns how many, None if it failed
+#   publish(message)              send message to every subscriber
+#   subscribe(callback)           call callback(message) for each message;
+#                                 callback(None) when messages may have been
+#                                 missed (the connection was lost)
+#   stats()
+#
+# MemoryBackend keeps everything in this process. RespBackend talks the Redis
+# protocol (RESP) to a server shared by all worker processes: Redis itself or
+# the local stand-in in cache_server.py. CACHE_URL selects it:
+#
+#   unix:///tmp/afriart-cache.sock   (cache_server.py --socket ...)
+#   redis://127.0.0.1:6379
+#
+# A failing shared backend makes the cache miss, it never fails a request;
+# after an error the server is left alone for CACHE_RETRY_DELAY seconds.
+CACHE_URL = os.environ.get('CACHE_URL', '')
+CACHE_CHANNEL = os.environ.get('CACHE_CHANNEL', 'afriart:invalidate')
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'afriart:')
+CACHE_TIMEOUT = float(os.environ.get('CACHE_TIMEOUT', 0.5))
+CACHE_RETRY_DELAY = float(os.environ.get('CACHE_RETRY_DELAY', 1))
+
+class CacheError(Exception):
+    """Error reply from the cache server"""
+    pass
+
+class MemoryBackend:
+    """In-process store: LRU bounded by total value size, with TTL and tags"""
+
+    shared = False
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires_at, tags)
+        self._tagged = {}  # tag -> keys
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl, tags=()):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, tuple(tags))
+            self._bytes += len(value)
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate(self, tags):
+        """Evict the keys stored with any of tags; returns how many"""
+        evicted = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tagged.get(tag, ())):
+                    self._remove(key)
+                    evicted += 1
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+            self._bytes = 0
+
+    def publish(self, message):
+        for callback in self._subscribers:
+            callback(message)
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'entries': len(self._entries), 'bytes': self._bytes}
+
+    def _remove(self, key):
+        value, _, tags = self._entries.pop(key)
+        self._bytes -= len(value)
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+def parse_cache_url(url):
+    """Socket family and address for a CACHE_URL"""
+    parsed = urlparse(url)
+    if parsed.scheme == 'unix':
+        return socket.AF_UNIX, parsed.path
+    if parsed.scheme in ('redis', 'tcp'):
+        return socket.AF_INET, (parsed.hostname or '127.0.0.1', parsed.port or 6379)
+    raise ValueError(f"Unsupported CACHE_URL {url!r}; use unix:///path or redis://host:port")
+
+def _encode_command(args):
+    out = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        out.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(out)
+
+class _RespConnection:
+    """One RESP connection; commands can be pipelined"""
+
+    def __init__(self, address, timeout=CACHE_TIMEOUT):
+        family, addr = address
+        self.pid = os.getpid()
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            self.sock.settimeout(timeout)
+            self.sock.connect(addr)
+            if family == socket.AF_INET:
+                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            self.sock.close()
+            raise
+        self._file = self.sock.makefile('rb')
+
+    def execute(self, *commands):
+        """Send commands in one write and return their replies"""
+        self.sock.sendall(b''.join(_encode_command(args) for args in commands))
+        replies = [self.read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, CacheError):
+                raise reply
+        return replies
+
+    def read_reply(self):
+        line = self._file.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Cache server closed the connection")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            return CacheError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Cache server closed the connection")
+            return data[:-2]
+        if kind == b'*':
+            length = int(rest)
+            return None if length < 0 else [self.read_reply() for _ in range(length)]
+        raise ConnectionError(f"Bad reply from cache server: {line[:40]!r}")
+
+    def close(self):
+        try:
+            self._file.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+class RespBackend:
+    """Store shared by every process connected to one Redis-protocol server.
+
+    Keys and tags are namespaced with CACHE_KEY_PREFIX. A tag is a set of
+    the keys stored with it, expiring with them. Each thread has its own
+    connection, reopened after a fork. Subscriptions share one connection
+    per process, read by a listener thread started by the first command the
+    process runs (not at import, which may be before a fork).
+    """
+
+    shared = True
+
+    def __init__(self, url, channel=CACHE_CHANNEL, prefix=CACHE_KEY_PREFIX):
+        self.url = url
+        self.address = parse_cache_url(url)
+        self.channel = channel
+        self.prefix = prefix
+        self._local = threading.local()
+        self._down_until = 0
+        self._subscribers = []
+        self._listener_pid = None
+        self._lock = threading.Lock()
+        self.errors = 0
+
+    def get(self, key):
+        replies = self._execute(('GET', self.prefix + key))
+        return replies[0] if replies else None
+
+    def set(self, key, value, ttl, tags=()):
+        key = self.prefix + key
+        ms = max(int(ttl * 1000), 1)
+        commands = [('SET', key, value, 'PX', ms)]
+        for tag in tags:
+            tag = self.prefix + 'tag:' + tag
+            commands.append(('SADD', tag, key))
+            commands.append(('PEXPIRE', tag, ms))
+        self._execute(*commands)
+
+    def delete(self, key):
+        self._execute(('DEL', self.prefix + key))
+
+    def invalidate(self, tags):
+        tags = [self.prefix + 'tag:' + tag for tag in tags]
+        if not tags:
+            return 0
+        replies = self._execute(*(('SMEMBERS', tag) for tag in tags))
+        if replies is None:
+            return None
+        keys = {key for members in replies for key in members or ()}
+        if self._execute(('DEL', *keys, *tags)) is None:
+            return None
+        return len(keys)
+
+    def publish(self, message):
+        self._execute(('PUBLISH', self.channel, message))
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def stats(self):
+        replies = self._execute(('DBSIZE',))
+        return {
+            'backend': self.url,
+            'keys': replies[0] if replies else None,
+            'errors': self.errors,
+        }
+
+    def _execute(self, *commands):
+        """Run commands; returns their replies, or None if the server is unavailable"""
+        if self._subscribers and self._listener_pid != os.getpid():
+            self._start_listener()
+        if time.monotonic() < self._down_until:
+            return None
+        connection = getattr(self._local, 'connection', None)
+        try:
+            if connection is None or connection.pid != os.getpid():
+                connection = self._local.connection = _RespConnection(self.address)
+            return connection.execute(*commands)
+        except (OSError, CacheError) as e:
+            self.errors += 1
+            if connection is not None:
+                connection.close()
+            self._local.connection = None
+            if not isinstance(e, CacheError):
+                self._down_until = time.monotonic() + CACHE_RETRY_DELAY
+            print(f"Cache backend {self.url} error: {e}")
+            return None
+
+    def _start_listener(self):
+        # Threads don't survive fork(), so every process starts its own
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+        threading.Thread(target=self._listen, name='cache-subscriber', daemon=True).start()
+
+    def _listen(self):
+        while True:
+            connection = None
+            try:
+                connection = _RespConnection(self.address, timeout=None)
+                connection.execute(('SUBSCRIBE', self.channel))
+                # Messages sent while this process wasn't listening are lost
+                self._deliver(None)
+                while True:
+                    reply = connection.read_reply()
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b'message':
+                        self._deliver(reply[2].decode())
+            except (OSError, CacheError) as e:
+                print(f"Cache subscription to {self.url} lost: {e}")
+            finally:
+                if connection is not None:
+                    connection.close()
+            time.sleep(CACHE_RETRY_DELAY)
+
+    def _deliver(self, message):
+        for callback in self._subscribers:
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"Error handling cache message: {e}")
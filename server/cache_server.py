@@ -0,0 +1,259 @@
+import os
+import time
+import asyncio
+import argparse
+from collections import OrderedDict
+
+# Local stand-in for Redis, for the shared response cache (CACHE_URL).
+#
+#   python cache_server.py --socket /tmp/afriart-cache.sock
+#   CACHE_URL=unix:///tmp/afriart-cache.sock python server.py --workers 4
+#
+# Speaks the Redis protocol (RESP) and implements the commands RespBackend
+# uses: strings with an expiry, sets, publish/subscribe and a few admin
+# commands. String values are kept in an LRU bounded by their total size.
+# Data lives in memory only. Use a real Redis server instead where one is
+# available; nothing else changes.
+CACHE_SERVER_MAX_BYTES = int(os.environ.get('CACHE_SERVER_MAX_BYTES', 256 * 1024 * 1024))
+# Seconds between sweeps for expired keys (they are also dropped on access)
+SWEEP_INTERVAL = 5
+
+def _simple(text):
+    return b'+%s\r\n' % text.encode()
+
+def _error(text):
+    return b'-ERR %s\r\n' % text.encode()
+
+def _integer(value):
+    return b':%d\r\n' % value
+
+def _bulk(value):
+    if value is None:
+        return b'$-1\r\n'
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+def _array(items):
+    return b'*%d\r\n' % len(items) + b''.join(items)
+
+class CacheServer:
+    def __init__(self, max_bytes=CACHE_SERVER_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> bytes or set of bytes
+        self._expires = {}  # key -> time.monotonic() deadline
+        self._bytes = 0
+        self._channels = {}  # channel -> subscribed StreamWriters
+        self._commands = {
+            b'PING': self._ping, b'ECHO': self._echo,
+            b'GET': self._get, b'SET': self._set, b'DEL': self._del, b'EXISTS': self._exists,
+            b'SADD': self._sadd, b'SREM': self._srem, b'SMEMBERS': self._smembers,
+            b'PEXPIRE': self._pexpire, b'EXPIRE': self._expire,
+            b'PUBLISH': self._publish, b'DBSIZE': self._dbsize,
+            b'FLUSHALL': self._flush, b'FLUSHDB': self._flush,
+        }
+
+    async def handle(self, reader, writer):
+        subscribed = set()
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                name = args[0].upper()
+                if name == b'QUIT':
+                    writer.write(_simple('OK'))
+                    break
+                if name == b'SUBSCRIBE':
+                    for channel in args[1:]:
+                        self._channels.setdefault(channel, set()).add(writer)
+                        subscribed.add(channel)
+                        writer.write(_array([_bulk(b'subscribe'), _bulk(channel), _integer(len(subscribed))]))
+                elif name == b'UNSUBSCRIBE':
+                    for channel in args[1:] or list(subscribed):
+                        self._channels.get(channel, set()).discard(writer)
+                        subscribed.discard(channel)
+                        writer.write(_array([_bulk(b'unsubscribe'), _bulk(channel), _integer(len(subscribed))]))
+                else:
+                    command = self._commands.get(name)
+                    if command is None:
+                        writer.write(_error(f"unknown command '{args[0].decode(errors='replace')}'"))
+                    else:
+                        try:
+                            writer.write(command(*args[1:]))
+                        except (TypeError, ValueError):
+                            writer.write(_error(f"wrong arguments for '{name.decode().lower()}' command"))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in subscribed:
+                self._channels.get(channel, set()).discard(writer)
+            writer.close()
+
+    async def _read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command, e.g. typed into telnet
+            return line.split() or [b'PING']
+        args = []
+        for _ in range(int(line[1:])):
+            header = await reader.readline()
+            length = int(header[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def sweep(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            now = time.monotonic()
+            for key in [key for key, deadline in self._expires.items() if deadline <= now]:
+                self._remove(key)
+
+    def _lookup(self, key):
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._remove(key)
+            return None
+        return self._data.get(key)
+
+    def _remove(self, key):
+        value = self._data.pop(key, None)
+        self._expires.pop(key, None)
+        if isinstance(value, bytes):
+            self._bytes -= len(value)
+        return value is not None
+
+    def _ping(self, message=None):
+        return _simple('PONG') if message is None else _bulk(message)
+
+    def _echo(self, message):
+        return _bulk(message)
+
+    def _get(self, key):
+        value = self._lookup(key)
+        if isinstance(value, set):
+            return _error("WRONGTYPE key holds a set")
+        if value is not None:
+            self._data.move_to_end(key)
+        return _bulk(value)
+
+    def _set(self, key, value, *options):
+        ttl = None
+        only_new = False
+        options = list(options)
+        while options:
+            option = options.pop(0).upper()
+            if option == b'PX':
+                ttl = int(options.pop(0)) / 1000
+            elif option == b'EX':
+                ttl = int(options.pop(0))
+            elif option == b'NX':
+                only_new = True
+            else:
+                raise ValueError(option)
+        if len(value) > self.max_bytes:
+            return _error("value is larger than the cache")
+        if only_new and self._lookup(key) is not None:
+            return _bulk(None)
+        self._remove(key)
+        self._data[key] = value
+        self._bytes += len(value)
+        if ttl is not None:
+            self._expires[key] = time.monotonic() + ttl
+        # Evict least recently used strings; sets are small and left alone
+        while self._bytes > self.max_bytes:
+            oldest = next(k for k, v in self._data.items() if isinstance(v, bytes))
+            self._remove(oldest)
+        return _simple('OK')
+
+    def _del(self, *keys):
+        return _integer(sum(self._remove(key) for key in keys))
+
+    def _exists(self, *keys):
+        return _integer(sum(self._lookup(key) is not None for key in keys))
+
+    def _sadd(self, key, *members):
+        value = self._lookup(key)
+        if value is None:
+            value = self._data[key] = set()
+        elif not isinstance(value, set):
+            return _error("WRONGTYPE key holds a string")
+        added = len(set(members) - value)
+        value.update(members)
+        return _integer(added)
+
+    def _srem(self, key, *members):
+        value = self._lookup(key)
+        if not isinstance(value, set):
+            return _integer(0)
+        removed = len(value & set(members))
+        value.difference_update(members)
+        if not value:
+            self._remove(key)
+        return _integer(removed)
+
+    def _smembers(self, key):
+        value = self._lookup(key)
+        if not isinstance(value, set):
+            return _array([])
+        return _array([_bulk(member) for member in value])
+
+    def _pexpire(self, key, milliseconds):
+        if self._lookup(key) is None:
+            return _integer(0)
+        self._expires[key] = time.monotonic() + int(milliseconds) / 1000
+        return _integer(1)
+
+    def _expire(self, key, seconds):
+        return self._pexpire(key, int(seconds) * 1000)
+
+    def _publish(self, channel, message):
+        subscribers = self._channels.get(channel, set())
+        push = _array([_bulk(b'message'), _bulk(channel), _bulk(message)])
+        for writer in subscribers:
+            writer.write(push)
+        return _integer(len(subscribers))
+
+    def _dbsize(self):
+        return _integer(len(self._data))
+
+    def _flush(self, *options):
+        self._data.clear()
+        self._expires.clear()
+        self._bytes = 0
+        return _simple('OK')
+
+async def serve(socket_path=None, host='127.0.0.1', port=None, max_bytes=CACHE_SERVER_MAX_BYTES):
+    cache = CacheServer(max_bytes)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(cache.handle, path=socket_path)
+        print(f"Cache server listening on {socket_path}")
+    else:
+        server = await asyncio.start_server(cache.handle, host, port)
+        print(f"Cache server listening on {host}:{port}")
+    sweeper = asyncio.create_task(cache.sweep())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        sweeper.cancel()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Redis-protocol cache server for the shared response cache")
+    parser.add_argument('--socket', help="Unix socket path to listen on")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6380)
+    parser.add_argument('--max-bytes', type=int, default=CACHE_SERVER_MAX_BYTES)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.socket, args.host, args.port, args.max_bytes))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import sys
+from db_backend import Error
+from database import get_backend, get_db_connection
+from database import (MESSAGES_PAGE_QUERY, MESSAGES_AFTER, MESSAGES_EXPORT_QUERY, UNREAD_COUNT_QUERY,
+                      UPDATE_MESSAGE_STATUS_QUERY, message_filters)
+from artwork import (ARTWORK_FIELDS, ARTWORKS_PAGE_QUERY, ARTWORKS_AFTER, ARTWORKS_EXPORT_QUERY,
+                     ARTWORKS_BY_IDS_QUERY, ARTWORK_QUERY)
+from exhibition import (EXHIBITION_FIELDS, EXHIBITIONS_PAGE_QUERY, EXHIBITIONS_AFTER, EXHIBITIONS_EXPORT_QUERY,
+                        EXHIBITION_QUERY, exhibition_filters)
+from db_operations import ORDERS_QUERY, ARTWORK_ORDER_DETAILS_QUERY, TICKETS_QUERY
+from mpesa import TRANSACTION_QUERY, UPDATE_TRANSACTION_QUERY
+from auth import LOGIN_USER_QUERY, LOGIN_ADMIN_QUERY
+from fieldsets import select_columns
+
+# EXPLAINs the hot queries the API modules run and reports the ones not
+# served by an index. The SQL is the modules' own query constants, built the
+# way the endpoints build them, so this can't drift from what is executed.
+#
+#   python check_indexes.py          (exit status 1 if a query isn't indexed)
+#   python -m pytest tests/test_indexes.py
+#
+# Works on both backends: MySQL's EXPLAIN and SQLite's EXPLAIN QUERY PLAN.
+
+# A page of PAGE_LIMIT rows plus the one fetched to detect a next page
+PAGE_LIMIT = 101
+
+# Options of a hot query:
+#   allow_filesort - sorting the few rows an index range returns is expected
+SORTS_FILTERED_ROWS = {'allow_filesort': True}
+
+def _filtered(template, conditions, params, **columns):
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return template.format(where=where, **columns), tuple(params)
+
+def hot_queries():
+    """[(name, query, params, options)] for every hot query, with representative parameters"""
+    artwork_columns = ', '.join(select_columns(None, ARTWORK_FIELDS, required=('created_at',)))
+    exhibition_columns = ', '.join(select_columns(None, EXHIBITION_FIELDS, required=('start_date',)))
+    cursor_time = '2030-01-01 00:00:00'
+    today = '2030-01-01'
+
+    exhibitions_by_status = _filtered(EXHIBITIONS_PAGE_QUERY, *exhibition_filters(status='ongoing'),
+                                      columns=exhibition_columns)
+    exhibitions_now = _filtered(EXHIBITIONS_PAGE_QUERY, *exhibition_filters(date_from=today, date_to=today),
+                                columns=exhibition_columns)
+    exhibitions_after = _filtered(EXHIBITIONS_PAGE_QUERY, [EXHIBITIONS_AFTER], [today, today, 1000],
+                                  columns=exhibition_columns)
+    messages_by_status = _filtered(MESSAGES_PAGE_QUERY, *message_filters(status='new'))
+    messages_by_source = _filtered(MESSAGES_PAGE_QUERY, *message_filters(source='chatbot'))
+    messages_after = _filtered(MESSAGES_PAGE_QUERY, [MESSAGES_AFTER], [cursor_time, cursor_time, 1000])
+    messages_export = _filtered(MESSAGES_EXPORT_QUERY, *message_filters(status='new'))
+
+    return [
+        ("artwork.get_all_artworks",
+         ARTWORKS_PAGE_QUERY.format(columns=artwork_columns, where=""), (PAGE_LIMIT,), {}),
+        ("artwork.get_all_artworks (after)",
+         ARTWORKS_PAGE_QUERY.format(columns=artwork_columns, where=ARTWORKS_AFTER),
+         (cursor_time, cursor_time, 1000, PAGE_LIMIT), {}),
+        ("artwork.stream_all_artworks",
+         ARTWORKS_EXPORT_QUERY.format(columns=artwork_columns), (), {}),
+        ("artwork.get_artworks_by_ids",
+         ARTWORKS_BY_IDS_QUERY.format(columns=artwork_columns, placeholders='%s, %s, %s'), (1, 2, 3), {}),
+        ("artwork.get_artwork",
+         ARTWORK_QUERY.format(columns=artwork_columns), (1,), {}),
+        ("exhibition.get_all_exhibitions (status)",
+         exhibitions_by_status[0], exhibitions_by_status[1] + (PAGE_LIMIT,), {}),
+        ("exhibition.get_all_exhibitions (what's on now)",
+         exhibitions_now[0], exhibitions_now[1] + (PAGE_LIMIT,), SORTS_FILTERED_ROWS),
+        ("exhibition.get_all_exhibitions (after)",
+         exhibitions_after[0], exhibitions_after[1] + (PAGE_LIMIT,), {}),
+        ("exhibition.stream_all_exhibitions",
+         EXHIBITIONS_EXPORT_QUERY.format(columns=exhibition_columns, where=""), (), {}),
+        ("exhibition.get_exhibition",
+         EXHIBITION_QUERY.format(columns=exhibition_columns), (1,), {}),
+        ("database.get_all_contact_messages (status)",
+         messages_by_status[0], messages_by_status[1] + (PAGE_LIMIT,), {}),
+        ("database.get_all_contact_messages (source)",
+         messages_by_source[0], messages_by_source[1] + (PAGE_LIMIT,), {}),
+        ("database.get_all_contact_messages (after)",
+         messages_after[0], messages_after[1] + (PAGE_LIMIT,), {}),
+        ("database.stream_contact_messages (status)",
+         messages_export[0], messages_export[1], {}),
+        ("database.count_unread_messages", UNREAD_COUNT_QUERY, (), {}),
+        ("database.update_message_status", UPDATE_MESSAGE_STATUS_QUERY, ('read', 1), {}),
+        ("db_operations.stream_all_orders", ORDERS_QUERY, (), {}),
+        ("db_operations.get_order_details", ARTWORK_ORDER_DETAILS_QUERY, (1,), {}),
+        ("db_operations.get_all_tickets", TICKETS_QUERY, (), {}),
+        ("mpesa.check_transaction_status", TRANSACTION_QUERY, ('ws_CO_0',), {}),
+        ("mpesa.update_transaction_status", UPDATE_TRANSACTION_QUERY, ('completed', '0', 'ok', 'ws_CO_0'), {}),
+        ("auth.login_user", LOGIN_USER_QUERY, ('user@example.com', 'x'), {}),
+        ("auth.login_admin", LOGIN_ADMIN_QUERY, ('admin@example.com', 'x'), {}),
+    ]
+
+# MySQL EXPLAIN notes meaning a unique index already proved there is no row
+RESOLVED_BY_INDEX = ("no matching row in const table", "Impossible WHERE noticed after reading const tables")
+
+def _mysql_problems(cursor, query, params, allow_filesort):
+    cursor.execute("EXPLAIN " + query, params)
+    columns = cursor.column_names
+    problems = []
+    for row in cursor.fetchall():
+        plan = dict(zip(columns, row))
+        table = plan.get('table')
+        extra = plan.get('Extra') or ''
+        if isinstance(extra, bytes):
+            extra = extra.decode()
+        if any(note in extra for note in RESOLVED_BY_INDEX):
+            continue
+        if plan.get('type') == 'ALL' or not plan.get('key'):
+            problems.append(f"full scan of {table}")
+        if 'Using filesort' in extra and not allow_filesort:
+            problems.append(f"filesort on {table}")
+    return problems
+
+def _sqlite_problems(cursor, query, params, allow_filesort):
+    # EXPLAIN QUERY PLAN rows are (id, parent, notused, detail), detail being
+    # e.g. "SCAN artworks", "SEARCH u USING INTEGER PRIMARY KEY (rowid=?)",
+    # "SCAN artworks USING INDEX idx_artworks_created_at" (index order, no
+    # sort) or "USE TEMP B-TREE FOR ORDER BY" (a sort)
+    cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+    problems = []
+    for row in cursor.fetchall():
+        detail = row[-1]
+        words = detail.split()
+        if words[0] in ('SCAN', 'SEARCH'):
+            table = words[2] if words[1] == 'TABLE' else words[1]
+            if words[0] == 'SCAN' and 'INDEX' not in words and 'PRIMARY' not in words:
+                problems.append(f"full scan of {table}")
+        elif detail.startswith('USE TEMP B-TREE FOR') and 'ORDER BY' in detail:
+            if not allow_filesort:
+                problems.append("sort without an index")
+    return problems
+
+def explain_problems(cursor, query, params, allow_filesort=False):
+    """Return a list of problems found in the query plan of a query"""
+    if get_backend().dialect == 'sqlite':
+        return _sqlite_problems(cursor, query, params, allow_filesort)
+    return _mysql_problems(cursor, query, params, allow_filesort)
+
+def check_indexes():
+    """EXPLAIN every hot query and report the ones not served by an index"""
+    connection = get_db_connection()
+    if connection is None:
+        print("Failed to connect to database")
+        return False
+
+    cursor = connection.cursor()
+    queries = hot_queries()
+    failures = 0
+
+    try:
+        for name, query, params, options in queries:
+            problems = explain_problems(cursor, query, params, **options)
+            if problems:
+                failures += 1
+                print(f"FAIL {name}: {', '.join(problems)}")
+            else:
+                print(f"ok   {name}")
+    except Error as e:
+        print(f"Error explaining queries: {e}")
+        return False
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+    print(f"{len(queries) - failures}/{len(queries)} hot queries use an index")
+    return failures == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if check_indexes() else 1)
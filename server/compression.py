@@ -0,0 +1,107 @@
+import os
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Response compression negotiated from Accept-Encoding.
+#
+# JSON bodies of at least COMPRESSION_MIN_SIZE bytes are sent gzip or deflate
+# encoded when the client accepts it. Bodies of cacheable routes are kept in
+# a byte-bounded LRU keyed by a digest of the uncompressed body, so a hot
+# listing is compressed once, not on every hit. Output is deterministic (no
+# gzip timestamp), so equal bodies always compress to equal bytes.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+COMPRESSION_CACHE_BYTES = int(os.environ.get('COMPRESSION_CACHE_BYTES', 8 * 1024 * 1024))
+
+# zlib window bits per content coding ('deflate' is the zlib format, RFC 9110)
+_WBITS = {'gzip': 31, 'deflate': 15}
+# Preferred coding when the client accepts several with the same q-value
+_PREFERENCE = ('gzip', 'deflate')
+
+def negotiate(accept_encoding):
+    """Pick a content coding from an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+    wildcard = weights.get('*', 0.0)
+    best, best_q = None, 0.0
+    for coding in _PREFERENCE:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def compress(body, encoding, level=COMPRESSION_LEVEL):
+    return zlib.compress(body, level, _WBITS[encoding])
+
+def compress_chunks(chunks, encoding, level=COMPRESSION_LEVEL):
+    """Compress a stream of byte chunks as one encoded body"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+class CompressedCache:
+    """LRU of compressed bodies, bounded by their total size in bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (encoding, digest) -> compressed body
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compress(self, body, encoding):
+        key = (encoding, hashlib.sha256(body).digest())
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = compress(body, encoding)
+        if len(compressed) > self.max_bytes:
+            return compressed
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self._bytes += len(compressed)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return compressed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+compressed_cache = CompressedCache(COMPRESSION_CACHE_BYTES)
+
+def encode_body(body, encoding, cacheable=False):
+    """Compress a response body, reusing earlier work for cacheable routes"""
+    if cacheable:
+        return compressed_cache.compress(body, encoding)
+    return compress(body, encoding)
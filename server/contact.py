@@ -1,24 +1,9 @@
 
 from database import save_contact_message, get_all_contact_messages, update_message_status
-import json
+from database import count_unread_messages, stream_contact_messages, MESSAGES_PAGE_SIZE
 import jwt
 import os
-from decimal import Decimal
 from middleware import SECRET_KEY
-from datetime import datetime
-
-# Custom JSON encoder to handle Decimal types and datetime objects
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super(CustomJSONEncoder, self).default(obj)
-
-def json_dumps(obj):
-    """Convert object to JSON string, handling Decimal and datetime types"""
-    return json.dumps(obj, cls=CustomJSONEncoder)
 
 def is_admin(auth_header):
     """Simple check if request has admin auth header"""
@@ -47,27 +32,44 @@ def create_contact_message(data):
     # Print result for debugging
     print(f"Save result: {result}")
     
-    # Convert any Decimal values to float
-    if isinstance(result, dict):
-        return json.loads(json_dumps(result))
     return result
 
-def get_messages(auth_header):
-    """Get all contact messages (admin only)"""
+def get_messages(auth_header, limit=MESSAGES_PAGE_SIZE, after=None, status=None, source=None,
+                 date_from=None, date_to=None):
+    """Get a page of contact messages (admin only)
+
+    Raises ValueError for invalid filters or cursor.
+    """
     if not auth_header:
         print("No auth header provided")
         return {"error": "Authentication required"}
     
-    print("Admin authorized, fetching all contact messages")
-    result = get_all_contact_messages()
+    print("Admin authorized, fetching contact messages")
+    # The result is serialized once, by the server, when it is sent
+    return get_all_contact_messages(limit, after, status=status, source=source,
+                                    date_from=date_from, date_to=date_to)
+
+def export_messages(auth_header, status=None, source=None, date_from=None, date_to=None):
+    """Stream every matching contact message (admin only)
+
+    Returns a RowStream, or a dict with an "error" key.
+    Raises ValueError for invalid filters.
+    """
+    if not auth_header:
+        return {"error": "Authentication required"}
     
-    # Print result for debugging
-    print(f"Fetch messages result: {result}")
+    stream = stream_contact_messages(status=status, source=source,
+                                     date_from=date_from, date_to=date_to)
+    if stream is None:
+        return {"error": "Database connection failed"}
+    return stream
+
+def get_unread_count(auth_header):
+    """Get the number of unread contact messages (admin only)"""
+    if not auth_header:
+        return {"error": "Authentication required"}
     
-    # Use custom JSON encoder for Decimal and datetime values
-    if isinstance(result, dict) and 'messages' in result:
-        return json.loads(json_dumps(result))
-    return result
+    return count_unread_messages()
 
 def update_message(auth_header, message_id, data):
     """Update the status of a message (admin only)"""
@@ -78,12 +80,7 @@ def update_message(auth_header, message_id, data):
     if not status or status not in ['new', 'read', 'replied']:
         return {"error": "Invalid status value"}
     
-    result = update_message_status(message_id, status)
-    
-    # Convert any Decimal values to float
-    if isinstance(result, dict):
-        return json.loads(json_dumps(result))
-    return result
+    return update_message_status(message_id, status)
 
 # WhatsApp message handling would need additional server-side code
 # This would typically involve setting up a webhook to receive messages from WhatsApp API
@@ -1,8 +1,8 @@
 
 import hashlib
 import sys
-from db_setup import get_db_connection
-from mysql.connector import Error
+from database import get_db_connection
+from db_backend import Error
 
 def hash_password(password):
     """Hash a password using SHA-256"""
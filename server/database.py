@@ -1,18 +1,14 @@
 
-import mysql.connector
-from mysql.connector import Error
-import json
-from decimal import Decimal
-from datetime import datetime
-
-# Custom JSON encoder to handle Decimal types and datetime objects
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super(DecimalEncoder, self).default(obj)
+import os
+import threading
+import contextvars
+from datetime import datetime, date, timedelta
+from contextlib import contextmanager
+from db_pool import ConnectionPool, PoolTimeout
+from db_backend import Error, create_backend
+from query_stats import instrument
+from models import ContactMessage
+from pagination import encode_cursor, decode_cursor
 
 # Database connection configuration
 DB_CONFIG = {
@@ -22,31 +18,297 @@ DB_CONFIG = {
     'database': 'artgallery'
 }
 
-def get_db_connection():
-    """Create and return a database connection"""
+# Database backend: 'mysql' (default) or 'sqlite' for tests, benchmarks and
+# local load tests without a MySQL server
+DB_BACKEND = os.environ.get('DB_BACKEND', 'mysql')
+SQLITE_PATH = os.environ.get('SQLITE_PATH', os.path.join(os.path.dirname(__file__), 'artgallery.sqlite3'))
+
+# Connection pool configuration
+POOL_CONFIG = {
+    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 20)),
+    'idle_timeout': float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+    'checkout_timeout': float(os.environ.get('DB_POOL_CHECKOUT_TIMEOUT', 10)),
+    'ping_interval': float(os.environ.get('DB_POOL_PING_INTERVAL', 30)),
+}
+
+_backend = None
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_backend():
+    """Return the configured database backend"""
+    global _backend
+    if _backend is None:
+        _backend = create_backend(DB_BACKEND, DB_CONFIG, SQLITE_PATH)
+    return _backend
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(get_backend().connect, **POOL_CONFIG)
+    return _pool
+
+def warm_pool():
+    """Open the pool's DB_POOL_MIN_SIZE connections ahead of the first request"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        if connection.is_connected():
-            return connection
+        opened = get_pool().warm()
+        if opened:
+            print(f"Opened {opened} database connections")
     except Error as e:
-        print(f"Error connecting to MySQL: {e}")
+        print(f"Error connecting to database: {e}")
+
+def close_pool():
+    """Close the connection pool; the next get_pool() opens a new one"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+def _forget_pool():
+    # A forked child must not share the parent's connections: drop the
+    # inherited pool without closing its sockets, which the parent still uses
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_pool)
+
+def _acquire():
+    try:
+        # Cursors of handed-out connections are timed (see query_stats)
+        return instrument(get_pool().acquire())
+    except PoolTimeout as e:
+        print(f"Error getting database connection: {e}")
+    except Error as e:
+        print(f"Error connecting to database: {e}")
     return None
 
-# Helper function to safely encode JSON with Decimal and datetime values
-def json_dumps(data):
-    """Safely convert data to JSON string, handling Decimal and datetime types"""
-    return json.dumps(data, cls=DecimalEncoder)
+def get_db_connection():
+    """Return a database connection.
+
+    Inside a request scope every call shares the request's connection and its
+    transaction. Otherwise a connection is borrowed from the pool and close()
+    returns it.
+    """
+    scope = _current_scope.get()
+    if scope is not None:
+        return scope.get_connection()
+    return _acquire()
+
+# Request-scoped unit of work
+_current_scope = contextvars.ContextVar('db_request_scope', default=None)
+
+class ScopedConnection:
+    """The request's connection as seen by module functions.
+
+    commit() and close() are deferred to the end of the request, and cursors
+    are buffered so several functions can use the connection in turn.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault('buffered', True)
+        return self._connection.cursor(*args, **kwargs)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+class RequestScope:
+    """One lazily opened connection and one transaction per request"""
+
+    def __init__(self):
+        self._connection = None
+        self._failed = False
+        self._on_commit = []
+
+    def get_connection(self):
+        if self._connection is None:
+            if self._failed:
+                return None
+            connection = _acquire()
+            if connection is None:
+                # Don't retry the pool for every function in a failing request
+                self._failed = True
+                return None
+            self._connection = connection
+        return ScopedConnection(self._connection)
+
+    def commit(self):
+        """Commit pending work; returns False if the commit failed"""
+        connection = self._connection
+        if connection is not None and getattr(connection, 'in_transaction', True):
+            try:
+                connection.commit()
+            except Error as e:
+                print(f"Error committing request transaction: {e}")
+                self.rollback()
+                return False
+        self._run_on_commit()
+        return True
+
+    def _run_on_commit(self):
+        callbacks, self._on_commit = self._on_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in on_commit callback: {e}")
+
+    def rollback(self):
+        self._on_commit = []
+        if self._connection is not None:
+            try:
+                self._connection.rollback()
+            except Error as e:
+                print(f"Error rolling back request transaction: {e}")
+
+    def release(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.close()
+
+@contextmanager
+def request_scope():
+    """Run a block as one unit of work: commit on success, roll back on error"""
+    scope = RequestScope()
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+        scope.commit()
+    except BaseException:
+        scope.rollback()
+        raise
+    finally:
+        _current_scope.reset(token)
+        scope.release()
+
+def on_commit(callback):
+    """Run callback once the current request's transaction has committed.
+
+    Outside a request scope the caller has already committed, so the
+    callback runs at once. It is dropped if the transaction rolls back.
+    """
+    scope = _current_scope.get()
+    if scope is None:
+        callback()
+    else:
+        scope._on_commit.append(callback)
+
+def commit_request():
+    """Commit the current request's work early (e.g. before responding)"""
+    scope = _current_scope.get()
+    if scope is None:
+        return True
+    return scope.commit()
+
+# Rows fetched per round trip when streaming a result set
+STREAM_BATCH_SIZE = int(os.environ.get('DB_STREAM_BATCH_SIZE', 500))
+
+def stream_rows(query, params, model, prepare=None, fields=None):
+    """Run a query and return a RowStream of its rows as JSON dicts.
+
+    Returns None if no connection is available.
+    """
+    connection = _acquire()
+    if connection is None:
+        return None
+    return RowStream(connection, query, params, model, prepare, fields)
+
+class RowStream:
+    """Iterator over a large result set in constant memory.
+
+    Rows are read from an unbuffered cursor STREAM_BATCH_SIZE at a time. The
+    stream has its own pooled connection (not the request's), returned when
+    the rows are exhausted or close() is called, whichever comes first.
+    The query runs on first iteration. Rows are loaded as model objects and
+    turned into JSON dicts by prepare (default: to_json()); fields optionally
+    restricts the JSON keys.
+    """
 
-def dict_from_row(row, cursor):
-    """Convert a database row to a dictionary"""
-    result = {cursor.column_names[i]: value for i, value in enumerate(row)}
-    # Convert Decimal objects to float for JSON serialization
-    for key, value in result.items():
-        if isinstance(value, Decimal):
-            result[key] = float(value)
-    return result
+    def __init__(self, connection, query, params, model, prepare=None, fields=None):
+        self._connection = connection
+        self._cursor = None
+        self._query = query
+        self._params = params
+        self._model = model
+        self._prepare = prepare or model.to_json
+        self._fields = fields
+
+    def __iter__(self):
+        try:
+            self._cursor = self._connection.cursor(buffered=False)
+            self._cursor.execute(self._query, self._params)
+            load = self._model.mapper(self._cursor.column_names, self._fields).load
+            prepare = self._prepare
+            while True:
+                rows = self._cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield prepare(load(row))
+        finally:
+            self.close()
+
+    def close(self):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        if self._cursor is not None:
+            try:
+                self._cursor.close()
+            except Error as e:
+                # Abandoned mid-result (e.g. the client went away); the pool
+                # discards a connection that still has unread rows
+                print(f"Error closing streaming cursor: {e}")
+        connection.close()
 
 # Contact message functions
+MESSAGE_STATUSES = ('new', 'read', 'replied')
+
+# Page sizes for GET /messages
+MESSAGES_PAGE_SIZE = 100
+MESSAGES_MAX_PAGE_SIZE = 100
+
+# Inbox queries; {where} holds the filters built by message_filters().
+# check_indexes.py EXPLAINs these same strings.
+MESSAGES_PAGE_QUERY = """
+SELECT id, name, email, phone, message, date, status, source
+FROM contact_messages
+{where}
+ORDER BY date DESC, id DESC
+LIMIT %s
+"""
+# Keyset condition for the page after (date, id)
+MESSAGES_AFTER = "(date < %s OR (date = %s AND id < %s))"
+MESSAGES_EXPORT_QUERY = """
+SELECT id, name, email, phone, message, date, status, source
+FROM contact_messages
+{where}
+ORDER BY date DESC, id DESC
+"""
+UNREAD_COUNT_QUERY = "SELECT COUNT(*) FROM contact_messages WHERE status = 'new'"
+UPDATE_MESSAGE_STATUS_QUERY = """
+UPDATE contact_messages
+SET status = %s
+WHERE id = %s
+"""
+
 def save_contact_message(name, email, phone, message, source='contact_form'):
     """Save a new contact message"""
     connection = get_db_connection()
@@ -56,16 +318,6 @@ def save_contact_message(name, email, phone, message, source='contact_form'):
     try:
         cursor = connection.cursor()
         
-        # Check if contact_messages table has source column
-        cursor.execute("SHOW COLUMNS FROM contact_messages LIKE 'source'")
-        source_exists = cursor.fetchone()
-        
-        if not source_exists:
-            # Add source column if it doesn't exist
-            print("Adding source column to contact_messages table")
-            cursor.execute("ALTER TABLE contact_messages ADD COLUMN source VARCHAR(50) DEFAULT 'contact_form'")
-            connection.commit()
-        
         # Insert the message into the database
         query = """
         INSERT INTO contact_messages (name, email, phone, message, source, status)
@@ -88,8 +340,51 @@ def save_contact_message(name, email, phone, message, source='contact_form'):
             cursor.close()
             connection.close()
 
-def get_all_contact_messages():
-    """Get all contact messages"""
+def message_filters(status=None, source=None, date_from=None, date_to=None):
+    """Validate the message list filters and return (conditions, params).
+
+    Raises ValueError for an invalid status or date.
+    """
+    if status is not None and status not in MESSAGE_STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(MESSAGE_STATUSES)}")
+    try:
+        date_from = date.fromisoformat(date_from) if date_from else None
+        date_to = date.fromisoformat(date_to) if date_to else None
+    except ValueError:
+        raise ValueError("from and to must be dates in YYYY-MM-DD format")
+    
+    conditions = []
+    params = []
+    if status:
+        conditions.append("status = %s")
+        params.append(status)
+    if source:
+        conditions.append("source = %s")
+        params.append(source)
+    if date_from:
+        conditions.append("date >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append("date < %s")
+        params.append(date_to + timedelta(days=1))
+    return conditions, params
+
+def get_all_contact_messages(limit=MESSAGES_PAGE_SIZE, after=None, status=None, source=None,
+                             date_from=None, date_to=None):
+    """Get a page of contact messages, newest first.
+
+    status:    only messages with this status (new, read, replied)
+    source:    only messages from this source (e.g. contact_form, chatbot)
+    date_from: only messages received on or after this date (YYYY-MM-DD)
+    date_to:   only messages received on or before this date (YYYY-MM-DD)
+    after:     the opaque cursor returned as "next" by the previous page
+
+    Raises ValueError for invalid filters or cursor.
+    """
+    limit = min(limit, MESSAGES_MAX_PAGE_SIZE)
+    conditions, params = message_filters(status, source, date_from, date_to)
+    after_key = decode_cursor(after, (datetime, int)) if after else None
+    
     connection = get_db_connection()
     if connection is None:
         return {"error": "Database connection failed"}
@@ -97,21 +392,28 @@ def get_all_contact_messages():
     try:
         cursor = connection.cursor()
         
-        # Get all messages ordered by date (newest first)
-        query = """
-        SELECT * FROM contact_messages
-        ORDER BY date DESC
-        """
-        cursor.execute(query)
+        # Filters and keyset use the (status|source, date, id) indexes
+        if after_key:
+            conditions.append(MESSAGES_AFTER)
+            params.extend([after_key[0], after_key[0], after_key[1]])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        # Get messages ordered by date (newest first)
+        query = MESSAGES_PAGE_QUERY.format(where=where)
+        # Fetch one extra row to know whether there is a next page
+        cursor.execute(query, params + [limit + 1])
         rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        messages = ContactMessage.mapper(cursor.column_names).load_all(rows)
         
-        messages = []
-        for row in rows:
-            message_dict = dict_from_row(row, cursor)
-            messages.append(message_dict)
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(messages[-1].date, messages[-1].id)
         
         print(f"Retrieved {len(messages)} messages")
-        return {"messages": messages}
+        return {"messages": [message.to_json() for message in messages], "next": next_cursor}
     
     except Error as e:
         print(f"Error getting contact messages: {e}")
@@ -122,6 +424,41 @@ def get_all_contact_messages():
             cursor.close()
             connection.close()
 
+def stream_contact_messages(status=None, source=None, date_from=None, date_to=None):
+    """Stream every matching contact message, newest first (for exports).
+
+    Returns a RowStream, or None if no connection is available.
+    Raises ValueError for invalid filters.
+    """
+    conditions, params = message_filters(status, source, date_from, date_to)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = MESSAGES_EXPORT_QUERY.format(where=where)
+    return stream_rows(query, params, ContactMessage)
+
+def count_unread_messages():
+    """Count messages that haven't been read yet"""
+    connection = get_db_connection()
+    if connection is None:
+        return {"error": "Database connection failed"}
+    
+    try:
+        cursor = connection.cursor()
+        
+        # Index-only count on idx_contact_messages_status_date
+        cursor.execute(UNREAD_COUNT_QUERY)
+        (unread,) = cursor.fetchone()
+        
+        return {"unread": unread}
+    
+    except Error as e:
+        print(f"Error counting unread messages: {e}")
+        return {"error": str(e)}
+    
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
 def update_message_status(message_id, status):
     """Update the status of a message"""
     connection = get_db_connection()
@@ -132,12 +469,7 @@ def update_message_status(message_id, status):
         cursor = connection.cursor()
         
         # Update the message status
-        query = """
-        UPDATE contact_messages
-        SET status = %s
-        WHERE id = %s
-        """
-        cursor.execute(query, (status, message_id))
+        cursor.execute(UPDATE_MESSAGE_STATUS_QUERY, (status, message_id))
         connection.commit()
         
         if cursor.rowcount == 0:
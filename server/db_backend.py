@@ -0,0 +1,151 @@
+import re
+import sqlite3
+from decimal import Decimal
+from datetime import date, datetime
+
+try:
+    import mysql.connector
+except ImportError:  # Only needed for the MySQL backend
+    mysql = None
+
+# Exceptions raised by the database drivers, for `except Error` clauses.
+# A tuple, so it catches errors from whichever backend is in use.
+if mysql is not None:
+    Error = (mysql.connector.Error, sqlite3.Error)
+else:
+    Error = (sqlite3.Error,)
+
+class MySQLBackend:
+    """Production backend: mysql.connector with DB_CONFIG"""
+
+    dialect = 'mysql'
+
+    def __init__(self, config):
+        if mysql is None:
+            raise RuntimeError("mysql-connector-python is required for the MySQL backend")
+        self.config = config
+
+    def connect(self):
+        return mysql.connector.connect(**self.config)
+
+    def describe(self):
+        return f"MySQL database '{self.config.get('database')}' on {self.config.get('host')}"
+
+class SQLiteBackend:
+    """Embedded backend for tests, benchmarks and local load tests.
+
+    Connections behave like mysql.connector ones as far as the modules are
+    concerned: %s placeholders, cursor.column_names, lastrowid, Decimal for
+    DECIMAL columns and date/datetime for DATE/TIMESTAMP columns.
+    """
+
+    dialect = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        connection = sqlite3.connect(
+            self.path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,  # Pooled connections move between threads
+            timeout=30
+        )
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("PRAGMA journal_mode = WAL")
+        return SQLiteConnection(connection)
+
+    def describe(self):
+        return f"SQLite database {self.path}"
+
+# Values handed to and read back from SQLite
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DECIMAL", lambda value: Decimal(value.decode()))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+
+PLACEHOLDER = re.compile(r'%s')
+
+class SQLiteConnection:
+    """sqlite3 connection with the parts of the mysql.connector API we use"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._closed = False
+
+    def cursor(self, *args, **kwargs):
+        # buffered/dictionary/etc. are mysql.connector options; SQLite
+        # cursors can always be shared on one connection
+        return SQLiteCursor(self._connection.cursor())
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def is_connected(self):
+        return not self._closed
+
+    def close(self):
+        self._closed = True
+        self._connection.close()
+
+class SQLiteCursor:
+    """sqlite3 cursor accepting %s placeholders and exposing column_names"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        self._cursor.execute(PLACEHOLDER.sub('?', query), tuple(params or ()))
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._cursor.fetchmany()
+        return self._cursor.fetchmany(size)
+
+    @property
+    def column_names(self):
+        if self._cursor.description is None:
+            return ()
+        return tuple(column[0] for column in self._cursor.description)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+def create_backend(name, mysql_config, sqlite_path):
+    """Return the backend selected by name ('mysql' or 'sqlite')"""
+    if name == 'mysql':
+        return MySQLBackend(mysql_config)
+    if name == 'sqlite':
+        return SQLiteBackend(sqlite_path)
+    raise ValueError(f"Unknown database backend: {name}")
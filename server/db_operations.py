@@ -1,9 +1,41 @@
 
-from database import get_db_connection
+from database import get_db_connection, stream_rows
+from models import Order, Booking
 from decimal import Decimal
 import random
 import string
 
+# Admin listing and lookup queries (EXPLAINed by check_indexes.py)
+ORDERS_QUERY = """
+SELECT ao.id, ao.user_id, u.name as user_name, ao.artwork_id,
+       a.title as item_title, a.image_url as artwork_image_url,
+       ao.order_date, ao.total_amount, ao.payment_status
+FROM artwork_orders ao
+JOIN users u ON ao.user_id = u.id
+JOIN artworks a ON ao.artwork_id = a.id
+ORDER BY ao.order_date DESC
+"""
+ARTWORK_ORDER_DETAILS_QUERY = """
+SELECT ao.id, ao.user_id, u.name as user_name, u.email as user_email,
+       u.phone as user_phone, ao.artwork_id, a.title as artwork_title,
+       a.artist, a.image_url as artwork_image, a.price, a.dimensions,
+       a.medium, a.year, ao.order_date, ao.total_amount,
+       ao.payment_status, ao.delivery_address
+FROM artwork_orders ao
+JOIN users u ON ao.user_id = u.id
+JOIN artworks a ON ao.artwork_id = a.id
+WHERE ao.id = %s
+"""
+TICKETS_QUERY = """
+SELECT b.id, b.user_id, u.name as user_name, b.exhibition_id,
+       e.title as exhibition_title, b.booking_date, b.ticket_code,
+       b.slots, b.status, b.payment_status, b.total_amount
+FROM exhibition_bookings b
+JOIN users u ON b.user_id = u.id
+JOIN exhibitions e ON b.exhibition_id = e.id
+ORDER BY b.booking_date DESC
+"""
+
 def generate_ticket_code():
     """Generate a unique ticket code"""
     prefix = 'TKT'
@@ -86,50 +118,13 @@ def create_ticket(user_id, exhibition_id, slots):
             cursor.close()
             connection.close()
 
-def get_all_orders():
-    """Get all orders from database"""
-    connection = get_db_connection()
-    if connection is None:
-        return {"error": "Database connection failed"}
-    
-    cursor = connection.cursor()
-    
-    try:
-        # Get artwork orders with artwork title
-        query = """
-        SELECT ao.id, ao.user_id, u.name as user_name, ao.artwork_id, 
-               a.title as item_title, a.image_url as artwork_image_url,
-               ao.order_date, ao.total_amount, ao.payment_status
-        FROM artwork_orders ao
-        JOIN users u ON ao.user_id = u.id
-        JOIN artworks a ON ao.artwork_id = a.id
-        ORDER BY ao.order_date DESC
-        """
-        cursor.execute(query)
-        
-        artwork_orders = []
-        for row in cursor.fetchall():
-            order = {}
-            order['id'] = row[0]
-            order['user_id'] = row[1]
-            order['user_name'] = row[2]
-            order['reference_id'] = row[3]
-            order['item_title'] = row[4]
-            order['image_url'] = row[5]
-            order['date'] = row[6]
-            order['amount'] = row[7]
-            order['status'] = row[8]
-            order['type'] = 'artwork'
-            artwork_orders.append(order)
-            
-        return {"orders": artwork_orders}
-    except Exception as e:
-        print(f"Error getting orders: {e}")
-        return {"error": str(e)}
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+def stream_all_orders():
+    """Stream every order, newest first, in constant memory.
+
+    Returns a RowStream of Order entries, or None if no connection is
+    available.
+    """
+    return stream_rows(ORDERS_QUERY, (), Order)
 
 def get_order_details(order_id, order_type):
     """Get details for a specific order"""
@@ -142,18 +137,7 @@ def get_order_details(order_id, order_type):
     try:
         if order_type == 'artwork':
             # Get artwork order details
-            query = """
-            SELECT ao.id, ao.user_id, u.name as user_name, u.email as user_email, 
-                   u.phone as user_phone, ao.artwork_id, a.title as artwork_title, 
-                   a.artist, a.image_url as artwork_image, a.price, a.dimensions,
-                   a.medium, a.year, ao.order_date, ao.total_amount, 
-                   ao.payment_status, ao.delivery_address
-            FROM artwork_orders ao
-            JOIN users u ON ao.user_id = u.id
-            JOIN artworks a ON ao.artwork_id = a.id
-            WHERE ao.id = %s
-            """
-            cursor.execute(query, (order_id,))
+            cursor.execute(ARTWORK_ORDER_DETAILS_QUERY, (order_id,))
             row = cursor.fetchone()
             
             if not row:
@@ -193,8 +177,27 @@ def get_order_details(order_id, order_type):
             connection.close()
 
 def get_all_tickets():
-    """Get all tickets from database"""
-    # ... keep existing code
+    """Get all tickets (exhibition bookings) from database, newest first"""
+    connection = get_db_connection()
+    if connection is None:
+        return {"error": "Database connection failed"}
+    
+    cursor = connection.cursor()
+    
+    try:
+        cursor.execute(TICKETS_QUERY)
+        
+        mapper = Booking.mapper(cursor.column_names)
+        tickets = [booking.to_json() for booking in mapper.load_all(cursor.fetchall())]
+        
+        return {"tickets": tickets}
+    except Exception as e:
+        print(f"Error getting tickets: {e}")
+        return {"error": str(e)}
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
     
 def get_user_orders(user_id):
     """Get all orders and bookings for a specific user"""
@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import deque
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out in time"""
+    pass
+
+class PooledConnection:
+    """Wrapper around a raw connection that returns it to the pool on close()
+
+    Everything except close() and is_connected() is delegated to the raw
+    connection, so existing code can keep calling cursor(), commit(), etc.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise AttributeError(f"Connection already returned to pool ({name})")
+        return getattr(raw, name)
+
+    def is_connected(self):
+        """Report whether this connection is still checked out.
+
+        Liveness is verified by the pool on checkout, so this does not ping
+        the server (the usual `if connection.is_connected(): close()` pattern
+        must always return the connection to the pool).
+        """
+        return self._raw is not None
+
+    def close(self):
+        """Return the connection to the pool instead of closing it"""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw)
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of database connections
+
+    connect:          callable returning a new raw connection
+    min_size:         connections opened by warm() and kept open even when unused
+    max_size:         hard limit on open connections (idle + checked out)
+    idle_timeout:     seconds after which idle connections above min_size are closed
+    checkout_timeout: seconds to wait for a free connection before PoolTimeout
+    ping_interval:    idle seconds after which a connection is pinged on checkout
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, idle_timeout=300,
+                 checkout_timeout=10, ping_interval=30):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.ping_interval = ping_interval
+
+        self._idle = deque()  # (raw_connection, returned_at), most recent on the right
+        self._size = 0  # open connections, idle or checked out
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def acquire(self, timeout=None):
+        """Check out a live connection, opening a new one if below max_size"""
+        if timeout is None:
+            timeout = self.checkout_timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            raw, idle_since = None, None
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                self._reap_idle()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"No database connection available after {timeout}s")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    raw, idle_since = self._idle.pop()
+                else:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+
+            if raw is None:
+                try:
+                    raw = self._connect()
+                except Exception:
+                    self._discard(None)
+                    raise
+                return PooledConnection(self, raw)
+
+            if time.monotonic() - idle_since < self.ping_interval or self._is_alive(raw):
+                return PooledConnection(self, raw)
+
+            # Stale connection: drop it and try again
+            self._discard(raw)
+
+    def warm(self):
+        """Open connections until min_size are idle; returns how many were opened"""
+        opened = 0
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return opened
+                # Reserve the slot before connecting outside the lock
+                self._size += 1
+            try:
+                raw = self._connect()
+            except Exception:
+                self._discard(None)
+                raise
+            with self._cond:
+                self._idle.append((raw, time.monotonic()))
+                self._cond.notify()
+            opened += 1
+
+    def release(self, raw):
+        """Return a raw connection to the idle set"""
+        try:
+            # Don't carry an open transaction (or its snapshot) into the next checkout
+            if getattr(raw, 'in_transaction', True):
+                raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                self._close_raw(raw)
+            else:
+                self._idle.append((raw, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        """Close all idle connections; checked out ones are closed on release"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                raw, _ = self._idle.popleft()
+                self._size -= 1
+                self._close_raw(raw)
+            self._cond.notify_all()
+
+    def stats(self):
+        """Return a snapshot of the pool counters"""
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+    def _reap_idle(self):
+        # Called with the lock held. Oldest idle connections sit on the left.
+        now = time.monotonic()
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0][1] > self.idle_timeout):
+            raw, _ = self._idle.popleft()
+            self._size -= 1
+            self._close_raw(raw)
+
+    def _discard(self, raw):
+        if raw is not None:
+            self._close_raw(raw)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_alive(raw):
+        try:
+            return raw.is_connected()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
@@ -1,226 +1,19 @@
 
-import mysql.connector
-from mysql.connector import Error
-
-# Database connection configuration
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',  # Update with your MySQL username
-    'password': '',  # Update with your MySQL password
-    'database': 'artgallery'
-}
-
-def get_db_connection():
-    """Create and return a database connection"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        if connection.is_connected():
-            print("MySQL Database connection successful")
-            return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-    return None
+from db_backend import Error
+from database import DB_CONFIG, get_backend
+from migrate import migrate
 
 def initialize_database():
-    """Create database tables if they don't exist"""
-    connection = get_db_connection()
-    if connection is None:
-        print("Failed to connect to database")
-        return False
-    
-    cursor = connection.cursor()
-    
-    # Create users table
-    users_table = """
-    CREATE TABLE IF NOT EXISTS users (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        name VARCHAR(255) NOT NULL,
-        email VARCHAR(255) NOT NULL UNIQUE,
-        password VARCHAR(255) NOT NULL,
-        phone VARCHAR(20),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-    
-    # Create admins table
-    admins_table = """
-    CREATE TABLE IF NOT EXISTS admins (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        name VARCHAR(255) NOT NULL,
-        email VARCHAR(255) NOT NULL UNIQUE,
-        password VARCHAR(255) NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-    
-    # Create artworks table
-    artworks_table = """
-    CREATE TABLE IF NOT EXISTS artworks (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        title VARCHAR(255) NOT NULL,
-        artist VARCHAR(255) NOT NULL,
-        description TEXT,
-        price DECIMAL(10, 2) NOT NULL,
-        image_url VARCHAR(255),
-        dimensions VARCHAR(100),
-        medium VARCHAR(100),
-        year INT,
-        status ENUM('available', 'sold') NOT NULL DEFAULT 'available',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-    
-    # Create exhibitions table
-    exhibitions_table = """
-    CREATE TABLE IF NOT EXISTS exhibitions (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        title VARCHAR(255) NOT NULL,
-        description TEXT,
-        location VARCHAR(255) NOT NULL,
-        start_date DATE NOT NULL,
-        end_date DATE NOT NULL,
-        ticket_price DECIMAL(10, 2) NOT NULL,
-        image_url VARCHAR(255),
-        total_slots INT NOT NULL,
-        available_slots INT NOT NULL,
-        status ENUM('upcoming', 'ongoing', 'past') NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-    
-    # Create orders table - Updated to match schema.sql
-    orders_table = """
-    CREATE TABLE IF NOT EXISTS orders (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        user_id INT NOT NULL,
-        type ENUM('artwork', 'exhibition') NOT NULL,
-        reference_id INT NOT NULL,
-        amount DECIMAL(10, 2) NOT NULL,
-        status ENUM('pending', 'completed', 'cancelled') NOT NULL DEFAULT 'pending',
-        payment_method VARCHAR(50),
-        payment_status ENUM('pending', 'completed', 'failed') NOT NULL DEFAULT 'pending',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    );
-    """
-    
-    # Create tickets table - Updated to match schema.sql
-    tickets_table = """
-    CREATE TABLE IF NOT EXISTS tickets (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        user_id INT NOT NULL,
-        exhibition_id INT NOT NULL,
-        ticket_code VARCHAR(50) NOT NULL UNIQUE,
-        slots INT NOT NULL,
-        status ENUM('active', 'used', 'cancelled') NOT NULL DEFAULT 'active',
-        booking_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id),
-        FOREIGN KEY (exhibition_id) REFERENCES exhibitions(id)
-    );
-    """
-    
-    # Create artwork orders table
-    artwork_orders_table = """
-    CREATE TABLE IF NOT EXISTS artwork_orders (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        user_id INT NOT NULL,
-        artwork_id INT NOT NULL,
-        name VARCHAR(255) NOT NULL,
-        email VARCHAR(255) NOT NULL,
-        phone VARCHAR(20) NOT NULL,
-        delivery_address TEXT NOT NULL,
-        payment_method ENUM('mpesa') NOT NULL,
-        payment_status ENUM('pending', 'completed', 'failed') NOT NULL DEFAULT 'pending',
-        mpesa_transaction_id VARCHAR(50),
-        order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        total_amount DECIMAL(10, 2) NOT NULL,
-        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-        FOREIGN KEY (artwork_id) REFERENCES artworks(id) ON DELETE CASCADE
-    );
-    """
-    
-    # Create exhibition bookings table
-    exhibition_bookings_table = """
-    CREATE TABLE IF NOT EXISTS exhibition_bookings (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        user_id INT NOT NULL,
-        exhibition_id INT NOT NULL,
-        name VARCHAR(255) NOT NULL,
-        email VARCHAR(255) NOT NULL,
-        phone VARCHAR(20) NOT NULL,
-        slots INT NOT NULL,
-        payment_method ENUM('mpesa') NOT NULL,
-        payment_status ENUM('pending', 'completed', 'failed') NOT NULL DEFAULT 'pending',
-        mpesa_transaction_id VARCHAR(50),
-        booking_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        total_amount DECIMAL(10, 2) NOT NULL,
-        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-        FOREIGN KEY (exhibition_id) REFERENCES exhibitions(id) ON DELETE CASCADE
-    );
-    """
-    
-    # Create contact messages table
-    contact_messages_table = """
-    CREATE TABLE IF NOT EXISTS contact_messages (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        name VARCHAR(255) NOT NULL,
-        email VARCHAR(255) NOT NULL,
-        phone VARCHAR(20),
-        message TEXT NOT NULL,
-        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        status ENUM('new', 'read', 'replied') NOT NULL DEFAULT 'new',
-        source VARCHAR(50) DEFAULT 'contact_form'
-    );
-    """
-    
-    # Create mpesa transactions table
-    mpesa_transactions_table = """
-    CREATE TABLE IF NOT EXISTS mpesa_transactions (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        checkout_request_id VARCHAR(100) NOT NULL,
-        merchant_request_id VARCHAR(100) NOT NULL,
-        order_type VARCHAR(20) NOT NULL,
-        order_id INT NOT NULL,
-        user_id INT NOT NULL,
-        amount DECIMAL(10, 2) NOT NULL,
-        phone_number VARCHAR(20) NOT NULL,
-        result_code VARCHAR(10),
-        result_desc VARCHAR(255),
-        transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        status ENUM('pending', 'completed', 'failed') NOT NULL DEFAULT 'pending',
-        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-    );
-    """
-    
-    try:
-        cursor.execute(users_table)
-        cursor.execute(admins_table)
-        cursor.execute(artworks_table)
-        cursor.execute(exhibitions_table)
-        # Explicitly create orders and tickets tables before other tables that may depend on them
-        cursor.execute(orders_table)
-        cursor.execute(tickets_table)
-        cursor.execute(artwork_orders_table)
-        cursor.execute(exhibition_bookings_table)
-        cursor.execute(contact_messages_table)
-        cursor.execute(mpesa_transactions_table)
-        connection.commit()
-        print("Database initialized successfully")
-        return True
-    except Error as e:
-        print(f"Error initializing database: {e}")
-        return False
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+    """Create or upgrade the database tables by applying pending migrations"""
+    return migrate()
 
 def dict_from_row(row, cursor):
     """Convert a database row to a dictionary"""
     return {cursor.column_names[i]: value for i, value in enumerate(row)}
 
-if __name__ == "__main__":
-    # Create database if it doesn't exist
+def create_mysql_database():
+    """Create the MySQL database if it doesn't exist"""
+    import mysql.connector
     try:
         conn = mysql.connector.connect(
             host=DB_CONFIG['host'],
@@ -233,6 +26,11 @@ if __name__ == "__main__":
         conn.close()
     except Error as err:
         print(f"Error creating database: {err}")
+
+if __name__ == "__main__":
+    # Create database if it doesn't exist (SQLite creates the file on connect)
+    if get_backend().dialect == 'mysql':
+        create_mysql_database()
     
-    # Initialize tables
+    # Create or upgrade tables
     initialize_database()
@@ -1,15 +1,52 @@
 
-from database import get_db_connection, dict_from_row, json_dumps
+from database import get_db_connection, stream_rows
+from table_versions import changed
+from models import Exhibition
 from auth import verify_token
 import json
 import os
 import base64
 import time
 from decimal import Decimal
+from datetime import date
+from pagination import encode_cursor, decode_cursor
+from fieldsets import parse_fields, select_columns
 
 # Default exhibition image path
 DEFAULT_EXHIBITION_IMAGE = "/static/uploads/default_exhibition.jpg"
 
+EXHIBITION_STATUSES = ('upcoming', 'ongoing', 'past')
+
+# Response fields and the columns they are read from (?fields= whitelist)
+EXHIBITION_FIELDS = Exhibition.json_columns()
+
+# Page sizes for GET /exhibitions
+EXHIBITIONS_PAGE_SIZE = 100
+EXHIBITIONS_MAX_PAGE_SIZE = 100
+
+# Read queries; {columns} is the SELECT list and {where} the filters built
+# by exhibition_filters(). check_indexes.py EXPLAINs these same strings.
+EXHIBITIONS_PAGE_QUERY = """
+SELECT {columns}
+FROM exhibitions
+{where}
+ORDER BY start_date ASC, id ASC
+LIMIT %s
+"""
+# Keyset condition for the page after (start_date, id)
+EXHIBITIONS_AFTER = "(start_date > %s OR (start_date = %s AND id > %s))"
+EXHIBITIONS_EXPORT_QUERY = """
+SELECT {columns}
+FROM exhibitions
+{where}
+ORDER BY start_date ASC, id ASC
+"""
+EXHIBITION_QUERY = """
+SELECT {columns}
+FROM exhibitions
+WHERE id = %s
+"""
+
 # Ensure uploads directory exists
 def ensure_uploads_directory():
     """Create the uploads directory if it doesn't exist"""
@@ -70,8 +107,71 @@ def save_image_from_base64(base64_str, name_prefix="exhibition"):
         print(f"Error saving image: {e}")
         return DEFAULT_EXHIBITION_IMAGE
 
-def get_all_exhibitions():
-    """Get all exhibitions from the database"""
+def format_exhibition(exhibition):
+    """Prepare an Exhibition row for the API response (camelCase keys)"""
+    # Ensure the image URL is valid
+    if hasattr(exhibition, 'image_url'):
+        image_url = exhibition.image_url
+        # Convert base64 images to file paths
+        if image_url and (image_url.startswith('data:') or 'base64' in image_url):
+            # Save the base64 image to a file and get its path
+            saved_path = save_image_from_base64(image_url)
+            exhibition.image_url = saved_path
+            # Also update the database with the new path
+            update_exhibition_image(exhibition.id, saved_path)
+            print(f"Converted base64 image to file: {saved_path}")
+        elif not image_url:
+            exhibition.image_url = DEFAULT_EXHIBITION_IMAGE
+    
+    return exhibition.to_json()
+
+def exhibition_filters(status=None, date_from=None, date_to=None):
+    """Validate the exhibition list filters and return (conditions, params).
+
+    Raises ValueError for an invalid status or date.
+    """
+    if status is not None and status not in EXHIBITION_STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(EXHIBITION_STATUSES)}")
+    try:
+        date_from = date.fromisoformat(date_from) if date_from else None
+        date_to = date.fromisoformat(date_to) if date_to else None
+    except ValueError:
+        raise ValueError("from and to must be dates in YYYY-MM-DD format")
+    
+    # Filters are pushed down into indexed predicates:
+    # status + keyset use idx_exhibitions_status_start_date, the date
+    # window uses idx_exhibitions_end_date / idx_exhibitions_start_date
+    conditions = []
+    params = []
+    if status:
+        conditions.append("status = %s")
+        params.append(status)
+    if date_from:
+        conditions.append("end_date >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append("start_date <= %s")
+        params.append(date_to)
+    return conditions, params
+
+def get_all_exhibitions(limit=EXHIBITIONS_PAGE_SIZE, after=None, status=None, date_from=None, date_to=None,
+                        fields=None):
+    """Get a page of exhibitions ordered by start date.
+
+    status:    only exhibitions with this status (upcoming, ongoing, past)
+    date_from: only exhibitions still running on or after this date (YYYY-MM-DD)
+    date_to:   only exhibitions starting on or before this date (YYYY-MM-DD)
+    after:     the opaque cursor returned as "next" by the previous page
+    fields:    comma separated list of EXHIBITION_FIELDS to return
+
+    Raises ValueError for invalid filters, cursor or fields.
+    """
+    limit = min(limit, EXHIBITIONS_MAX_PAGE_SIZE)
+    conditions, params = exhibition_filters(status, date_from, date_to)
+    after_key = decode_cursor(after, (date, int)) if after else None
+    fields = parse_fields(fields, EXHIBITION_FIELDS)
+    columns = select_columns(fields, EXHIBITION_FIELDS, required=('start_date',))
+    
     connection = get_db_connection()
     if connection is None:
         return {"error": "Database connection failed"}
@@ -79,49 +179,27 @@ def get_all_exhibitions():
     cursor = connection.cursor()
     
     try:
-        query = """
-        SELECT id, title, description, location, start_date, end_date,
-               ticket_price, image_url, total_slots, available_slots, status
-        FROM exhibitions
-        ORDER BY start_date ASC
-        """
-        cursor.execute(query)
+        if after_key:
+            conditions.append(EXHIBITIONS_AFTER)
+            params.extend([after_key[0], after_key[0], after_key[1]])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        query = EXHIBITIONS_PAGE_QUERY.format(columns=', '.join(columns), where=where)
+        # Fetch one extra row to know whether there is a next page
+        cursor.execute(query, params + [limit + 1])
         rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         
-        exhibitions = []
-        for row in rows:
-            exhibition = dict_from_row(row, cursor)
-            
-            # Convert id to string to match frontend expectations
-            exhibition['id'] = str(exhibition['id'])
-            
-            # Convert dates to string format
-            exhibition['startDate'] = exhibition.pop('start_date').isoformat()
-            exhibition['endDate'] = exhibition.pop('end_date').isoformat()
-            
-            # Convert ticket_price to camelCase
-            exhibition['ticketPrice'] = exhibition.pop('ticket_price')
-            
-            # Convert image_url to camelCase and ensure it's valid
-            image_url = exhibition.pop('image_url')
-            # Convert base64 images to file paths
-            if image_url and (image_url.startswith('data:') or 'base64' in image_url):
-                # Save the base64 image to a file and get its path
-                saved_path = save_image_from_base64(image_url)
-                exhibition['imageUrl'] = saved_path
-                # Also update the database with the new path
-                update_exhibition_image(exhibition['id'], saved_path)
-                print(f"Converted base64 image to file: {saved_path}")
-            else:
-                exhibition['imageUrl'] = image_url if image_url else DEFAULT_EXHIBITION_IMAGE
-            
-            # Convert total_slots and available_slots to camelCase
-            exhibition['totalSlots'] = exhibition.pop('total_slots')
-            exhibition['availableSlots'] = exhibition.pop('available_slots')
-            
-            exhibitions.append(exhibition)
+        # start_date may be selected only for the cursor; the mapper leaves
+        # unrequested fields out of the JSON
+        exhibitions = Exhibition.mapper(cursor.column_names, fields).load_all(rows)
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(exhibitions[-1].start_date, exhibitions[-1].id)
         
-        return {"exhibitions": exhibitions}
+        return {"exhibitions": [format_exhibition(exhibition) for exhibition in exhibitions],
+                "next": next_cursor}
     except Exception as e:
         print(f"Error getting exhibitions: {e}")
         return {"error": str(e)}
@@ -130,6 +208,18 @@ def get_all_exhibitions():
             cursor.close()
             connection.close()
 
+def stream_all_exhibitions(status=None, date_from=None, date_to=None, fields=None):
+    """Stream every matching exhibition, ordered by start date (for exports).
+
+    Returns a RowStream, or None if no connection is available.
+    Raises ValueError for invalid filters or fields.
+    """
+    conditions, params = exhibition_filters(status, date_from, date_to)
+    columns = select_columns(parse_fields(fields, EXHIBITION_FIELDS), EXHIBITION_FIELDS)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = EXHIBITIONS_EXPORT_QUERY.format(columns=', '.join(columns), where=where)
+    return stream_rows(query, params, Exhibition, format_exhibition)
+
 def update_exhibition_image(exhibition_id, image_path):
     """Update the image_url in the database for an exhibition"""
     connection = get_db_connection()
@@ -146,6 +236,7 @@ def update_exhibition_image(exhibition_id, image_path):
         """
         cursor.execute(query, (image_path, exhibition_id))
         connection.commit()
+        changed('exhibitions', exhibition_id)
         return True
     except Exception as e:
         print(f"Error updating exhibition image: {e}")
@@ -155,8 +246,14 @@ def update_exhibition_image(exhibition_id, image_path):
             cursor.close()
             connection.close()
 
-def get_exhibition(exhibition_id):
-    """Get a specific exhibition by ID"""
+def get_exhibition(exhibition_id, fields=None):
+    """Get a specific exhibition by ID
+
+    fields is a comma separated list of EXHIBITION_FIELDS to return.
+    Raises ValueError for unknown fields.
+    """
+    columns = select_columns(parse_fields(fields, EXHIBITION_FIELDS), EXHIBITION_FIELDS)
+    
     connection = get_db_connection()
     if connection is None:
         return {"error": "Database connection failed"}
@@ -164,48 +261,14 @@ def get_exhibition(exhibition_id):
     cursor = connection.cursor()
     
     try:
-        query = """
-        SELECT id, title, description, location, start_date, end_date,
-               ticket_price, image_url, total_slots, available_slots, status
-        FROM exhibitions
-        WHERE id = %s
-        """
+        query = EXHIBITION_QUERY.format(columns=', '.join(columns))
         cursor.execute(query, (exhibition_id,))
         row = cursor.fetchone()
         
         if not row:
             return {"error": "Exhibition not found"}
         
-        exhibition = dict_from_row(row, cursor)
-        
-        # Convert id to string to match frontend expectations
-        exhibition['id'] = str(exhibition['id'])
-        
-        # Convert dates to string format
-        exhibition['startDate'] = exhibition.pop('start_date').isoformat()
-        exhibition['endDate'] = exhibition.pop('end_date').isoformat()
-        
-        # Convert ticket_price to camelCase
-        exhibition['ticketPrice'] = exhibition.pop('ticket_price')
-        
-        # Convert image_url to camelCase and ensure it's valid
-        image_url = exhibition.pop('image_url')
-        # Convert base64 images to file paths
-        if image_url and (image_url.startswith('data:') or 'base64' in image_url):
-            # Save the base64 image to a file and get its path
-            saved_path = save_image_from_base64(image_url)
-            exhibition['imageUrl'] = saved_path
-            # Also update the database with the new path
-            update_exhibition_image(exhibition['id'], saved_path)
-            print(f"Converted base64 image to file: {saved_path}")
-        else:
-            exhibition['imageUrl'] = image_url if image_url else DEFAULT_EXHIBITION_IMAGE
-        
-        # Convert total_slots and available_slots to camelCase
-        exhibition['totalSlots'] = exhibition.pop('total_slots')
-        exhibition['availableSlots'] = exhibition.pop('available_slots')
-        
-        return exhibition
+        return format_exhibition(Exhibition.mapper(cursor.column_names).load(row))
     except Exception as e:
         print(f"Error getting exhibition: {e}")
         return {"error": str(e)}
@@ -313,6 +376,7 @@ def create_exhibition(auth_header, exhibition_data):
         
         # Return the newly created exhibition
         new_exhibition_id = cursor.lastrowid
+        changed('exhibitions', new_exhibition_id)
         print(f"Exhibition created successfully with ID: {new_exhibition_id}")
         return get_exhibition(new_exhibition_id)
     except Exception as e:
@@ -380,6 +444,7 @@ def update_exhibition(auth_header, exhibition_id, exhibition_data):
         # Check if exhibition was found and updated
         if cursor.rowcount == 0:
             return {"error": "Exhibition not found"}
+        changed('exhibitions', exhibition_id)
         
         # Return the updated exhibition
         return get_exhibition(exhibition_id)
@@ -448,6 +513,7 @@ def delete_exhibition(auth_header, exhibition_id):
         # Delete the exhibition
         cursor.execute("DELETE FROM exhibitions WHERE id = %s", (exhibition_id,))
         connection.commit()
+        changed('exhibitions', exhibition_id)
         
         return {"success": True, "message": f"Exhibition with ID {exhibition_id} deleted successfully"}
     except Exception as e:
@@ -0,0 +1,34 @@
+# Sparse fieldsets: ?fields=id,title,price narrows both the JSON response and
+# the SQL SELECT list, so list views don't pull large TEXT columns from MySQL.
+
+def parse_fields(value, field_columns):
+    """Parse a ?fields= value into a set of response field names.
+
+    field_columns maps each allowed response field to its column.
+    Returns None (all fields) when no fields were requested. `id` is always
+    included. Raises ValueError for unknown fields.
+    """
+    if value is None or value.strip() == '':
+        return None
+
+    fields = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = fields - set(field_columns)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. "
+                         f"Allowed fields: {', '.join(field_columns)}")
+    fields.add('id')
+    return fields
+
+def select_columns(fields, field_columns, required=()):
+    """Columns to SELECT for the requested fields, plus any required columns.
+
+    Columns come out in field_columns order so the SELECT list is stable.
+    """
+    if fields is None:
+        columns = list(field_columns.values())
+    else:
+        columns = [column for name, column in field_columns.items() if name in fields]
+    for column in required:
+        if column not in columns:
+            columns.append(column)
+    return columns
@@ -0,0 +1,32 @@
+from serialization import dumps
+
+# Streaming JSON writer for large listings: the response is produced piece by
+# piece from a row iterator instead of serializing one full list.
+
+# Bytes collected before a chunk is handed to the socket
+CHUNK_SIZE = 64 * 1024
+
+def json_object_chunks(key, items, extra=None, chunk_size=CHUNK_SIZE):
+    """Yield {key: [items...], **extra} as JSON, in chunks of ~chunk_size bytes"""
+    buffer = bytearray(b'{' + dumps(key) + b':[')
+    first = True
+    for item in items:
+        if not first:
+            buffer += b','
+        first = False
+        buffer += dumps(item)
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']'
+    for name, value in (extra or {}).items():
+        buffer += b',' + dumps(name) + b':' + dumps(value)
+    buffer += b'}'
+    yield bytes(buffer)
+
+def write_chunked(wfile, chunks):
+    """Write chunks with HTTP/1.1 chunked transfer encoding"""
+    for chunk in chunks:
+        if chunk:
+            wfile.write(b'%x\r\n' % len(chunk) + chunk + b'\r\n')
+    wfile.write(b'0\r\n\r\n')
@@ -4,19 +4,10 @@ import datetime
 import os
 from functools import wraps
 from http.server import BaseHTTPRequestHandler
-from decimal import Decimal
-import json
 
 # Get the secret key from environment or use a default (in production, always use environment variables)
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'afriart_default_secret_key')
 
-# Custom JSON encoder to handle Decimal types
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
-
 def generate_token(user_id, name, is_admin):
     """Generate a JWT token for authentication"""
     payload = {
@@ -73,25 +64,40 @@ def extract_auth_token(handler):
     
     return token
 
+def authorize(handler, level):
+    """Enforce a route's auth level ('public', 'user' or 'admin').
+
+    Returns True if the request may proceed. Otherwise the 401/403 response
+    has been sent. The token payload is attached to the handler as user_info.
+    """
+    if level == 'public':
+        return True
+    
+    token = extract_auth_token(handler)
+    if not token:
+        handler._send_json({"error": "Authentication required"}, 401)
+        return False
+    
+    payload = verify_token(token)
+    if isinstance(payload, dict) and "error" in payload:
+        handler._send_json({"error": payload["error"]}, 401)
+        return False
+    
+    # Check if user is admin
+    if level == 'admin' and not payload.get("is_admin", False):
+        handler._send_json({"error": "Unauthorized access: Admin privileges required"}, 403)
+        return False
+    
+    # Attach user info to the handler
+    handler.user_info = payload
+    return True
+
 def auth_required(handler_method):
     """Decorator to ensure a valid token is present for protected routes"""
     @wraps(handler_method)
     def wrapper(self, *args, **kwargs):
-        token = extract_auth_token(self)
-        
-        if not token:
-            self._set_response(401)
-            self.wfile.write(b'{"error": "Authentication required"}')
-            return None
-        
-        payload = verify_token(token)
-        if isinstance(payload, dict) and "error" in payload:
-            self._set_response(401)
-            self.wfile.write(f'{{"error": "{payload["error"]}"}}'.encode())
+        if not authorize(self, 'user'):
             return None
-        
-        # Attach user info to the handler
-        self.user_info = payload
         return handler_method(self, *args, **kwargs)
     
     return wrapper
@@ -100,32 +106,8 @@ def admin_required(handler_method):
     """Decorator to ensure the user is an admin for admin-only routes"""
     @wraps(handler_method)
     def wrapper(self, *args, **kwargs):
-        token = extract_auth_token(self)
-        
-        if not token:
-            self._set_response(401)
-            self.wfile.write(b'{"error": "Authentication required"}')
+        if not authorize(self, 'admin'):
             return None
-        
-        payload = verify_token(token)
-        if isinstance(payload, dict) and "error" in payload:
-            self._set_response(401)
-            self.wfile.write(f'{{"error": "{payload["error"]}"}}'.encode())
-            return None
-        
-        # Check if user is admin
-        if not payload.get("is_admin", False):
-            self._set_response(403)
-            self.wfile.write(b'{"error": "Unauthorized access: Admin privileges required"}')
-            return None
-        
-        # Attach user info to the handler
-        self.user_info = payload
         return handler_method(self, *args, **kwargs)
     
     return wrapper
-
-# Helper function to safely encode JSON with Decimal values
-def json_dumps(data):
-    """Safely convert data to JSON string, handling Decimal types"""
-    return json.dumps(data, cls=DecimalEncoder)
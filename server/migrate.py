@@ -0,0 +1,132 @@
+import os
+import re
+import importlib.util
+from db_backend import Error
+from database import get_backend, get_db_connection
+
+# Migrations live in ./migrations as NNNN_description.sql or NNNN_description.py.
+# SQL files are split on ';' and run statement by statement; Python files
+# define upgrade(cursor). Applied versions are recorded in schema_version.
+# A NNNN_description.<dialect>.sql file (e.g. .sqlite.sql) replaces the
+# generic file of the same version for that database backend.
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+?)(?:\.(mysql|sqlite))?\.(sql|py)$')
+
+SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+def load_migrations(dialect=None):
+    """Return [(version, name, path)] for the backend's migration files, in order"""
+    if dialect is None:
+        dialect = get_backend().dialect
+
+    generic = {}
+    specific = {}
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version, name, file_dialect = int(match.group(1)), match.group(2), match.group(3)
+        if file_dialect is None:
+            target = generic
+        elif file_dialect == dialect:
+            target = specific
+        else:
+            continue
+        if version in target:
+            raise RuntimeError(f"Duplicate migration version {version:04d} in migrations/")
+        target[version] = (version, name, os.path.join(MIGRATIONS_DIR, filename))
+
+    generic.update(specific)
+    return sorted(generic.values())
+
+def latest_version():
+    migrations = load_migrations()
+    return migrations[-1][0] if migrations else 0
+
+def get_schema_version(cursor):
+    """Return the applied schema version (0 for a database without schema_version)"""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        row = cursor.fetchone()
+        return row[0] or 0
+    except Error:
+        return 0
+
+def split_sql(script):
+    """Split a migration script into statements, dropping comment lines"""
+    lines = [line for line in script.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in "\n".join(lines).split(';') if statement.strip()]
+
+def apply_migration(cursor, path):
+    if path.endswith('.sql'):
+        with open(path) as f:
+            for statement in split_sql(f.read()):
+                cursor.execute(statement)
+    else:
+        spec = importlib.util.spec_from_file_location(f"migration_{os.path.basename(path)[:-3]}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.upgrade(cursor)
+
+def migrate(target=None):
+    """Apply all pending migrations up to target (default: latest)"""
+    connection = get_db_connection()
+    if connection is None:
+        print("Failed to connect to database")
+        return False
+
+    cursor = connection.cursor()
+
+    try:
+        current = get_schema_version(cursor)
+        pending = [m for m in load_migrations()
+                   if m[0] > current and (target is None or m[0] <= target)]
+        if not pending:
+            print(f"Database schema is up to date (version {current})")
+            return True
+
+        cursor.execute(SCHEMA_VERSION_TABLE)
+        for version, name, path in pending:
+            print(f"Applying migration {version:04d}_{name}")
+            apply_migration(cursor, path)
+            cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                           (version, name))
+            connection.commit()
+
+        print(f"Database schema migrated to version {pending[-1][0]}")
+        return True
+    except Error as e:
+        print(f"Error migrating database: {e}")
+        return False
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def ensure_schema():
+    """Startup check: one version query, migrating only if the schema is behind"""
+    connection = get_db_connection()
+    if connection is None:
+        print("Failed to connect to database")
+        return False
+
+    cursor = connection.cursor()
+    try:
+        current = get_schema_version(cursor)
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+    if current >= latest_version():
+        return True
+    return migrate()
+
+if __name__ == "__main__":
+    migrate()
@@ -1,3 +1,7 @@
+-- Initial schema
+-- Reconciles the table definitions that used to live in both schema.sql and
+-- db_setup.py. Statements use IF NOT EXISTS so databases created by either
+-- of those can be adopted at version 1.
 
 -- Users table
 CREATE TABLE IF NOT EXISTS users (
@@ -110,3 +114,32 @@ CREATE TABLE IF NOT EXISTS orders (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id)
 );
+
+-- Contact messages table
+CREATE TABLE IF NOT EXISTS contact_messages (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    phone VARCHAR(20),
+    message TEXT NOT NULL,
+    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status ENUM('new', 'read', 'replied') NOT NULL DEFAULT 'new',
+    source VARCHAR(50) DEFAULT 'contact_form'
+);
+
+-- M-Pesa transactions table
+CREATE TABLE IF NOT EXISTS mpesa_transactions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    checkout_request_id VARCHAR(100) NOT NULL,
+    merchant_request_id VARCHAR(100) NOT NULL,
+    order_type VARCHAR(20) NOT NULL,
+    order_id INT NOT NULL,
+    user_id INT NOT NULL,
+    amount DECIMAL(10, 2) NOT NULL,
+    phone_number VARCHAR(20) NOT NULL,
+    result_code VARCHAR(10),
+    result_desc VARCHAR(255),
+    transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status ENUM('pending', 'completed', 'failed') NOT NULL DEFAULT 'pending',
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
@@ -0,0 +1,144 @@
+-- Initial schema, SQLite dialect of 0001_initial_schema.sql
+-- ENUM columns become TEXT with a CHECK constraint; types keep their MySQL
+-- names where the backend converts values (DECIMAL, DATE, TIMESTAMP).
+
+-- Users table
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    phone VARCHAR(20),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Admins table
+CREATE TABLE IF NOT EXISTS admins (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Artworks table
+CREATE TABLE IF NOT EXISTS artworks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title VARCHAR(255) NOT NULL,
+    artist VARCHAR(255) NOT NULL,
+    description TEXT,
+    price DECIMAL(10, 2) NOT NULL,
+    dimensions VARCHAR(100),
+    medium VARCHAR(100),
+    year INTEGER,
+    image_url VARCHAR(255),
+    status TEXT DEFAULT 'available' CHECK (status IN ('available', 'sold')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Exhibitions table
+CREATE TABLE IF NOT EXISTS exhibitions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    location VARCHAR(255) NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    ticket_price DECIMAL(10, 2) NOT NULL,
+    image_url VARCHAR(255),
+    total_slots INTEGER NOT NULL,
+    available_slots INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'upcoming' CHECK (status IN ('upcoming', 'ongoing', 'past')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Artwork Orders table
+CREATE TABLE IF NOT EXISTS artwork_orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    artwork_id INTEGER NOT NULL,
+    name VARCHAR(255),
+    email VARCHAR(255),
+    phone VARCHAR(20),
+    delivery_address TEXT,
+    payment_method TEXT DEFAULT 'mpesa' CHECK (payment_method IN ('mpesa', 'card', 'bank')),
+    payment_status TEXT NOT NULL DEFAULT 'pending' CHECK (payment_status IN ('pending', 'completed', 'failed')),
+    order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    total_amount DECIMAL(10, 2) NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id),
+    FOREIGN KEY (artwork_id) REFERENCES artworks(id)
+);
+
+-- Exhibition Bookings table
+CREATE TABLE IF NOT EXISTS exhibition_bookings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    exhibition_id INTEGER NOT NULL,
+    name VARCHAR(255),
+    email VARCHAR(255),
+    phone VARCHAR(20),
+    ticket_code VARCHAR(50),
+    slots INTEGER NOT NULL DEFAULT 1,
+    payment_method TEXT DEFAULT 'mpesa' CHECK (payment_method IN ('mpesa', 'card', 'bank')),
+    payment_status TEXT NOT NULL DEFAULT 'pending' CHECK (payment_status IN ('pending', 'completed', 'failed')),
+    status TEXT DEFAULT 'active' CHECK (status IN ('active', 'used', 'cancelled')),
+    booking_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    total_amount DECIMAL(10, 2) NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id),
+    FOREIGN KEY (exhibition_id) REFERENCES exhibitions(id)
+);
+
+-- Legacy tables (kept for backward compatibility)
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    exhibition_id INTEGER NOT NULL,
+    ticket_code VARCHAR(50) NOT NULL UNIQUE,
+    slots INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'active' CHECK (status IN ('active', 'used', 'cancelled')),
+    booking_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id),
+    FOREIGN KEY (exhibition_id) REFERENCES exhibitions(id)
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    type TEXT NOT NULL CHECK (type IN ('artwork', 'exhibition')),
+    reference_id INTEGER NOT NULL,
+    amount DECIMAL(10, 2) NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'completed', 'cancelled')),
+    payment_method VARCHAR(50),
+    payment_status TEXT NOT NULL DEFAULT 'pending' CHECK (payment_status IN ('pending', 'completed', 'failed')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+
+-- Contact messages table
+CREATE TABLE IF NOT EXISTS contact_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    phone VARCHAR(20),
+    message TEXT NOT NULL,
+    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status TEXT NOT NULL DEFAULT 'new' CHECK (status IN ('new', 'read', 'replied')),
+    source VARCHAR(50) DEFAULT 'contact_form'
+);
+
+-- M-Pesa transactions table
+CREATE TABLE IF NOT EXISTS mpesa_transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    checkout_request_id VARCHAR(100) NOT NULL,
+    merchant_request_id VARCHAR(100) NOT NULL,
+    order_type VARCHAR(20) NOT NULL,
+    order_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    amount DECIMAL(10, 2) NOT NULL,
+    phone_number VARCHAR(20) NOT NULL,
+    result_code VARCHAR(10),
+    result_desc VARCHAR(255),
+    transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'completed', 'failed')),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
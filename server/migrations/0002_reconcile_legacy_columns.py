@@ -0,0 +1,44 @@
+"""Bring databases created by the old db_setup.py in line with 0001.
+
+db_setup.py used to create contact_messages without `source`,
+exhibition_bookings without `ticket_code`/`status`, and made the contact
+columns of the order tables NOT NULL although the order code never fills
+them. 0001 uses CREATE TABLE IF NOT EXISTS, so those tables keep their old
+shape; this migration fixes them up once.
+"""
+
+# Columns that may be missing entirely
+ADDED_COLUMNS = [
+    ("contact_messages", "source", "VARCHAR(50) DEFAULT 'contact_form'"),
+    ("exhibition_bookings", "ticket_code", "VARCHAR(50)"),
+    ("exhibition_bookings", "status", "ENUM('active', 'used', 'cancelled') DEFAULT 'active'"),
+]
+
+# Columns whose definition has to match 0001 (MODIFY is idempotent)
+MODIFIED_COLUMNS = [
+    ("artwork_orders", "name", "VARCHAR(255)"),
+    ("artwork_orders", "email", "VARCHAR(255)"),
+    ("artwork_orders", "phone", "VARCHAR(20)"),
+    ("artwork_orders", "delivery_address", "TEXT"),
+    ("artwork_orders", "payment_method", "ENUM('mpesa', 'card', 'bank') DEFAULT 'mpesa'"),
+    ("exhibition_bookings", "name", "VARCHAR(255)"),
+    ("exhibition_bookings", "email", "VARCHAR(255)"),
+    ("exhibition_bookings", "phone", "VARCHAR(20)"),
+    ("exhibition_bookings", "slots", "INT NOT NULL DEFAULT 1"),
+    ("exhibition_bookings", "payment_method", "ENUM('mpesa', 'card', 'bank') DEFAULT 'mpesa'"),
+]
+
+def upgrade(cursor):
+    cursor.execute("""
+    SELECT table_name, column_name FROM information_schema.columns
+    WHERE table_schema = DATABASE()
+    """)
+    existing = {(table.lower(), column.lower()) for table, column in cursor.fetchall()}
+
+    for table, column, definition in ADDED_COLUMNS:
+        if (table, column) not in existing:
+            print(f"Adding column {table}.{column}")
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    for table, column, definition in MODIFIED_COLUMNS:
+        cursor.execute(f"ALTER TABLE {table} MODIFY COLUMN {column} {definition}")
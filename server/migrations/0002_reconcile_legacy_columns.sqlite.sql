@@ -0,0 +1,2 @@
+-- Nothing to reconcile: SQLite databases are always created from 0001, never
+-- by the old db_setup.py.
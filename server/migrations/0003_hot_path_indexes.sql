@@ -0,0 +1,21 @@
+-- Secondary indexes for the hot query paths
+-- Listing indexes end in id so keyset pagination on (column, id) stays
+-- index-only for the sort.
+
+-- GET /artworks: ORDER BY created_at DESC
+CREATE INDEX idx_artworks_created_at ON artworks (created_at, id);
+
+-- GET /exhibitions: ORDER BY start_date
+CREATE INDEX idx_exhibitions_start_date ON exhibitions (start_date, id);
+
+-- GET /messages: ORDER BY date DESC
+CREATE INDEX idx_contact_messages_date ON contact_messages (date, id);
+
+-- GET /orders: ORDER BY order_date DESC
+CREATE INDEX idx_artwork_orders_order_date ON artwork_orders (order_date, id);
+
+-- Payment status polls and M-Pesa callbacks: WHERE checkout_request_id = %s
+CREATE UNIQUE INDEX idx_mpesa_transactions_checkout_request_id ON mpesa_transactions (checkout_request_id);
+
+-- Ticket lookups by code
+CREATE INDEX idx_exhibition_bookings_ticket_code ON exhibition_bookings (ticket_code);
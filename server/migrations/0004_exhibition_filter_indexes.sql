@@ -0,0 +1,7 @@
+-- Indexes for the GET /exhibitions filters
+
+-- ?status= with keyset pagination on (start_date, id)
+CREATE INDEX idx_exhibitions_status_start_date ON exhibitions (status, start_date, id);
+
+-- ?from= (end_date >= from): "what's on now" reads only exhibitions that haven't ended
+CREATE INDEX idx_exhibitions_end_date ON exhibitions (end_date);
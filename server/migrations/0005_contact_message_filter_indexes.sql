@@ -0,0 +1,7 @@
+-- Indexes for the GET /messages filters, ordered like the inbox (date, id)
+
+-- ?status= and the unread count badge
+CREATE INDEX idx_contact_messages_status_date ON contact_messages (status, date, id);
+
+-- ?source=
+CREATE INDEX idx_contact_messages_source_date ON contact_messages (source, date, id);
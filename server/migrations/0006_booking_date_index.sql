@@ -0,0 +1,2 @@
+-- GET /tickets: ORDER BY booking_date DESC
+CREATE INDEX idx_exhibition_bookings_booking_date ON exhibition_bookings (booking_date, id);
@@ -0,0 +1,182 @@
+import threading
+
+# Row models: slotted objects built straight from cursor tuples.
+#
+# Each model lists its columns in FIELDS as (column, JSON key, converter).
+# For every column list a query returns, a RowMapper is compiled once: a
+# load() that unpacks a tuple into a new object and a dump() that builds the
+# API dict (renamed keys, converted values) in one expression. Listings pay
+# for one object and one dict per row, with no per-row column lookups.
+
+def to_float(value):
+    """Decimal column -> JSON number"""
+    return float(value) if value is not None else None
+
+def to_iso(value):
+    """date/datetime column -> ISO 8601 string"""
+    return value.isoformat() if value is not None else None
+
+def to_str(value):
+    """Integer id -> string id, as the frontend expects"""
+    return str(value) if value is not None else None
+
+class RowMapper:
+    """Compiled loader and JSON dumper for one model and one column list"""
+
+    def __init__(self, model, columns, fields=None):
+        known = {column: (key, convert) for column, key, convert in model.FIELDS}
+        unknown = [column for column in columns if column not in known]
+        if unknown:
+            raise ValueError(f"{model.__name__} has no column {', '.join(unknown)}")
+
+        self.model = model
+        self.columns = columns
+        namespace = {'_new': object.__new__, '_model': model, '_mapper': self}
+
+        targets = ''.join(f"obj.{column}, " for column in columns)
+        load_source = (
+            "def load(row):\n"
+            "    obj = _new(_model)\n"
+            "    obj._mapper = _mapper\n"
+            f"    {targets}= row\n"
+            "    return obj\n"
+        )
+
+        entries = []
+        for column, key, convert in model.FIELDS:
+            if key is None or column not in columns or (fields is not None and key not in fields):
+                continue
+            if convert is None:
+                entries.append(f"{key!r}: obj.{column}")
+            else:
+                namespace[f"_{column}"] = convert
+                entries.append(f"{key!r}: _{column}(obj.{column})")
+        for key, value in model.JSON_EXTRA.items():
+            entries.append(f"{key!r}: {value!r}")
+        dump_source = "def dump(obj):\n    return {" + ", ".join(entries) + "}\n"
+
+        exec(load_source + dump_source, namespace)
+        self.load = namespace['load']
+        self.dump = namespace['dump']
+
+    def load_all(self, rows):
+        return list(map(self.load, rows))
+
+_mappers = {}
+_mappers_lock = threading.Lock()
+
+class Model:
+    """Base class for row models"""
+
+    __slots__ = ('_mapper',)
+
+    # (column, JSON key or None to leave it out of the JSON, converter or None)
+    FIELDS = ()
+    # Constant entries added to every JSON object
+    JSON_EXTRA = {}
+
+    @classmethod
+    def mapper(cls, columns, fields=None):
+        """RowMapper for a query's column names, compiled on first use.
+
+        fields optionally restricts dump() to a set of JSON keys.
+        """
+        key = (cls, tuple(columns), frozenset(fields) if fields is not None else None)
+        mapper = _mappers.get(key)
+        if mapper is None:
+            with _mappers_lock:
+                mapper = _mappers.get(key)
+                if mapper is None:
+                    mapper = _mappers[key] = RowMapper(cls, key[1], fields)
+        return mapper
+
+    @classmethod
+    def json_columns(cls):
+        """{JSON key: column} for every column that appears in the JSON"""
+        return {key: column for column, key, _ in cls.FIELDS if key is not None}
+
+    def to_json(self):
+        return self._mapper.dump(self)
+
+def slots(fields):
+    return tuple(column for column, _, _ in fields)
+
+class Artwork(Model):
+    FIELDS = (
+        ('id', 'id', to_str),
+        ('title', 'title', None),
+        ('artist', 'artist', None),
+        ('description', 'description', None),
+        ('price', 'price', to_float),
+        ('image_url', 'image_url', None),
+        ('dimensions', 'dimensions', None),
+        ('medium', 'medium', None),
+        ('year', 'year', None),
+        ('status', 'status', None),
+        ('created_at', None, None),  # keyset pagination only
+    )
+    __slots__ = slots(FIELDS)
+
+class Exhibition(Model):
+    FIELDS = (
+        ('id', 'id', to_str),
+        ('title', 'title', None),
+        ('description', 'description', None),
+        ('location', 'location', None),
+        ('start_date', 'startDate', to_iso),
+        ('end_date', 'endDate', to_iso),
+        ('ticket_price', 'ticketPrice', to_float),
+        ('image_url', 'imageUrl', None),
+        ('total_slots', 'totalSlots', None),
+        ('available_slots', 'availableSlots', None),
+        ('status', 'status', None),
+    )
+    __slots__ = slots(FIELDS)
+
+class Order(Model):
+    """Artwork order as listed by GET /orders"""
+
+    FIELDS = (
+        ('id', 'id', None),
+        ('user_id', 'user_id', None),
+        ('user_name', 'user_name', None),
+        ('artwork_id', 'reference_id', None),
+        ('item_title', 'item_title', None),
+        ('artwork_image_url', 'image_url', None),
+        ('order_date', 'date', to_iso),
+        ('total_amount', 'amount', to_float),
+        ('payment_status', 'status', None),
+    )
+    JSON_EXTRA = {'type': 'artwork'}
+    __slots__ = slots(FIELDS)
+
+class Booking(Model):
+    """Exhibition booking (ticket) as listed by GET /tickets"""
+
+    FIELDS = (
+        ('id', 'id', to_str),
+        ('user_id', 'userId', to_str),
+        ('user_name', 'userName', None),
+        ('exhibition_id', 'exhibitionId', to_str),
+        ('exhibition_title', 'exhibitionTitle', None),
+        ('booking_date', 'bookingDate', to_iso),
+        ('ticket_code', 'ticketCode', None),
+        ('slots', 'slots', None),
+        ('status', 'status', None),
+        ('payment_status', 'paymentStatus', None),
+        ('total_amount', 'totalAmount', to_float),
+    )
+    __slots__ = slots(FIELDS)
+
+class ContactMessage(Model):
+    FIELDS = (
+        ('id', 'id', None),
+        ('name', 'name', None),
+        ('email', 'email', None),
+        ('phone', 'phone', None),
+        ('message', 'message', None),
+        ('date', 'date', to_iso),
+        ('status', 'status', None),
+        ('source', 'source', None),
+    )
+    __slots__ = slots(FIELDS)
@@ -1,10 +1,13 @@
+import os
 import requests
 import base64
 import json
 from datetime import datetime
 import time
-from db_setup import get_db_connection, dict_from_row
-from mysql.connector import Error
+from database import get_db_connection
+from db_setup import dict_from_row
+from db_backend import Error
+from table_versions import changed
 
 # M-Pesa API credentials
 CONSUMER_KEY = "sMwMwGZ8oOiSkNrUIrPbcCeWIO8UiQ3SV4CyX739uAyZVs1F"
@@ -14,6 +17,23 @@ PASSKEY = "bfb279f9aa9bdbcf158e97dd71a467cd2e0c893059b10f78e6b72ada1ed2c919"
 CALLBACK_URL = "https://webhook.site/3c1f62b5-4214-47d6-9f26-71c1f4b9c8f0"
 API_BASE_URL = "https://sandbox.safaricom.co.ke"
 
+# Seconds to wait for Daraja to accept the connection and to answer. Calls
+# run on a handler thread holding the request's database connection, so
+# they must not wait indefinitely.
+MPESA_TIMEOUT = (float(os.environ.get('MPESA_CONNECT_TIMEOUT', 5)),
+                 float(os.environ.get('MPESA_READ_TIMEOUT', 30)))
+
+# Transaction lookups by checkout request (EXPLAINed by check_indexes.py)
+TRANSACTION_QUERY = """
+SELECT * FROM mpesa_transactions
+WHERE checkout_request_id = %s
+"""
+UPDATE_TRANSACTION_QUERY = """
+UPDATE mpesa_transactions
+SET status = %s, result_code = %s, result_desc = %s
+WHERE checkout_request_id = %s
+"""
+
 def get_access_token():
     """Get OAuth access token from M-Pesa"""
     url = f"{API_BASE_URL}/oauth/v1/generate?grant_type=client_credentials"
@@ -23,7 +43,7 @@ def get_access_token():
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = requests.get(url, headers=headers, timeout=MPESA_TIMEOUT)
         response_data = response.json()
         
         if "access_token" in response_data:
@@ -77,7 +97,7 @@ def initiate_stk_push(phone_number, amount, account_reference, order_type, order
     }
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = requests.post(url, json=payload, headers=headers, timeout=MPESA_TIMEOUT)
         result = response.json()
         print(f"STK Push result: {result}")
         
@@ -117,11 +137,7 @@ def check_transaction_status(checkout_request_id):
     
     try:
         # Check if transaction exists in database
-        query = """
-        SELECT * FROM mpesa_transactions 
-        WHERE checkout_request_id = %s
-        """
-        cursor.execute(query, (checkout_request_id,))
+        cursor.execute(TRANSACTION_QUERY, (checkout_request_id,))
         row = cursor.fetchone()
         
         if not row:
@@ -151,7 +167,7 @@ def check_transaction_status(checkout_request_id):
             }
             
             try:
-                response = requests.post(url, json=payload, headers=headers)
+                response = requests.post(url, json=payload, headers=headers, timeout=MPESA_TIMEOUT)
                 result = response.json()
                 print(f"Transaction status query result: {result}")
                 
@@ -256,12 +272,7 @@ def update_transaction_status(checkout_request_id, status, result_code=None, res
     cursor = connection.cursor()
     
     try:
-        query = """
-        UPDATE mpesa_transactions
-        SET status = %s, result_code = %s, result_desc = %s
-        WHERE checkout_request_id = %s
-        """
-        cursor.execute(query, (status, result_code, result_desc, checkout_request_id))
+        cursor.execute(UPDATE_TRANSACTION_QUERY, (status, result_code, result_desc, checkout_request_id))
         connection.commit()
         return True
     except Error as e:
@@ -278,7 +289,8 @@ def update_order_status(order_type, order_id, payment_status):
     if not connection:
         return False
     
-    cursor = connection.cursor()
+    # Buffered: the order's row is read before the follow-up UPDATE
+    cursor = connection.cursor(buffered=True)
     
     try:
         if order_type == "artwork":
@@ -301,25 +313,26 @@ def update_order_status(order_type, order_id, payment_status):
         
         # If it's an artwork order and payment is completed, update artwork status
         if order_type == "artwork" and payment_status == "completed":
-            query = """
-            UPDATE artworks a
-            JOIN artwork_orders o ON a.id = o.artwork_id
-            SET a.status = 'sold'
-            WHERE o.id = %s
-            """
-            cursor.execute(query, (order_id,))
-            connection.commit()
+            cursor.execute("SELECT artwork_id FROM artwork_orders WHERE id = %s", (order_id,))
+            row = cursor.fetchone()
+            if row:
+                cursor.execute("UPDATE artworks SET status = 'sold' WHERE id = %s", (row[0],))
+                connection.commit()
+                changed('artworks', row[0])
         
         # If it's an exhibition booking and payment is completed, update available slots
         if order_type == "exhibition" and payment_status == "completed":
-            query = """
-            UPDATE exhibitions e
-            JOIN exhibition_bookings b ON e.id = b.exhibition_id
-            SET e.available_slots = e.available_slots - b.slots
-            WHERE b.id = %s
-            """
-            cursor.execute(query, (order_id,))
-            connection.commit()
+            cursor.execute("SELECT exhibition_id, slots FROM exhibition_bookings WHERE id = %s", (order_id,))
+            row = cursor.fetchone()
+            if row:
+                query = """
+                UPDATE exhibitions
+                SET available_slots = available_slots - %s
+                WHERE id = %s
+                """
+                cursor.execute(query, (row[1], row[0]))
+                connection.commit()
+                changed('exhibitions', row[0])
         
         return True
     except Error as e:
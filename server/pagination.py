@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import datetime, date
+
+# Opaque cursors for keyset pagination.
+# A cursor is the sort key of the last row on a page, e.g. (created_at, id),
+# encoded as url-safe base64 JSON so clients can't depend on its contents.
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row of a page"""
+    encoded = [v.isoformat() if isinstance(v, (datetime, date)) else v for v in values]
+    data = json.dumps(encoded, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+def decode_cursor(cursor, types):
+    """Decode a cursor into a tuple of values of the given types.
+
+    Raises ValueError for anything that isn't a cursor we issued.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    for value, value_type in zip(values, types):
+        try:
+            if value_type is datetime:
+                decoded.append(datetime.fromisoformat(value))
+            elif value_type is date:
+                decoded.append(date.fromisoformat(value))
+            else:
+                decoded.append(value_type(value))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+    return tuple(decoded)
+
+def parse_limit(value, default, maximum):
+    """Parse a ?limit= value, capping it at the server maximum"""
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, maximum)
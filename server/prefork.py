@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+import signal
+import socket
+import traceback
+
+# Pre-fork multi-process mode.
+#
+# The master forks N worker processes and then only supervises them. Each
+# worker binds its own listening socket with SO_REUSEPORT, so the kernel
+# spreads connections across processes and every worker runs on its own GIL.
+# Crashed workers are restarted; SIGTERM or SIGINT to the master is passed on
+# to the workers, which finish their in-flight requests and exit.
+
+# A worker that dies sooner than this after starting is restarted only after
+# the same delay, so a worker that crashes on startup doesn't spin
+RESTART_DELAY = float(os.environ.get('SERVER_RESTART_DELAY', 1))
+# Seconds workers get to finish in-flight requests before they are killed
+SHUTDOWN_TIMEOUT = float(os.environ.get('SERVER_SHUTDOWN_TIMEOUT', 30))
+
+class Supervisor:
+    """Fork and supervise `workers` processes each running serve_worker()"""
+
+    def __init__(self, workers, serve_worker):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.serve_worker = serve_worker
+        self.children = {}  # pid -> (slot, started_at)
+        self.stopping = False
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        print(f"Master {os.getpid()} starting {self.workers} workers")
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        while self.children and not self.stopping:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            self._reap(pid, status)
+
+        self._wait_for_workers()
+        print("All workers stopped")
+
+    def _spawn(self, slot):
+        # Output buffered in the master would otherwise be written again by the child
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            code = 0
+            try:
+                self.serve_worker()
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self.children[pid] = (slot, time.monotonic())
+        print(f"Worker {slot} started (pid {pid})")
+
+    def _reap(self, pid, status):
+        entry = self.children.pop(pid, None)
+        if entry is None:
+            return
+        slot, started_at = entry
+        code = os.waitstatus_to_exitcode(status)
+        if self.stopping:
+            return
+        print(f"Worker {slot} (pid {pid}) exited with status {code}, restarting")
+        if time.monotonic() - started_at < RESTART_DELAY:
+            time.sleep(RESTART_DELAY)
+        if not self.stopping:
+            self._spawn(slot)
+
+    def _stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        print(f"Master received {signal.Signals(signum).name}, stopping workers")
+        self._signal_workers(signal.SIGTERM)
+
+    def _signal_workers(self, signum):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _wait_for_workers(self):
+        if not self.children:
+            return
+        # The master may have stopped waiting because of a signal, or a
+        # worker may have been restarted after the stop signal was sent
+        self._signal_workers(signal.SIGTERM)
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self._reap(pid, status)
+                continue
+            if time.monotonic() >= deadline:
+                print(f"Killing {len(self.children)} workers still running after {SHUTDOWN_TIMEOUT}s")
+                self._signal_workers(signal.SIGKILL)
+                deadline = float('inf')
+            time.sleep(0.05)
+
+def run_prefork(workers, serve_worker):
+    """Run serve_worker() in `workers` supervised processes until stopped"""
+    if not hasattr(os, 'fork') or not hasattr(socket, 'SO_REUSEPORT'):
+        raise RuntimeError("Multiple workers need os.fork() and SO_REUSEPORT")
+    Supervisor(workers, serve_worker).run()
@@ -0,0 +1,241 @@
+import os
+import re
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from datetime import datetime
+from contextlib import contextmanager
+from functools import lru_cache
+
+# Per-query timing: every cursor handed out by database.get_db_connection()
+# records execution time (execute + fetch), rows returned and a statement
+# fingerprint. Timings are kept in an in-process histogram per fingerprint;
+# queries slower than SLOW_QUERY_MS are appended to the slow-query log with
+# the route that issued them.
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS', '1') != '0'
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', os.path.join(os.path.dirname(__file__), 'slow_queries.log'))
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Route of the request being handled, e.g. "GET /artworks/{id}"
+_current_route = contextvars.ContextVar('query_route', default=None)
+
+@contextmanager
+def route_scope():
+    """Forget the route when the request ends (see set_route)"""
+    token = _current_route.set(None)
+    try:
+        yield
+    finally:
+        _current_route.reset(token)
+
+def set_route(route):
+    _current_route.set(route)
+
+_NUMERIC_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+def route_label(method, path):
+    """Route label for a request, with numeric ids folded into {id}"""
+    return f"{method} {_NUMERIC_SEGMENT.sub('/{id}', path)}"
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+@lru_cache(maxsize=1024)
+def fingerprint(query):
+    """Normalise a statement so queries differing only in values group together"""
+    if isinstance(query, bytes):
+        query = query.decode(errors='replace')
+    query = _STRING.sub('?', query)
+    query = _NUMBER.sub('?', query)
+    query = _PLACEHOLDER.sub('?', query)
+    query = _IN_LIST.sub('IN (...)', query)
+    return _WHITESPACE.sub(' ', query).strip()
+
+class QueryStats:
+    """Timing histogram and totals for one fingerprint"""
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.routes = {}
+
+    def add(self, elapsed_ms, rows, route):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.buckets[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+        self.routes[route] = self.routes.get(route, 0) + 1
+        if elapsed_ms >= SLOW_QUERY_MS:
+            self.slow += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls"""
+        threshold = self.count * fraction
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= threshold:
+                return bound
+        return self.max_ms
+
+    def to_dict(self):
+        histogram = {f"le{bound}ms": count for bound, count in zip(BUCKETS_MS, self.buckets)}
+        histogram[f"gt{BUCKETS_MS[-1]}ms"] = self.buckets[-1]
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "totalMs": round(self.total_ms, 3),
+            "avgMs": round(self.total_ms / self.count, 3) if self.count else 0,
+            "p50Ms": self.percentile(0.5),
+            "p95Ms": self.percentile(0.95),
+            "maxMs": round(self.max_ms, 3),
+            "rows": self.rows,
+            "slow": self.slow,
+            "histogram": histogram,
+            "routes": dict(self.routes),
+        }
+
+_stats = {}
+_stats_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+def record(query, elapsed_ms, rows):
+    """Add one executed statement to the histogram, logging it if slow"""
+    key = fingerprint(query)
+    route = _current_route.get() or '-'
+    with _stats_lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = QueryStats(key)
+        stats.add(elapsed_ms, rows, route)
+    if elapsed_ms >= SLOW_QUERY_MS:
+        log_slow_query(key, elapsed_ms, rows, route)
+
+def log_slow_query(fingerprint, elapsed_ms, rows, route):
+    # Only the fingerprint is logged: parameters may hold emails and passwords
+    line = f"{datetime.now().isoformat(' ', 'seconds')} {elapsed_ms:.1f}ms rows={rows} route={route} {fingerprint}\n"
+    try:
+        with _log_lock:
+            with open(SLOW_QUERY_LOG, 'a') as f:
+                f.write(line)
+    except OSError as e:
+        print(f"Error writing slow query log: {e}")
+        print(f"Slow query: {line.strip()}")
+
+def get_query_stats(order_by='totalMs', limit=50):
+    """Snapshot of the per-fingerprint stats, worst offenders first"""
+    with _stats_lock:
+        snapshot = [stats.to_dict() for stats in _stats.values()]
+    snapshot.sort(key=lambda stats: stats[order_by], reverse=True)
+    return {"slowQueryMs": SLOW_QUERY_MS, "queries": snapshot[:limit]}
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
+
+class TimedCursor:
+    """Cursor wrapper timing execute() and the fetches that follow it.
+
+    A statement is recorded when the next one is executed or the cursor is
+    closed, so rows read by fetchone/fetchall/iteration are counted and the
+    time spent streaming an unbuffered result is included.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._query = None
+        self._elapsed = 0.0
+        self._rows = 0
+        self._fetched = False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _finish(self):
+        if self._query is None:
+            return
+        rows = self._rows
+        if not self._fetched:
+            # INSERT/UPDATE/DELETE: rows affected
+            rows = max(getattr(self._cursor, 'rowcount', 0) or 0, 0)
+        record(self._query, self._elapsed * 1000, rows)
+        self._query = None
+
+    def _timed(self, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def execute(self, query, *args, **kwargs):
+        self._finish()
+        self._query, self._elapsed, self._rows, self._fetched = query, 0.0, 0, False
+        return self._timed(self._cursor.execute, query, *args, **kwargs)
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        self._fetched = True
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._fetched = True
+        self._rows += len(rows)
+        return rows
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._timed(self._cursor.fetchmany, *args, **kwargs)
+        self._fetched = True
+        self._rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+class TimedConnection:
+    """Connection wrapper whose cursors are TimedCursors"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._connection.cursor(*args, **kwargs))
+
+    def is_connected(self):
+        return self._connection.is_connected()
+
+    def close(self):
+        return self._connection.close()
+
+def instrument(connection):
+    """Wrap a connection so its queries are timed (no-op if QUERY_STATS=0)"""
+    if connection is None or not QUERY_STATS_ENABLED:
+        return connection
+    return TimedConnection(connection)
@@ -0,0 +1,234 @@
+import os
+import time
+import struct
+import hashlib
+import threading
+from table_versions import TABLES, version, settled, add_listener
+from cache_backend import CACHE_URL, MemoryBackend, RespBackend
+
+# Cache of serialized responses for the public catalogue reads.
+#
+# Entries are the JSON bodies of GET /artworks, /exhibitions and their /{id}
+# variants, keyed by route, path parameters and query string, bounded by
+# total size (LRU) and by age (TTL). Each entry is tagged with what it was
+# built from: its row for a by-id response, the table's listings otherwise.
+# A committed write to a row evicts that row's entries and the table's
+# listings; the other by-id entries stay.
+#
+# Entries are kept in this process (a MemoryBackend). With CACHE_URL set they
+# are also stored in a backend shared by all worker processes, which then
+# fill each other's caches: the in-process copy is a near cache in front of
+# it. A write evicts its entries from the shared backend and broadcasts the
+# evicted tags, so every process drops its own copies. If the shared backend
+# can't be reached to evict them, this process stops reading it until it can.
+#
+# Writes made by other worker processes (--workers) are also noticed through
+# the shared table versions: when a table's version moves past the last
+# change this process applied, its in-process entries for that table are
+# dropped (from the shared backend they are refilled without a query).
+#
+# An entry past its TTL that no write has invalidated still matches the
+# database as far as this process knows. For RESPONSE_CACHE_STALE seconds
+# more it is served as is while one request refreshes it in the background
+# (stale-while-revalidate).
+RESPONSE_CACHE_BYTES = int(os.environ.get('RESPONSE_CACHE_BYTES', 32 * 1024 * 1024))
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 60))
+RESPONSE_CACHE_STALE = float(os.environ.get('RESPONSE_CACHE_STALE', 30))
+
+# get() states
+FRESH = 'fresh'
+STALE = 'stale'
+# Stale, and the caller is the one to refresh it (then call refreshed())
+REFRESH = 'refresh'
+
+# Stored value: fresh-until time (epoch seconds), then the body
+_HEADER = struct.Struct('>d')
+
+def _tags(table, row_id):
+    """Backend tags of an entry built from row_id of table (None: a listing)"""
+    return (f"{table}:{'*' if row_id is None else row_id}", table)
+
+def _stale_tags(table, row_id):
+    """Tags whose entries a write to row_id of table (None: any row) makes stale"""
+    if row_id is None:
+        return (table,)
+    return (f"{table}:{row_id}", f"{table}:*")
+
+class ResponseCache:
+    """Response bodies with a TTL, invalidated by (table, id) tags.
+
+    local is the in-process store; shared, if given, a backend shared with
+    the other processes.
+    """
+
+    def __init__(self, max_bytes, ttl, stale=0, tables=(), shared=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale = stale
+        self.local = MemoryBackend(max_bytes)
+        self.shared = shared
+        # Stale keys being refreshed
+        self._refreshing = set()
+        # Tags that couldn't be evicted from the shared backend yet
+        self._unevicted = set()
+        self._lock = threading.Lock()
+        # Table -> version up to which changes have been applied to this cache
+        self._synced = {table: version(table) for table in tables}
+        self.hits = 0
+        self.shared_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        if shared is not None:
+            shared.subscribe(self._received)
+
+    @staticmethod
+    def versions(tables):
+        """Snapshot to pass to put(); take it before reading the database"""
+        return tuple(version(table) for table in tables)
+
+    @staticmethod
+    def _key(key):
+        return 'resp:' + hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def get(self, key, tags):
+        """Return (body, state) for key, or (None, None) on a miss.
+
+        tags are (table, row id) pairs, row id None for a listing.
+        """
+        if self.max_bytes <= 0:
+            return None, None
+        tables = tuple(dict.fromkeys(table for table, _ in tags))
+        store_key = self._key(key)
+        with self._lock:
+            self._sync(tables)
+        value = self.local.get(store_key)
+        if value is None and self._use_shared(tables):
+            value = self.shared.get(store_key)
+            if value is not None:
+                self.local.set(store_key, value, self._remaining(value), self._store_tags(tags))
+                self.shared_hits += 1
+        if value is None:
+            self.misses += 1
+            return None, None
+
+        fresh_until = _HEADER.unpack_from(value)[0]
+        body = value[_HEADER.size:]
+        if fresh_until > time.time():
+            self.hits += 1
+            return body, FRESH
+        with self._lock:
+            self.stale_hits += 1
+            if key in self._refreshing:
+                return body, STALE
+            self._refreshing.add(key)
+            return body, REFRESH
+
+    def refreshed(self, key):
+        """End a refresh claimed through get(), whether or not put() was called"""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def put(self, key, body, tags, versions):
+        """Store body unless its tables changed since the versions snapshot.
+
+        tags are (table, row id) pairs, row id None for a listing.
+        """
+        if self.max_bytes <= 0 or len(body) > self.max_bytes:
+            return
+        tables = tuple(dict.fromkeys(table for table, _ in tags))
+        store_tags = self._store_tags(tags)
+        store_key = self._key(key)
+        value = _HEADER.pack(time.time() + self.ttl) + body
+        with self._lock:
+            self._sync(tables)
+            # A write committed while the body was being built may not be in it
+            if self.versions(tables) != versions:
+                return
+            self.local.set(store_key, value, self.ttl + self.stale, store_tags)
+        if self._use_shared(tables):
+            self.shared.set(store_key, value, self.ttl + self.stale, store_tags)
+            # A write that committed meanwhile may have invalidated before the
+            # set; don't leave its stale entry behind
+            if self.versions(tables) != versions:
+                self.shared.delete(store_key)
+
+    def changed(self, table, row_id, new_version):
+        """Evict what a committed write made stale (a table_versions listener)"""
+        with self._lock:
+            synced = self._synced.get(table, 0)
+            if row_id is not None and new_version <= synced + 1:
+                # No other change is pending, so only this row's entries and
+                # the table's listings are affected
+                tags = _stale_tags(table, row_id)
+            else:
+                tags = _stale_tags(table, None)
+            self.invalidations += self.local.invalidate(tags)
+            self._synced[table] = max(synced, new_version)
+        if self.shared is not None:
+            tags = _stale_tags(table, row_id)
+            if self.shared.invalidate(tags) is None:
+                with self._lock:
+                    self._unevicted.update(tags)
+            self.shared.publish(' '.join(tags))
+
+    def clear(self):
+        with self._lock:
+            self.local.clear()
+            self._refreshing.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                **self.local.stats(),
+                'hits': self.hits,
+                'sharedHits': self.shared_hits,
+                'staleHits': self.stale_hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+            }
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
+
+    def _received(self, message):
+        """Tags evicted by a write in some process (None: messages were lost)"""
+        if message is None:
+            self.clear()
+            return
+        evicted = self.local.invalidate(message.split())
+        with self._lock:
+            self.invalidations += evicted
+
+    def _use_shared(self, tables):
+        if self.shared is None:
+            return False
+        if self._unevicted:
+            with self._lock:
+                tags, self._unevicted = self._unevicted, set()
+            if self.shared.invalidate(tags) is None:
+                with self._lock:
+                    self._unevicted.update(tags)
+                return False
+        # While a write's invalidation is under way its stale entries may
+        # still be in the shared backend
+        return all(settled(table) for table in tables)
+
+    @staticmethod
+    def _store_tags(tags):
+        return tuple(tag for table, row_id in tags for tag in _tags(table, row_id))
+
+    def _remaining(self, value):
+        return max(_HEADER.unpack_from(value)[0] + self.stale - time.time(), 0.001)
+
+    def _sync(self, tables):
+        # A version this process hasn't applied means another process wrote
+        for table in tables:
+            current = version(table)
+            if current > self._synced.get(table, 0):
+                self.invalidations += self.local.invalidate(_stale_tags(table, None))
+                self._synced[table] = current
+
+response_cache = ResponseCache(RESPONSE_CACHE_BYTES, RESPONSE_CACHE_TTL, RESPONSE_CACHE_STALE, TABLES,
+                               RespBackend(CACHE_URL) if CACHE_URL else None)
+add_listener(response_cache.changed)
@@ -0,0 +1,151 @@
+# Declarative request routing.
+#
+# Routes are declared with a method and a path template such as
+# "/artworks/{id:int}" and compiled into a trie of path segments as they are
+# added. Matching walks the request path one segment at a time with a dict
+# lookup per segment, so dispatch cost depends on the path depth, not on how
+# many routes are registered. Literal segments win over parameters, so
+# "/artworks/export" is matched before "/artworks/{id:int}".
+#
+# Each route carries metadata for the request pipeline:
+#   auth      - 'public', 'user' (valid token) or 'admin'
+#   cacheable - the response depends only on the URL and may be cached
+#   tables    - tables a cacheable response is built from; their version
+#               counters (table_versions) give its ETag
+
+AUTH_LEVELS = ('public', 'user', 'admin')
+
+def _int_param(segment):
+    return int(segment) if segment.isascii() and segment.isdigit() else None
+
+def _str_param(segment):
+    return segment
+
+# Parameter types: converter from a path segment to a value, or None if the
+# segment doesn't fit. 'path' takes the rest of the path, slashes included.
+PARAM_TYPES = {
+    'int': _int_param,
+    'str': _str_param,
+    'path': _str_param,
+}
+
+class Route:
+    __slots__ = ('method', 'template', 'handler', 'auth', 'cacheable', 'tables', 'label')
+
+    def __init__(self, method, template, handler, auth='public', cacheable=False, tables=()):
+        if auth not in AUTH_LEVELS:
+            raise ValueError(f"auth must be one of {', '.join(AUTH_LEVELS)}")
+        if tables and not cacheable:
+            raise ValueError("tables only apply to cacheable routes")
+        self.method = method
+        self.template = template
+        self.handler = handler
+        self.auth = auth
+        self.cacheable = cacheable
+        self.tables = tuple(tables)
+        # Label used for per-route statistics, e.g. "GET /artworks/{id}"
+        self.label = f"{method} {_label(template)}"
+
+    def __repr__(self):
+        return f"<Route {self.method} {self.template}>"
+
+class _Node:
+    __slots__ = ('children', 'param', 'routes')
+
+    def __init__(self):
+        # Literal segment -> _Node
+        self.children = {}
+        # (name, type, converter, _Node) for a parameter segment, or None
+        self.param = None
+        # Method -> Route for a template ending at this node
+        self.routes = {}
+
+def _label(template):
+    """Template without parameter types, e.g. /artworks/{id}"""
+    return '/'.join(_parse_segment(segment)[0] for segment in template.split('/'))
+
+def _parse_segment(segment):
+    """Split a template segment into its label and (name, type), or None if literal"""
+    if not (segment.startswith('{') and segment.endswith('}')):
+        return segment, None
+    name, _, kind = segment[1:-1].partition(':')
+    kind = kind or 'str'
+    if kind not in PARAM_TYPES:
+        raise ValueError(f"Unknown parameter type {kind!r} in {segment}")
+    return '{' + name + '}', (name, kind)
+
+class Router:
+    """Route table compiled into a segment trie"""
+
+    def __init__(self):
+        self._root = _Node()
+        self.routes = []
+
+    def add(self, method, template, handler, auth='public', cacheable=False, tables=()):
+        route = Route(method, template, handler, auth, cacheable, tables)
+        node = self._root
+        segments = template.strip('/').split('/') if template != '/' else []
+        for index, segment in enumerate(segments):
+            _, param = _parse_segment(segment)
+            if param is None:
+                node = node.children.setdefault(segment, _Node())
+                continue
+            name, kind = param
+            if kind == 'path' and index != len(segments) - 1:
+                raise ValueError(f"{{{name}:path}} must be the last segment of {template}")
+            if node.param is None:
+                node.param = (name, kind, PARAM_TYPES[kind], _Node())
+            elif node.param[:2] != (name, kind):
+                raise ValueError(f"{template} conflicts with another parameter at the same position")
+            node = node.param[3]
+        if method in node.routes:
+            raise ValueError(f"Duplicate route {method} {template}")
+        node.routes[method] = route
+        self.routes.append(route)
+        return route
+
+    def route(self, method, template, auth='public', cacheable=False, tables=()):
+        """Decorator form of add()"""
+        def decorator(handler):
+            self.add(method, template, handler, auth, cacheable, tables)
+            return handler
+        return decorator
+
+    def match(self, method, path):
+        """Find the route for a request.
+
+        Returns (route, params) on a match, (None, allowed_methods) when the
+        path exists but not for this method, and (None, None) otherwise.
+        """
+        segments = path.strip('/').split('/') if path not in ('', '/') else []
+        params = {}
+        node = self._find(self._root, segments, 0, params)
+        if node is None:
+            return None, None
+        route = node.routes.get(method)
+        if route is None:
+            return None, tuple(node.routes)
+        return route, params
+
+    def _find(self, node, segments, index, params):
+        if index == len(segments):
+            return node if node.routes else None
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            found = self._find(child, segments, index + 1, params)
+            if found is not None:
+                return found
+        if node.param is None or not segment:
+            return None
+        name, kind, convert, child = node.param
+        if kind == 'path':
+            params[name] = '/'.join(segments[index:])
+            return child if child.routes else None
+        value = convert(segment)
+        if value is None:
+            return None
+        found = self._find(child, segments, index + 1, params)
+        if found is not None:
+            params[name] = value
+        return found
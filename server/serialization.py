@@ -0,0 +1,46 @@
+import json
+from decimal import Decimal
+from datetime import date, datetime
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib encoder is used otherwise
+    orjson = None
+
+# The one JSON layer for API responses and request bodies.
+#
+# dumps() returns UTF-8 bytes ready for wfile.write(). Row models already
+# hand over plain str/int/float/None values, so the encoder's fallback hook
+# only runs for the odd Decimal or datetime left in hand-built responses.
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    to_json = getattr(obj, 'to_json', None)
+    if to_json is not None:
+        # Row models (see models.py)
+        return to_json()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+_encoder = json.JSONEncoder(
+    default=_default,
+    ensure_ascii=False,
+    check_circular=False,
+    separators=(',', ':')
+)
+
+def dumps_stdlib(obj):
+    return _encoder.encode(obj).encode('utf-8')
+
+if orjson is not None:
+    def dumps_orjson(obj):
+        return orjson.dumps(obj, default=_default)
+
+    dumps = dumps_orjson
+    loads = orjson.loads
+else:
+    dumps_orjson = None
+    dumps = dumps_stdlib
+    loads = json.loads
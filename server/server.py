@@ -1,27 +1,54 @@
 import os
-import json
+import copy
+import signal
+import argparse
+import threading
+import time
 import http.server
-import socketserver
-import urllib.parse
 import mimetypes
+import stat
 from http import HTTPStatus
-from datetime import datetime
 from urllib.parse import parse_qs, urlparse
-from decimal import Decimal
+from email.utils import formatdate, parsedate_to_datetime
 
 # Import modules
 from auth import register_user, login_user, login_admin
-from artwork import get_all_artworks, get_artwork, create_artwork, update_artwork, delete_artwork
-from exhibition import get_all_exhibitions, get_exhibition, create_exhibition, update_exhibition, delete_exhibition
-from contact import create_contact_message, get_messages, update_message, json_dumps
-from db_setup import initialize_database
-from middleware import auth_required, admin_required, extract_auth_token, verify_token
+from artwork import get_all_artworks, stream_all_artworks, get_artwork, get_artworks_by_ids, create_artwork, update_artwork, delete_artwork
+from artwork import ARTWORKS_PAGE_SIZE, ARTWORKS_MAX_PAGE_SIZE
+from exhibition import get_all_exhibitions, stream_all_exhibitions, get_exhibition, create_exhibition, update_exhibition, delete_exhibition
+from exhibition import EXHIBITIONS_PAGE_SIZE, EXHIBITIONS_MAX_PAGE_SIZE
+from contact import create_contact_message, get_messages, export_messages, get_unread_count, update_message
+from database import MESSAGES_PAGE_SIZE, MESSAGES_MAX_PAGE_SIZE
+from migrate import ensure_schema
+from database import request_scope, commit_request, warm_pool, close_pool
+from db_backend import Error
+from query_stats import route_scope, set_route, route_label, get_query_stats
+from middleware import authorize, extract_auth_token, verify_token
 from mpesa import handle_stk_push_request, check_transaction_status, handle_mpesa_callback
-from db_operations import get_all_tickets, get_all_orders, get_order_details
+from db_operations import get_all_tickets, stream_all_orders
+from json_stream import json_object_chunks, write_chunked
+from table_versions import etag_for, last_modified
+from response_cache import response_cache, FRESH, REFRESH
+from single_flight import SingleFlight
+from static_files import RangeNotSatisfiable, parse_range, not_modified, range_applies, send_file
+from compression import COMPRESSION_MIN_SIZE, negotiate, encode_body, compress_chunks, compressed_cache
+from serialization import dumps, loads
+from pagination import parse_limit
+from router import Router
+from worker_server import WorkerPoolServer, create_server, SERVER_MODE, SERVER_THREADS, SERVER_QUEUE_DEPTH
+from prefork import run_prefork
 
 # Define the port
 PORT = 8000
 
+# Directory served under /static/
+STATIC_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), "static"))
+
+# Persistent connections: seconds a connection may sit idle between requests,
+# and requests served on one connection before it is closed
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get('HTTP_KEEPALIVE_TIMEOUT', 15))
+HTTP_MAX_REQUESTS_PER_CONNECTION = int(os.environ.get('HTTP_MAX_REQUESTS_PER_CONNECTION', 100))
+
 # Ensure the static/uploads directory exists
 def ensure_uploads_directory():
     uploads_dir = os.path.join(os.path.dirname(__file__), "static", "uploads")
@@ -57,77 +84,10 @@ def create_default_exhibition_image():
 # Call this function to ensure the default exhibition image exists
 create_default_exhibition_image()
 
-# Custom JSON encoder to handle Decimal types
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super(DecimalEncoder, self).default(obj)
-
-# Mock data for tickets (in a real app, this would come from a database)
-# We'll use this for demo purposes
-mock_tickets = [
-    {
-        "id": "ticket-001",
-        "userId": "user-123",
-        "userName": "John Doe",
-        "exhibitionId": "exhibition-1",
-        "exhibitionTitle": "Modern Art Showcase",
-        "bookingDate": "2025-04-20T14:00:00",
-        "ticketCode": "EXHB-001-123",
-        "slots": 2,
-        "status": "active"
-    },
-    {
-        "id": "ticket-002",
-        "userId": "user-456",
-        "userName": "Jane Smith",
-        "exhibitionId": "exhibition-2",
-        "exhibitionTitle": "Classical Paintings",
-        "bookingDate": "2025-04-21T10:30:00",
-        "ticketCode": "EXHB-002-456",
-        "slots": 1,
-        "status": "used"
-    },
-    {
-        "id": "ticket-003",
-        "userId": "user-789",
-        "userName": "Alex Johnson",
-        "exhibitionId": "exhibition-1",
-        "exhibitionTitle": "Modern Art Showcase",
-        "bookingDate": "2025-04-22T16:15:00",
-        "ticketCode": "EXHB-001-789",
-        "slots": 3,
-        "status": "cancelled"
-    }
-]
-
-# Function to get all tickets (mock implementation)
-def get_all_tickets(auth_header):
-    """Get all tickets (admin only)"""
-    print(f"Getting all tickets with auth header: {auth_header[:20]}... (truncated)")
-    
-    # Extract and verify token - directly use the token from auth_header
-    token = extract_auth_token(auth_header)
-    if not token:
-        print("Authentication required - no token found")
-        return {"error": "Authentication required"}
-    
-    payload = verify_token(token)
-    if isinstance(payload, dict) and "error" in payload:
-        print(f"Authentication failed: {payload['error']}")
-        return {"error": payload["error"]}
-    
-    # Check if user is admin
-    if not payload.get("is_admin", False):
-        print("Access denied - not an admin user")
-        return {"error": "Unauthorized access: Admin privileges required"}
-    
-    print(f"Admin user authenticated, returning {len(mock_tickets)} tickets")
-    # Return tickets data
-    return {"tickets": mock_tickets}
+def query_param(query, name):
+    """Return the first value of a query string parameter, or None"""
+    values = query.get(name)
+    return values[0] if values else None
 
 # Function to generate exhibition ticket (mock implementation)
 def generate_ticket(booking_id, auth_header):
@@ -147,188 +107,394 @@ def generate_ticket(booking_id, auth_header):
         "success": True
     }
 
+# Route table; handlers are registered with @router.route on RequestHandler
+router = Router()
+
+# Coalesces concurrent response cache misses (see RequestHandler._send_cached)
+single_flight = SingleFlight()
+
+class RequestAborted(Exception):
+    """Raised after an error response has been sent in place of the normal one"""
+    pass
+
 class RequestHandler(http.server.BaseHTTPRequestHandler):
     
-    def _set_response(self, status_code=200, content_type='application/json'):
-        self.send_response(status_code)
-        self.send_header('Content-type', content_type)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
+    # Keep connections open between requests (every response is framed by
+    # Content-Length or chunked encoding)
+    protocol_version = 'HTTP/1.1'
+    # Seconds a kept-alive connection may sit idle (in pool mode, parked with
+    # the server's idle watcher), and the socket timeout within a request
+    timeout = HTTP_KEEPALIVE_TIMEOUT
+    # Headers and body are separate writes; with Nagle on, the body of a
+    # response on a kept-alive connection waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+    # Requests read on this connection so far
+    requests_handled = 0
     
-    def do_OPTIONS(self):
-        self._set_response()
+    def handle_one_request(self):
+        # All module functions called while handling this request share one
+        # connection and one transaction (see database.request_scope)
+        try:
+            with request_scope(), route_scope():
+                super().handle_one_request()
+        except RequestAborted:
+            pass
+        except ConnectionError:
+            # The client reset the connection, typically while it was idle
+            self.close_connection = True
     
-    def serve_static_file(self, file_path):
-        """Serve a static file based on its MIME type"""
+    def parse_request(self):
+        if not super().parse_request():
+            return False
+        
+        self.requests_handled += 1
+        # Validators of a versioned response (see _set_validators)
+        self.etags = None
+        self.modified = None
+        self.last_modified = None
+        # Responses rendered for the response cache instead of sent (see _render)
+        self.capture = None
+        if self.requests_handled >= HTTP_MAX_REQUESTS_PER_CONNECTION:
+            self.close_connection = True
+        
+        # Read the whole body up front, so the next request on a kept-alive
+        # connection starts where this one ends whatever the handler reads
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            self.send_error(HTTPStatus.LENGTH_REQUIRED, "Chunked request bodies are not supported")
+            return False
         try:
-            # Check if file exists
-            if not os.path.exists(file_path):
-                self.send_response(404)
-                self.end_headers()
-                return
-                
-            # Determine the content type
-            content_type, _ = mimetypes.guess_type(file_path)
-            if not content_type:
-                content_type = 'application/octet-stream'
-                
-            # Get file size
-            file_size = os.path.getsize(file_path)
-            
-            # Set headers
-            self.send_response(200)
-            self.send_header('Content-type', content_type)
-            self.send_header('Content-Length', str(file_size))
-            self.end_headers()
-            
-            # Read and send the file
-            with open(file_path, 'rb') as f:
-                self.wfile.write(f.read())
-                
-        except Exception as e:
-            print(f"Error serving static file: {e}")
-            self.send_response(500)
-            self.end_headers()
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            self.send_error(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+            return False
+        self.raw_body = self.rfile.read(content_length) if content_length else b''
+        
+        # Route once per request; PUT and DELETE paths get their query string
+        # stripped like everything else
+        self.url = urlparse(self.path)
+        self.route, match = router.match(self.command, self.url.path)
+        self.route_params = match if self.route is not None else {}
+        self.allowed_methods = match if self.route is None else None
+        # Queries issued while handling this request are attributed to its route
+        set_route(self.route.label if self.route is not None else route_label(self.command, self.url.path))
+        return True
     
-    def do_GET(self):
-        parsed_url = urllib.parse.urlparse(self.path)
-        path = parsed_url.path
-        
-        # Handle static files (images, CSS, JS, etc.)
-        if path.startswith('/static/'):
-            file_path = os.path.join(os.path.dirname(__file__), path[1:])
-            # Debugging info
-            print(f"Serving static file: {file_path}")
-            self.serve_static_file(file_path)
-            return
-        
-        # Handle API endpoints
-        # Handle GET /artworks
-        if path == '/artworks':
-            response = get_all_artworks()
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
+    def _dispatch(self):
+        """Run the handler for the matched route after its auth check"""
+        route = self.route
+        if route is None:
+            if self.allowed_methods:
+                self._send_json({"error": "Method not allowed"}, 405, headers={'Allow': ', '.join(self.allowed_methods)})
+                return
+            # Default 404 response
+            self._send_json({"error": "Resource not found"}, 404)
             return
         
-        # Handle GET /artworks/{id}
-        elif path.startswith('/artworks/') and len(path.split('/')) == 3:
-            artwork_id = path.split('/')[2]
-            response = get_artwork(artwork_id)
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
+        if not authorize(self, route.auth):
             return
         
-        # Handle GET /exhibitions
-        elif path == '/exhibitions':
-            response = get_all_exhibitions()
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
+        self.query = parse_qs(self.url.query)
+        if route.tables:
+            self._set_validators(route)
+            self._send_cached(route)
             return
-        
-        # Handle GET /exhibitions/{id}
-        elif path.startswith('/exhibitions/') and len(path.split('/')) == 3:
-            exhibition_id = path.split('/')[2]
-            response = get_exhibition(exhibition_id)
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
+        route.handler(self, **self.route_params)
+    
+    def _set_validators(self, route):
+        """Set the ETags and Last-Modified a versioned response may carry.
+
+        Versions are read before the handler runs, so a write that lands in
+        between only makes the validators older than the body, never newer.
+        There is a candidate ETag per encoding the body may be sent in; which
+        one applies is only known once the body is (see _send_body).
+        """
+        encoding = negotiate(self.headers.get('Accept-Encoding'))
+        self.etags = {'': etag_for(route.tables)}
+        if encoding is not None:
+            self.etags[encoding] = etag_for(route.tables, encoding)
+        self.modified = max(last_modified(table) for table in route.tables)
+        # Dates have one-second resolution; a write later in the same second
+        # would go unnoticed by If-Modified-Since
+        if time.time() - self.modified >= 1:
+            self.last_modified = formatdate(self.modified, usegmt=True)
+    
+    def _not_modified(self, etag):
+        """True if the client's copy, per its conditional headers, is the one tagged etag"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or 'W/' + etag in tags
+        if self.last_modified is None or not self.headers.get('If-Modified-Since'):
+            return False
+        try:
+            since = parsedate_to_datetime(self.headers['If-Modified-Since']).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(self.modified) <= since
+    
+    def _validator_headers(self, etag):
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+        if self.last_modified is not None:
+            headers['Last-Modified'] = self.last_modified
+        return headers
+    
+    def _send_cached(self, route):
+        """Send a versioned route's response through the response cache.
+
+        Concurrent misses for the same key render the response once and
+        share it (single flight). A stale entry is sent as is, and the first
+        request to see it refreshes it on a separate thread.
+        
+        The entry is tagged with the row the route reads (its {id}) or, for
+        listings, with the whole table.
+        """
+        key = (route.label, tuple(sorted(self.route_params.items())),
+               tuple(sorted((name, tuple(values)) for name, values in self.query.items())))
+        row_id = self.route_params.get('id')
+        tags = tuple((table, row_id) for table in route.tables)
+        body, state = response_cache.get(key, tags)
+        if body is not None:
+            # Only responses that aren't errors are cached
+            self._send_body(body, headers={'X-Cache': 'HIT' if state == FRESH else 'STALE'}, validators=True)
+            if state == REFRESH:
+                threading.Thread(target=copy.copy(self)._refresh_cached, args=(route, key, tags), daemon=True).start()
             return
-        
-        # Handle GET /messages (admin only)
-        elif path == '/messages':
-            print("Processing GET /messages request")
-            auth_header = self.headers.get('Authorization', '')
-            print(f"Authorization header: {auth_header[:20]}... (truncated)")
-            
-            # Get messages
-            response = get_messages(auth_header)
-            print(f"Get messages response: {response}")
-            
-            if "error" in response:
-                self._set_response(401)
-                self.wfile.write(json_dumps({"error": response["error"]}).encode())
-                return
-            
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
+        (status_code, body, headers, storable), shared = single_flight.run(
+            key, lambda: self._render_and_store(route, key, tags))
+        self._send_body(body, status_code, dict(headers or {}, **{'X-Cache': 'COALESCED' if shared else 'MISS'}),
+                        validators=storable)
+    
+    def _render_and_store(self, route, key, tags):
+        """Render the route's response and cache it; returns (status, body, headers, storable)"""
+        versions = response_cache.versions(route.tables)
+        status_code, body, headers, storable = self._render(route)
+        if storable:
+            response_cache.put(key, body, tags, versions)
+        return status_code, body, headers, storable
+    
+    def _render(self, route):
+        """Run the route's handler, returning what it sends instead of sending it"""
+        self.capture = []
+        try:
+            route.handler(self, **self.route_params)
+        finally:
+            captured, self.capture = self.capture, None
+        return captured[0]
+    
+    def _refresh_cached(self, route, key, tags):
+        """Re-render a stale cache entry; runs on its own thread, on a copy of the handler"""
+        try:
+            with request_scope(), route_scope():
+                set_route(route.label)
+                self._render_and_store(route, key, tags)
+        except Exception as e:
+            print(f"Error refreshing {route.label}: {e}")
+        finally:
+            response_cache.refreshed(key)
+    
+    def _set_response(self, status_code=200, content_type='application/json', headers=None):
+        # Commit before the status line goes out so a failed commit can't
+        # follow a success response
+        if not commit_request():
+            body = dumps({"error": "Database commit failed"})
+            self.send_response(500)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.wfile.write(body)
+            raise RequestAborted()
+        self.send_response(status_code)
+        self.send_header('Content-type', content_type)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if 'Connection' not in (headers or {}):
+            self._send_connection_header()
+        self.end_headers()
+    
+    def _send_connection_header(self):
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        elif self.request_version == 'HTTP/1.0':
+            self.send_header('Connection', 'keep-alive')
+    
+    def _send_json(self, data, status_code=200, headers=None):
+        """Send data as a JSON response, compressed if large and the client accepts it"""
+        body = dumps(data)
+        if self.capture is not None:
+            # Error bodies (e.g. a failed connection) are not worth keeping
+            storable = status_code == 200 and not (isinstance(data, dict) and 'error' in data)
+            self.capture.append((status_code, body, headers, storable))
             return
-            
-        # Handle GET /tickets (admin only)
-        elif path == '/tickets':
-            print("Processing GET /tickets request")
-            auth_header = self.headers.get('Authorization', '')
-            
-            # Verify admin access
-            token = extract_auth_token(auth_header)
-            if not token:
-                self._set_response(401)
-                self.wfile.write(json_dumps({"error": "Authentication required"}).encode())
-                return
-            
-            payload = verify_token(token)
-            if not payload.get("is_admin", False):
-                self._set_response(403)
-                self.wfile.write(json_dumps({"error": "Admin access required"}).encode())
+        self._send_body(body, status_code, headers)
+    
+    def _send_body(self, body, status_code=200, headers=None, validators=False):
+        """Send a response body, compressed if large and the client accepts it.
+
+        validators: the body is a versioned response and not an error, so it
+        carries the ETag and Last-Modified set by _set_validators and may be
+        answered with 304. Error bodies never are, or a client would keep
+        showing a temporary error until the table next changes.
+        """
+        headers = dict(headers or {})
+        encoding = None
+        if len(body) >= COMPRESSION_MIN_SIZE:
+            headers['Vary'] = 'Accept-Encoding'
+            encoding = negotiate(self.headers.get('Accept-Encoding'))
+        if validators and status_code == 200 and self.etags is not None:
+            # Tagged for the encoding the body is actually sent in
+            etag = self.etags.get(encoding or '')
+            if self._not_modified(etag):
+                self._set_response(304, headers=self._validator_headers(etag))
                 return
-            
-            # Get tickets from database
-            from db_operations import get_all_tickets
-            response = get_all_tickets()
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
+            headers.update(self._validator_headers(etag))
+        if encoding is not None:
+            cacheable = status_code == 200 and self.route is not None and self.route.cacheable
+            body = encode_body(body, encoding, cacheable)
+            headers['Content-Encoding'] = encoding
+        headers['Content-Length'] = str(len(body))
+        self._set_response(status_code, headers=headers)
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+    
+    def _send_json_stream(self, key, rows):
+        """Send {key: [rows...]} as it is read from the database.
+
+        HTTP/1.1 clients get chunked transfer encoding; HTTP/1.0 clients get
+        the body unframed, ended by closing the connection. An error after the
+        headers are out can only be reported by cutting the response short.
+        """
+        chunked = self.request_version != 'HTTP/1.0'
+        headers = {'Transfer-Encoding': 'chunked'} if chunked else {'Connection': 'close'}
+        headers['Vary'] = 'Accept-Encoding'
+        encoding = negotiate(self.headers.get('Accept-Encoding'))
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        completed = False
+        
+        try:
+            self._set_response(headers=headers)
+            chunks = json_object_chunks(key, rows)
+            if encoding is not None:
+                chunks = compress_chunks(chunks, encoding)
+            if chunked:
+                write_chunked(self.wfile, chunks)
+            else:
+                for chunk in chunks:
+                    self.wfile.write(chunk)
+            completed = True
+        except Error as e:
+            print(f"Error streaming {key}: {e}")
+        except OSError as e:
+            print(f"Client went away while streaming {key}: {e}")
+        finally:
+            rows.close()
+            if not completed:
+                self.close_connection = True
+    
+    def do_OPTIONS(self):
+        self._set_response(headers={'Content-Length': '0'})
+    
+    def serve_static_file(self, file_path):
+        """Serve a static file based on its MIME type.
+
+        Handles HEAD, conditional requests (ETag / Last-Modified) and single
+        byte ranges (Range / If-Range). The file is sent with sendfile() or
+        copied in chunks, never read into memory whole.
+        """
+        try:
+            f = open(file_path, 'rb')
+        except OSError:
+            f = None
+        if f is None or not stat.S_ISREG(os.fstat(f.fileno()).st_mode):
+            if f is not None:
+                f.close()
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self._send_connection_header()
+            self.end_headers()
             return
         
-        # Handle GET /orders (admin only)
-        elif path == '/orders':
-            print("Processing GET /orders request")
-            auth_header = self.headers.get('Authorization', '')
-            
-            # Verify admin access
-            token = extract_auth_token(auth_header)
-            if not token:
-                self._set_response(401)
-                self.wfile.write(json_dumps({"error": "Authentication required"}).encode())
-                return
-            
-            payload = verify_token(token)
-            if not payload.get("is_admin", False):
-                self._set_response(403)
-                self.wfile.write(json_dumps({"error": "Admin access required"}).encode())
+        with f:
+            try:
+                file_stat = os.fstat(f.fileno())
+                size = file_stat.st_size
+                modified = file_stat.st_mtime
+                etag = f'"{file_stat.st_mtime_ns:x}-{size:x}"'
+                
+                # Determine the content type
+                content_type, _ = mimetypes.guess_type(file_path)
+                if not content_type:
+                    content_type = 'application/octet-stream'
+                
+                if not_modified(self.headers, etag, modified):
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Last-Modified', formatdate(modified, usegmt=True))
+                    self._send_connection_header()
+                    self.end_headers()
+                    return
+                
+                try:
+                    byte_range = None
+                    if range_applies(self.headers, etag, modified):
+                        byte_range = parse_range(self.headers.get('Range'), size)
+                except RangeNotSatisfiable:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{size}')
+                    self.send_header('Content-Length', '0')
+                    self._send_connection_header()
+                    self.end_headers()
+                    return
+                
+                offset, length = 0, size
+                if byte_range is not None:
+                    offset, length = byte_range[0], byte_range[1] - byte_range[0] + 1
+                
+                # Set headers
+                self.send_response(206 if byte_range is not None else 200)
+                self.send_header('Content-type', content_type)
+                self.send_header('Content-Length', str(length))
+                if byte_range is not None:
+                    self.send_header('Content-Range', f'bytes {byte_range[0]}-{byte_range[1]}/{size}')
+                self.send_header('Accept-Ranges', 'bytes')
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', formatdate(modified, usegmt=True))
+                self._send_connection_header()
+                self.end_headers()
+            except Exception as e:
+                print(f"Error serving static file: {e}")
+                self.send_response(500)
+                self.send_header('Content-Length', '0')
+                self.send_header('Connection', 'close')
+                self.end_headers()
                 return
             
-            # Get orders from database
-            from db_operations import get_all_orders
-            response = get_all_orders()
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
-            return
-            
-        # Handle GET /tickets/generate/{id} (generate ticket)
-        elif path.startswith('/tickets/generate/') and len(path.split('/')) == 4:
-            booking_id = path.split('/')[3]
-            print(f"Processing generate ticket request for booking {booking_id}")
-            auth_header = self.headers.get('Authorization', '')
-            
-            # Generate ticket
-            response = generate_ticket(booking_id, auth_header)
-            
-            if "error" in response:
-                self._set_response(401)
-                self.wfile.write(json_dumps({"error": response["error"]}).encode())
+            if self.command == 'HEAD' or not length:
                 return
-            
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
-            return
-        
-        # Default 404 response
-        self._set_response(404)
-        self.wfile.write(json_dumps({"error": "Resource not found"}).encode())
+            # The headers are on the socket already (wfile is unbuffered);
+            # in asyncio mode there is no socket and the file is copied
+            try:
+                send_file(f, offset, length, self.wfile, getattr(self, 'connection', None))
+            except OSError as e:
+                print(f"Error sending static file {file_path}: {e}")
+                self.close_connection = True
+    
+    def do_GET(self):
+        self._dispatch()
+    
+    def do_HEAD(self):
+        self._dispatch()
     
     def do_POST(self):
         # Get content length
-        content_length = int(self.headers.get('Content-Length', 0))
+        content_length = len(self.raw_body)
         
         # Get content type
         content_type = self.headers.get('Content-Type', '')
@@ -337,499 +503,493 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
         print(f"POST to {self.path} with content type: {content_type}, length: {content_length}")
         
         # Parse POST data based on content type
-        post_data = {}
+        self.body = {}
         
         if content_length > 0:
             if "application/json" in content_type:
                 # Handle JSON data
-                post_data = json.loads(self.rfile.read(content_length).decode('utf-8'))
-                print(f"Parsed JSON data: {post_data}")
+                self.body = loads(self.raw_body)
+                print(f"Parsed JSON data: {self.body}")
             elif "multipart/form-data" in content_type:
                 # For multipart form data (like file uploads), will be handled in specific endpoints
                 print("Multipart form data detected, will handle in endpoint")
             else:
                 # Handle plain form data (url-encoded)
-                form_data = self.rfile.read(content_length).decode('utf-8')
-                post_data = parse_qs(form_data)
-                for key in post_data:
-                    post_data[key] = post_data[key][0]
-                print(f"Parsed form data: {post_data}")
-        
-        # Process based on path
-        path = self.path
-        
-        # Register user
-        if path == '/register':
-            if not post_data:
-                self._set_response(400)
-                self.wfile.write(json_dumps({"error": "Missing registration data"}).encode())
-                return
-            
-            print(f"Registration data: {post_data}")
-            
-            # Check required fields
-            required_fields = ['name', 'email', 'password']
-            missing_fields = [field for field in required_fields if field not in post_data]
-            
-            if missing_fields:
-                self._set_response(400)
-                self.wfile.write(json_dumps({"error": f"Missing required fields: {', '.join(missing_fields)}"}).encode())
-                return
-            
-            # Register the user
-            response = register_user(
-                post_data['name'], 
-                post_data['email'], 
-                post_data['password'],
-                post_data.get('phone', '')  # Optional field
-            )
-            
-            if "error" in response:
-                self._set_response(400)
+                form_data = self.raw_body.decode('utf-8')
+                self.body = parse_qs(form_data)
+                for key in self.body:
+                    self.body[key] = self.body[key][0]
+                print(f"Parsed form data: {self.body}")
+        
+        self._dispatch()
+    
+    def do_PUT(self):
+        # Parse JSON data
+        self.body = {}
+        if self.raw_body:
+            self.body = loads(self.raw_body)
+        
+        self._dispatch()
+    
+    def do_DELETE(self):
+        self._dispatch()
+    
+    def _send_error_for(self, error_message):
+        """Send an error returned by an admin write, with a status matching its message"""
+        if "Authentication" in error_message or "authorized" in error_message:
+            status_code = 401
+        elif "Admin" in error_message:
+            status_code = 403
+        elif "not found" in error_message:
+            status_code = 404
+        else:
+            status_code = 400
+        
+        self._send_json({"error": error_message}, status_code)
+    
+    # Static files (images, CSS, JS, etc.)
+    @router.route('GET', '/static/{path:path}')
+    @router.route('HEAD', '/static/{path:path}')
+    def handle_get_static(self, path):
+        file_path = os.path.realpath(os.path.join(STATIC_DIR, path))
+        # Nothing outside static/ (e.g. /static/../server.py)
+        if not file_path.startswith(STATIC_DIR + os.sep):
+            self._send_json({"error": "Resource not found"}, 404)
+            return
+        # Debugging info
+        print(f"Serving static file: {file_path}")
+        self.serve_static_file(file_path)
+    
+    # GET /artworks?limit=&after=&fields=
+    # GET /artworks?ids=1,2,3&fields= (batch lookup)
+    @router.route('GET', '/artworks', cacheable=True, tables=('artworks',))
+    def handle_list_artworks(self):
+        query = self.query
+        try:
+            if 'ids' in query:
+                response = get_artworks_by_ids(query_param(query, 'ids'), fields=query_param(query, 'fields'))
             else:
-                self._set_response(201)
-            
-            self.wfile.write(json_dumps(response).encode())
+                limit = parse_limit(query_param(query, 'limit'), ARTWORKS_PAGE_SIZE, ARTWORKS_MAX_PAGE_SIZE)
+                response = get_all_artworks(limit, query_param(query, 'after'), fields=query_param(query, 'fields'))
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
             return
-        
-        # User login
-        elif path == '/login':
-            if not post_data:
-                self._set_response(400)
-                self.wfile.write(json_dumps({"error": "Missing login data"}).encode())
-                return
-            
-            # Check required fields
-            if 'email' not in post_data or 'password' not in post_data:
-                self._set_response(400)
-                self.wfile.write(json_dumps({"error": "Email and password required"}).encode())
-                return
-            
-            # Login the user
-            response = login_user(post_data['email'], post_data['password'])
-            
-            if "error" in response:
-                self._set_response(401)
-                self.wfile.write(json_dumps(response).encode())
-                return
-            
-            self._set_response(200)
-            self.wfile.write(json_dumps(response).encode())
+        self._send_json(response)
+    
+    # GET /artworks/export?fields= (every artwork, streamed)
+    @router.route('GET', '/artworks/export')
+    def handle_export_artworks(self):
+        try:
+            rows = stream_all_artworks(fields=query_param(self.query, 'fields'))
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
+            return
+        if rows is None:
+            self._send_json({"error": "Database connection failed"}, 500)
+            return
+        self._send_json_stream("artworks", rows)
+    
+    # GET /artworks/{id}?fields=
+    @router.route('GET', '/artworks/{id:int}', cacheable=True, tables=('artworks',))
+    def handle_get_artwork(self, id):
+        try:
+            response = get_artwork(id, fields=query_param(self.query, 'fields'))
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
             return
+        self._send_json(response)
+    
+    # GET /exhibitions?status=&from=&to=&limit=&after=&fields=
+    @router.route('GET', '/exhibitions', cacheable=True, tables=('exhibitions',))
+    def handle_list_exhibitions(self):
+        query = self.query
+        try:
+            limit = parse_limit(query_param(query, 'limit'), EXHIBITIONS_PAGE_SIZE, EXHIBITIONS_MAX_PAGE_SIZE)
+            response = get_all_exhibitions(
+                limit,
+                query_param(query, 'after'),
+                status=query_param(query, 'status'),
+                date_from=query_param(query, 'from'),
+                date_to=query_param(query, 'to'),
+                fields=query_param(query, 'fields')
+            )
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
+            return
+        self._send_json(response)
+    
+    # GET /exhibitions/export?status=&from=&to=&fields= (streamed)
+    @router.route('GET', '/exhibitions/export')
+    def handle_export_exhibitions(self):
+        query = self.query
+        try:
+            rows = stream_all_exhibitions(
+                status=query_param(query, 'status'),
+                date_from=query_param(query, 'from'),
+                date_to=query_param(query, 'to'),
+                fields=query_param(query, 'fields')
+            )
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
+            return
+        if rows is None:
+            self._send_json({"error": "Database connection failed"}, 500)
+            return
+        self._send_json_stream("exhibitions", rows)
+    
+    # GET /exhibitions/{id}?fields=
+    @router.route('GET', '/exhibitions/{id:int}', cacheable=True, tables=('exhibitions',))
+    def handle_get_exhibition(self, id):
+        try:
+            response = get_exhibition(id, fields=query_param(self.query, 'fields'))
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
+            return
+        self._send_json(response)
+    
+    # GET /messages?status=&source=&from=&to=&limit=&after=
+    @router.route('GET', '/messages', auth='admin')
+    def handle_list_messages(self):
+        print("Processing GET /messages request")
+        query = self.query
         
-        # Admin login - Fixed the endpoint
-        elif path == '/admin-login':
-            if not post_data:
-                self._set_response(400)
-                self.wfile.write(json_dumps({"error": "Missing login data"}).encode())
-                return
-            
-            # Check required fields
-            if 'email' not in post_data or 'password' not in post_data:
-                self._set_response(400)
-                self.wfile.write(json_dumps({"error": "Email and password required"}).encode())
-                return
-            
-            # Login as admin
-            response = login_admin(post_data['email'], post_data['password'])
-            
-            if "error" in response:
-                self._set_response(401)
-                self.wfile.write(json_dumps(response).encode())
-                return
-            
-            self._set_response(200)
-            self.wfile.write(json_dumps(response).encode())
+        # Get messages
+        try:
+            limit = parse_limit(query_param(query, 'limit'), MESSAGES_PAGE_SIZE, MESSAGES_MAX_PAGE_SIZE)
+            response = get_messages(
+                self.headers.get('Authorization', ''),
+                limit,
+                query_param(query, 'after'),
+                status=query_param(query, 'status'),
+                source=query_param(query, 'source'),
+                date_from=query_param(query, 'from'),
+                date_to=query_param(query, 'to')
+            )
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
             return
         
-        # Create artwork (admin only)
-        elif path == '/artworks':
-            auth_header = self.headers.get('Authorization', '')
-            response = create_artwork(auth_header, post_data)
-            
-            if "error" in response:
-                error_message = response["error"]
-                
-                if "Authentication" in error_message or "authorized" in error_message:
-                    self._set_response(401)
-                elif "Admin" in error_message:
-                    self._set_response(403)
-                else:
-                    self._set_response(400)
-                    
-                self.wfile.write(json_dumps({"error": error_message}).encode())
-                return
-            
-            self._set_response(201)
-            self.wfile.write(json_dumps(response).encode())
+        if "error" in response:
+            self._send_json({"error": response["error"]}, 401)
             return
         
-        # Create exhibition (admin only)
-        elif path == '/exhibitions':
-            auth_header = self.headers.get('Authorization', '')
-            response = create_exhibition(auth_header, post_data)
-            
-            if "error" in response:
-                error_message = response["error"]
-                
-                if "Authentication" in error_message or "authorized" in error_message:
-                    self._set_response(401)
-                elif "Admin" in error_message:
-                    self._set_response(403)
-                else:
-                    self._set_response(400)
-                    
-                self.wfile.write(json_dumps({"error": error_message}).encode())
-                return
-            
-            self._set_response(201)
-            self.wfile.write(json_dumps(response).encode())
+        self._send_json(response)
+    
+    # GET /messages/export?status=&source=&from=&to= (streamed)
+    @router.route('GET', '/messages/export', auth='admin')
+    def handle_export_messages(self):
+        query = self.query
+        try:
+            response = export_messages(
+                self.headers.get('Authorization', ''),
+                status=query_param(query, 'status'),
+                source=query_param(query, 'source'),
+                date_from=query_param(query, 'from'),
+                date_to=query_param(query, 'to')
+            )
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
             return
         
-        # Create contact message
-        elif path == '/contact':
-            response = create_contact_message(post_data)
-            
-            if "error" in response:
-                self._set_response(400)
-            else:
-                self._set_response(201)
-            
-            self.wfile.write(json_dumps(response).encode())
+        if isinstance(response, dict):
+            self._send_json({"error": response["error"]}, 401)
             return
         
-        # Update message status (admin only)
-        elif path.startswith('/messages/'):
-            message_id = path.split('/')[2]
-            token = extract_auth_token(self)
-            if not token:
-                self._set_response(401)
-                self.wfile.write(json_dumps({"error": "Authentication required"}).encode())
-                return
-            
-            payload = verify_token(token)
-            if isinstance(payload, dict) and "error" in payload:
-                self._set_response(401)
-                self.wfile.write(json_dumps({"error": payload["error"]}).encode())
-                return
-            
-            # Check if user is admin
-            if not payload.get("is_admin", False):
-                self._set_response(403)
-                self.wfile.write(json_dumps({"error": "Unauthorized access: Admin privileges required"}).encode())
-                return
-            
-            response = update_message(self.headers.get('Authorization', ''), message_id, post_data)
-            
-            if "error" in response:
-                self._set_response(400)
-            else:
-                self._set_response(200)
-            
-            self.wfile.write(json_dumps(response).encode())
+        self._send_json_stream("messages", response)
+    
+    # GET /messages/unread-count - for the inbox badge
+    @router.route('GET', '/messages/unread-count', auth='admin')
+    def handle_get_unread_count(self):
+        response = get_unread_count(self.headers.get('Authorization', ''))
+        
+        if "error" in response:
+            self._send_json({"error": response["error"]}, 401)
             return
         
-        # New M-Pesa STK Push endpoint
-        elif path == '/mpesa/stk-push':
-            print("Processing M-Pesa STK Push request")
-            response = handle_stk_push_request(post_data)
-            
-            if "error" in response:
-                self._set_response(400)
-                self.wfile.write(json_dumps(response).encode())
-                return
-            
-            self._set_response(200)
-            self.wfile.write(json_dumps(response).encode())
+        self._send_json(response)
+    
+    # GET /admin/query-stats - per-query timing histograms
+    @router.route('GET', '/admin/query-stats', auth='admin')
+    def handle_get_query_stats(self):
+        order_by = query_param(self.query, 'sort') or 'totalMs'
+        if order_by not in ('totalMs', 'avgMs', 'maxMs', 'count', 'rows', 'slow'):
+            self._send_json({"error": "sort must be one of totalMs, avgMs, maxMs, count, rows, slow"}, 400)
             return
-            
-        # M-Pesa callback endpoint
-        elif path == '/mpesa/callback':
-            print("Processing M-Pesa callback")
-            response = handle_mpesa_callback(post_data)
-            
-            if "error" in response:
-                self._set_response(400)
-                self.wfile.write(json_dumps(response).encode())
-                return
-            
-            self._set_response(200)
-            self.wfile.write(json_dumps(response).encode())
+        
+        self._send_json(get_query_stats(order_by))
+    
+    # GET /admin/cache-stats - response and compressed-body cache counters
+    @router.route('GET', '/admin/cache-stats', auth='admin')
+    def handle_get_cache_stats(self):
+        self._send_json({
+            "responses": response_cache.stats(),
+            "coalescing": single_flight.stats(),
+            "compressed": compressed_cache.stats(),
+        })
+    
+    # GET /tickets
+    @router.route('GET', '/tickets', auth='admin')
+    def handle_list_tickets(self):
+        print("Processing GET /tickets request")
+        
+        # Get tickets from database
+        response = get_all_tickets()
+        self._send_json(response)
+    
+    # GET /orders
+    @router.route('GET', '/orders', auth='admin')
+    def handle_list_orders(self):
+        print("Processing GET /orders request")
+        
+        # Stream orders from the database; the table grows without bound
+        rows = stream_all_orders()
+        if rows is None:
+            self._send_json({"error": "Database connection failed"}, 500)
             return
-            
-        # M-Pesa transaction status check endpoint
-        elif path.startswith('/mpesa/status/'):
-            checkout_request_id = path.split('/')[3]
-            print(f"Checking M-Pesa transaction status for: {checkout_request_id}")
-            
-            response = check_transaction_status(checkout_request_id)
-            
-            if "error" in response:
-                self._set_response(400)
-                self.wfile.write(json_dumps(response).encode())
-                return
-            
-            self._set_response(200)
-            self.wfile.write(json_dumps(response).encode())
+        self._send_json_stream("orders", rows)
+    
+    # GET /tickets/generate/{id} (generate ticket)
+    @router.route('GET', '/tickets/generate/{booking_id}', auth='user')
+    def handle_generate_ticket(self, booking_id):
+        print(f"Processing generate ticket request for booking {booking_id}")
+        
+        # Generate ticket
+        response = generate_ticket(booking_id, self.headers.get('Authorization', ''))
+        
+        if "error" in response:
+            self._send_json({"error": response["error"]}, 401)
             return
         
-        # Default 404 response
-        self._set_response(404)
-        self.wfile.write(json_dumps({"error": "Resource not found"}).encode())
+        self._send_json(response)
     
-    def do_PUT(self):
-        # Get content length
-        content_length = int(self.headers.get('Content-Length', 0))
+    # Register user
+    @router.route('POST', '/register')
+    def handle_register(self):
+        post_data = self.body
+        if not post_data:
+            self._send_json({"error": "Missing registration data"}, 400)
+            return
         
-        # Parse JSON data
-        post_data = {}
-        if content_length > 0:
-            post_data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+        print(f"Registration data: {post_data}")
         
-        # Process based on path
-        path = self.path
+        # Check required fields
+        required_fields = ['name', 'email', 'password']
+        missing_fields = [field for field in required_fields if field not in post_data]
         
-        # Update artwork (admin only)
-        if path.startswith('/artworks/') and len(path.split('/')) == 3:
-            artwork_id = path.split('/')[2]
-            auth_header = self.headers.get('Authorization', '')
-            
-            response = update_artwork(auth_header, artwork_id, post_data)
-            
-            if "error" in response:
-                error_message = response["error"]
-                
-                if "Authentication" in error_message or "authorized" in error_message:
-                    self._set_response(401)
-                elif "Admin" in error_message:
-                    self._set_response(403)
-                elif "not found" in error_message:
-                    self._set_response(404)
-                else:
-                    self._set_response(400)
-                    
-                self.wfile.write(json_dumps({"error": error_message}).encode())
-                return
-            
-            self._set_response(200)
-            self.wfile.write(json_dumps(response).encode())
+        if missing_fields:
+            self._send_json({"error": f"Missing required fields: {', '.join(missing_fields)}"}, 400)
             return
         
-        # Update exhibition (admin only)
-        elif path.startswith('/exhibitions/') and len(path.split('/')) == 3:
-            exhibition_id = path.split('/')[2]
-            auth_header = self.headers.get('Authorization', '')
-            
-            response = update_exhibition(auth_header, exhibition_id, post_data)
-            
-            if "error" in response:
-                error_message = response["error"]
-                
-                if "Authentication" in error_message or "authorized" in error_message:
-                    self._set_response(401)
-                elif "Admin" in error_message:
-                    self._set_response(403)
-                elif "not found" in error_message:
-                    self._set_response(404)
-                else:
-                    self._set_response(400)
-                    
-                self.wfile.write(json_dumps({"error": error_message}).encode())
-                return
-            
-            self._set_response(200)
-            self.wfile.write(json_dumps(response).encode())
-            return
+        # Register the user
+        response = register_user(
+            post_data['name'], 
+            post_data['email'], 
+            post_data['password'],
+            post_data.get('phone', '')  # Optional field
+        )
         
-        # Default 404 response
-        self._set_response(404)
-        self.wfile.write(json_dumps({"error": "Resource not found"}).encode())
+        self._send_json(response, 400 if "error" in response else 201)
     
-    def do_DELETE(self):
-        # Process based on path
-        path = self.path
+    # User login
+    @router.route('POST', '/login')
+    def handle_login(self):
+        self._login(login_user)
+    
+    # Admin login
+    @router.route('POST', '/admin-login')
+    def handle_admin_login(self):
+        self._login(login_admin)
+    
+    def _login(self, login):
+        post_data = self.body
+        if not post_data:
+            self._send_json({"error": "Missing login data"}, 400)
+            return
         
-        # Delete artwork (admin only)
-        if path.startswith('/artworks/') and len(path.split('/')) == 3:
-            artwork_id = path.split('/')[2]
-            auth_header = self.headers.get('Authorization', '')
-            
-            response = delete_artwork(auth_header, artwork_id)
-            
-            if "error" in response:
-                error_message = response["error"]
-                
-                if "Authentication" in error_message or "authorized" in error_message:
-                    self._set_response(401)
-                elif "Admin" in error_message:
-                    self._set_response(403)
-                elif "not found" in error_message:
-                    self._set_response(404)
-                else:
-                    self._set_response(400)
-                    
-                self.wfile.write(json_dumps({"error": error_message}).encode())
-                return
-            
-            self._set_response(200)
-            self.wfile.write(json_dumps(response).encode())
+        # Check required fields
+        if 'email' not in post_data or 'password' not in post_data:
+            self._send_json({"error": "Email and password required"}, 400)
             return
         
-        # Delete exhibition (admin only)
-        elif path.startswith('/exhibitions/') and len(path.split('/')) == 3:
-            exhibition_id = path.split('/')[2]
-            auth_header = self.headers.get('Authorization', '')
-            
-            response = delete_exhibition(auth_header, exhibition_id)
-            
-            if "error" in response:
-                error_message = response["error"]
-                
-                if "Authentication" in error_message or "authorized" in error_message:
-                    self._set_response(401)
-                elif "Admin" in error_message:
-                    self._set_response(403)
-                elif "not found" in error_message:
-                    self._set_response(404)
-                else:
-                    self._set_response(400)
-                    
-                self.wfile.write(json_dumps({"error": error_message}).encode())
-                return
-            
-            self._set_response(200)
-            self.wfile.write(json_dumps(response).encode())
+        response = login(post_data['email'], post_data['password'])
+        
+        if "error" in response:
+            self._send_json(response, 401)
             return
         
-        # Default 404 response
-        self._set_response(404)
-        self.wfile.write(json_dumps({"error": "Resource not found"}).encode())
-
-def main():
-    """Start the server"""
-    # Initialize the database
-    print("Initializing database...")
-    initialize_database()
+        self._send_json(response)
     
-    # Create uploads directory if it doesn't exist
-    ensure_uploads_directory()
+    # Create artwork
+    @router.route('POST', '/artworks', auth='admin')
+    def handle_create_artwork(self):
+        response = create_artwork(self.headers.get('Authorization', ''), self.body)
+        
+        if "error" in response:
+            self._send_error_for(response["error"])
+            return
+        
+        self._send_json(response, 201)
     
-    # Create default exhibition image
-    create_default_exhibition_image()
+    # Create exhibition
+    @router.route('POST', '/exhibitions', auth='admin')
+    def handle_create_exhibition(self):
+        response = create_exhibition(self.headers.get('Authorization', ''), self.body)
+        
+        if "error" in response:
+            self._send_error_for(response["error"])
+            return
+        
+        self._send_json(response, 201)
     
-    # Create an HTTP server
-    print(f"Starting server on port {PORT}...")
-    httpd = socketserver.ThreadingTCPServer(("", PORT), RequestHandler)
-    print(f"Server running on port {PORT}")
+    # Create contact message
+    @router.route('POST', '/contact')
+    def handle_create_contact_message(self):
+        response = create_contact_message(self.body)
+        
+        self._send_json(response, 400 if "error" in response else 201)
     
-    try:
-        httpd.serve_forever()
-    except KeyboardInterrupt:
-        print("\nShutting down server...")
-    finally:
-        httpd.server_close()
-        print("Server closed")
-
-if __name__ == "__main__":
-    main()
-
-class APIHandler(http.server.SimpleHTTPRequestHandler):
-    def _set_response(self, status_code=200, content_type='application/json'):
-        self.send_response(status_code)
-        self.send_header('Content-type', content_type)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
+    # Update message status
+    @router.route('POST', '/messages/{id:int}', auth='admin')
+    def handle_update_message(self, id):
+        response = update_message(self.headers.get('Authorization', ''), id, self.body)
+        
+        self._send_json(response, 400 if "error" in response else 200)
     
-    def do_OPTIONS(self):
-        self._set_response()
+    # M-Pesa STK Push
+    @router.route('POST', '/mpesa/stk-push')
+    def handle_mpesa_stk_push(self):
+        print("Processing M-Pesa STK Push request")
+        response = handle_stk_push_request(self.body)
+        
+        if "error" in response:
+            self._send_json(response, 400)
+            return
+        
+        self._send_json(response)
     
-    def serve_static_file(self, file_path):
-        """Serve a static file based on its MIME type"""
-        try:
-            # Check if file exists
-            if not os.path.exists(file_path):
-                self.send_response(404)
-                self.end_headers()
-                return
-                
-            # Determine the content type
-            content_type, _ = mimetypes.guess_type(file_path)
-            if not content_type:
-                content_type = 'application/octet-stream'
-                
-            # Get file size
-            file_size = os.path.getsize(file_path)
-            
-            # Set headers
-            self.send_response(200)
-            self.send_header('Content-type', content_type)
-            self.send_header('Content-Length', str(file_size))
-            self.end_headers()
-            
-            # Read and send the file
-            with open(file_path, 'rb') as f:
-                self.wfile.write(f.read())
-                
-        except Exception as e:
-            print(f"Error serving static file: {e}")
-            self.send_response(500)
-            self.end_headers()
+    # M-Pesa callback
+    @router.route('POST', '/mpesa/callback')
+    def handle_mpesa_callback(self):
+        print("Processing M-Pesa callback")
+        response = handle_mpesa_callback(self.body)
+        
+        if "error" in response:
+            self._send_json(response, 400)
+            return
+        
+        self._send_json(response)
     
-    def do_GET(self):
-        parsed_url = urllib.parse.urlparse(self.path)
-        path = parsed_url.path
+    # M-Pesa transaction status check
+    @router.route('POST', '/mpesa/status/{checkout_request_id}')
+    def handle_mpesa_status(self, checkout_request_id):
+        print(f"Checking M-Pesa transaction status for: {checkout_request_id}")
         
-        # Handle static files (images, CSS, JS, etc.)
-        if path.startswith('/static/'):
-            file_path = os.path.join(os.path.dirname(__file__), path[1:])
-            # Debugging info
-            print(f"Serving static file: {file_path}")
-            self.serve_static_file(file_path)
+        response = check_transaction_status(checkout_request_id)
+        
+        if "error" in response:
+            self._send_json(response, 400)
             return
         
-        # Handle API endpoints
-        # Handle GET /artworks
-        if path == '/artworks':
-            response = get_all_artworks()
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
+        self._send_json(response)
+    
+    # Update artwork
+    @router.route('PUT', '/artworks/{id:int}', auth='admin')
+    def handle_update_artwork(self, id):
+        response = update_artwork(self.headers.get('Authorization', ''), id, self.body)
+        
+        if "error" in response:
+            self._send_error_for(response["error"])
             return
         
-        # Handle GET /artworks/{id}
-        elif path.startswith('/artworks/') and len(path.split('/')) == 3:
-            artwork_id = path.split('/')[2]
-            response = get_artwork(artwork_id)
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
+        self._send_json(response)
+    
+    # Update exhibition
+    @router.route('PUT', '/exhibitions/{id:int}', auth='admin')
+    def handle_update_exhibition(self, id):
+        response = update_exhibition(self.headers.get('Authorization', ''), id, self.body)
+        
+        if "error" in response:
+            self._send_error_for(response["error"])
             return
         
-        # Handle GET /exhibitions
-        elif path == '/exhibitions':
-            response = get_all_exhibitions()
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
+        self._send_json(response)
+    
+    # Delete artwork
+    @router.route('DELETE', '/artworks/{id:int}', auth='admin')
+    def handle_delete_artwork(self, id):
+        response = delete_artwork(self.headers.get('Authorization', ''), id)
+        
+        if "error" in response:
+            self._send_error_for(response["error"])
             return
         
-        # Handle GET /exhibitions/{id}
-        elif path.startswith('/exhibitions/') and len(path.split('/')) == 3:
-            exhibition_id = path.split('/')[2]
-            response = get_exhibition(exhibition_id)
-            self._set_response()
-            self.wfile.write(json_dumps(response).encode())
+        self._send_json(response)
+    
+    # Delete exhibition
+    @router.route('DELETE', '/exhibitions/{id:int}', auth='admin')
+    def handle_delete_exhibition(self, id):
+        response = delete_exhibition(self.headers.get('Authorization', ''), id)
+        
+        if "error" in response:
+            self._send_error_for(response["error"])
             return
         
-        # Handle GET /messages (admin only)
-        elif path == '/messages':
-            print("Processing GET /messages request")
-            auth_header = self.headers.get('Authorization', '')
-            print(f"Authorization header: {auth_header[:20]}... (truncated)")
-            
-            # Get messages
-            response = get_messages(auth_header)
-            print(f"Get messages response: {response}")
-            
-            if "error" in response:
-                self._set_response(401)
-                self.wfile.write(json_dumps({"error": response
+        self._send_json(response)
+
+
+def serve(reuse_port=False):
+    """Run one HTTP server until SIGTERM or Ctrl+C, then finish in-flight requests"""
+    httpd = create_server(("", PORT), RequestHandler, reuse_port=reuse_port)
+    warm_pool()
+    if isinstance(httpd, WorkerPoolServer):
+        print(f"Server running on port {PORT} ({SERVER_THREADS} worker threads, queue depth {SERVER_QUEUE_DEPTH})")
+    elif SERVER_MODE == 'asyncio':
+        print(f"Server running on port {PORT} (asyncio, {SERVER_THREADS} handler threads)")
+    else:
+        print(f"Server running on port {PORT}")
+    
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever() to return, so it can't run
+        # on the thread that is inside serve_forever()
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, stop)
+    
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down server...")
+    finally:
+        httpd.server_close()
+        print(f"Server closed (pid {os.getpid()})")
+
+def main():
+    """Start the server"""
+    parser = argparse.ArgumentParser(description="AfriArt API server")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SERVER_WORKERS', 1)),
+                        help="number of worker processes sharing the port (default 1)")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    
+    # Make sure the database schema is current (applies pending migrations)
+    print("Checking database schema...")
+    ensure_schema()
+    
+    # Create uploads directory if it doesn't exist
+    ensure_uploads_directory()
+    
+    # Create default exhibition image
+    create_default_exhibition_image()
+    
+    # Create an HTTP server
+    print(f"Starting server on port {PORT}...")
+    if args.workers == 1:
+        serve()
+        return
+    
+    # Workers open their own database connections
+    close_pool()
+    run_prefork(args.workers, lambda: serve(reuse_port=True))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import os
+import threading
+
+# Request coalescing for cache misses.
+#
+# When a hot cached response is missing (first request, or a write just
+# evicted it), every concurrent request for it would run the same queries
+# and serialization. SingleFlight lets the first one (the leader) compute the
+# result while the others wait for it and share it. A waiter gives up after
+# SINGLE_FLIGHT_TIMEOUT seconds and computes the result itself, so one stuck
+# request can't hold up the rest indefinitely.
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', 10))
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Run at most one computation per key at a time; callers of the same key share it"""
+
+    def __init__(self, timeout=SINGLE_FLIGHT_TIMEOUT):
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+        self.timeouts = 0
+
+    def run(self, key, compute):
+        """Return (compute() result, shared), shared being True for a waiter.
+
+        An exception raised by the leader's compute() is raised in the
+        waiters too.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                with self._lock:
+                    self.timeouts += 1
+                return compute(), False
+            with self._lock:
+                self.shared += 1
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = compute()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'inFlight': len(self._calls),
+                'leaders': self.leaders,
+                'shared': self.shared,
+                'timeouts': self.timeouts,
+            }
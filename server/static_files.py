@@ -0,0 +1,96 @@
+from email.utils import parsedate_to_datetime
+
+# Static file helpers: byte ranges, validators and copying a file to the
+# client.
+#
+# Files go to the socket with sendfile(), so their contents move from the
+# page cache to the connection without being read into Python. Where the
+# response doesn't go straight to a socket (asyncio mode) they are copied
+# CHUNK_SIZE bytes at a time. Either way memory use doesn't depend on the
+# size of the file.
+
+# Bytes read per write when a file is copied instead of sent with sendfile()
+CHUNK_SIZE = 64 * 1024
+
+class RangeNotSatisfiable(Exception):
+    """The Range header asks only for bytes past the end of the file (416)"""
+    pass
+
+def parse_range(header, size):
+    """Byte range requested by a Range header, as (first, last) inclusive.
+
+    Returns None when the whole file should be sent: no header, or one this
+    server ignores (another unit, several ranges, malformed), as HTTP allows.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash or not (first.isdigit() or first == '') or not (last.isdigit() or last == ''):
+        return None
+    if first == '':
+        # Suffix range: the last N bytes
+        if last == '':
+            return None
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    first = int(first)
+    last = int(last) if last else None
+    if last is not None and first > last:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable()
+    if last is None or last >= size:
+        last = size - 1
+    return first, last
+
+def _http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def not_modified(headers, etag, modified):
+    """True if the client's cached copy (If-None-Match / If-Modified-Since) is current"""
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or 'W/' + etag in tags
+    since = _http_date(headers.get('If-Modified-Since'))
+    return since is not None and int(modified) <= since
+
+def range_applies(headers, etag, modified):
+    """False if an If-Range validator no longer matches (send the whole file)"""
+    if_range = headers.get('If-Range')
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return if_range == etag
+    return _http_date(if_range) == int(modified)
+
+def send_file(f, offset, count, wfile, sock=None):
+    """Write count bytes of the open file f, starting at offset, to the client.
+
+    sock is the client's socket when the response can be written to it
+    directly (whatever wfile buffered must already be flushed).
+    """
+    if sock is not None:
+        # socket.sendfile() uses os.sendfile() and falls back to a send() loop
+        sent = sock.sendfile(f, offset, count)
+    else:
+        f.seek(offset)
+        sent = 0
+        while sent < count:
+            chunk = f.read(min(CHUNK_SIZE, count - sent))
+            if not chunk:
+                break
+            wfile.write(chunk)
+            sent += len(chunk)
+    if sent < count:
+        # The file shrank; the response is shorter than its Content-Length
+        raise OSError(f"Sent {sent} of {count} bytes, file was truncated")
@@ -0,0 +1,87 @@
+import os
+import mmap
+import time
+import struct
+import binascii
+import multiprocessing
+from database import on_commit
+
+# Version counters for the catalogue tables.
+#
+# Every committed create/update/delete on a table bumps its counter, so
+# "artworks is at version N" identifies the table's contents without a
+# query. Conditional GETs build their ETag from it, and caches compare it to
+# tell stale entries.
+#
+# The counters live in an anonymous shared mapping created at import, before
+# `--workers` forks, so all worker processes of one server see the same
+# versions. EPOCH changes on every server start, so ETags handed out by an
+# earlier run (whose counters started from zero too) never match. Writes
+# made outside the API (by hand in SQL) are not seen.
+#
+# A change is pending from the moment its version is taken until the
+# listeners (cache invalidation) have run. settled() tells caches shared
+# between processes whether they can be trusted for a table yet.
+TABLES = ('artworks', 'exhibitions')
+
+# A pending change older than this is taken as done; the process making it
+# may have died before it could say so
+SETTLE_TIMEOUT = 5
+
+EPOCH = binascii.hexlify(os.urandom(4)).decode()
+
+# Per table: version, last-modified time (float seconds) and changes pending
+_SLOT = struct.Struct('QdQ')
+_shared = mmap.mmap(-1, _SLOT.size * len(TABLES))
+_lock = multiprocessing.Lock()
+_index = {table: i * _SLOT.size for i, table in enumerate(TABLES)}
+_listeners = []
+
+_started = time.time()
+for _offset in _index.values():
+    _SLOT.pack_into(_shared, _offset, 0, _started, 0)
+
+def version(table):
+    return _SLOT.unpack_from(_shared, _index[table])[0]
+
+def last_modified(table):
+    return _SLOT.unpack_from(_shared, _index[table])[1]
+
+def settled(table):
+    """True when every change to table has been fully applied"""
+    _, modified, pending = _SLOT.unpack_from(_shared, _index[table])
+    return pending == 0 or time.time() - modified > SETTLE_TIMEOUT
+
+def add_listener(callback):
+    """Call callback(table, row_id, new_version) after every change made by this process"""
+    _listeners.append(callback)
+
+def changed(table, row_id=None):
+    """Record a write to table; takes effect when the transaction commits.
+
+    row_id is the changed row when known (None for several rows).
+    """
+    if table not in _index:
+        raise ValueError(f"No version counter for table {table}")
+    on_commit(lambda: _bump(table, row_id))
+
+def _bump(table, row_id):
+    offset = _index[table]
+    with _lock:
+        current, _, pending = _SLOT.unpack_from(_shared, offset)
+        _SLOT.pack_into(_shared, offset, current + 1, time.time(), pending + 1)
+    try:
+        for callback in _listeners:
+            callback(table, row_id, current + 1)
+    finally:
+        with _lock:
+            current, modified, pending = _SLOT.unpack_from(_shared, offset)
+            _SLOT.pack_into(_shared, offset, current, modified, max(pending - 1, 0))
+
+def etag_for(tables, key=''):
+    """Strong ETag for a response built from tables at their current versions.
+
+    key distinguishes representations that share the tables (encoding, etc.).
+    """
+    versions = '.'.join(str(version(table)) for table in tables)
+    return f'"{EPOCH}-{versions}{"-" + key if key else ""}"'
@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+# Tests run against a throwaway SQLite database unless DB_BACKEND says
+# otherwise (e.g. DB_BACKEND=mysql to check the MySQL query plans). Set
+# before the server modules are imported, which read it at import time.
+os.environ.setdefault('DB_BACKEND', 'sqlite')
+os.environ.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(prefix='afriart-tests-'), 'test.sqlite3'))
+
+# On MySQL the tests migrate and write to the database named here, never the
+# one in DB_CONFIG; without it the database tests are skipped
+TEST_DB_NAME = os.environ.get('TEST_DB_NAME')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+LIVE_DB_NAME = database.DB_CONFIG['database']
+if database.DB_BACKEND == 'mysql' and TEST_DB_NAME:
+    database.DB_CONFIG['database'] = TEST_DB_NAME
+
+@pytest.fixture(scope='session')
+def test_database():
+    """Migrate the test database, skipping if there is none to use"""
+    if database.DB_BACKEND == 'mysql' and TEST_DB_NAME in (None, LIVE_DB_NAME):
+        pytest.skip("set TEST_DB_NAME to a MySQL database other than the configured one")
+    from migrate import ensure_schema
+    if not ensure_schema():
+        pytest.skip("database not available")
+
+@pytest.fixture
+def start_server(test_database):
+    """start_server(**options) runs a WorkerPoolServer with the app's handler on a free port"""
+    from server import RequestHandler
+    from worker_server import WorkerPoolServer
+    servers = []
+
+    def start(**options):
+        httpd = WorkerPoolServer(("127.0.0.1", 0), RequestHandler, **options)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        servers.append((httpd, thread))
+        return httpd
+
+    yield start
+    for httpd, thread in servers:
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join()
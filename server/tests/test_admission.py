@@ -0,0 +1,54 @@
+import socket
+import time
+
+def _wait_for_queued(httpd, count, timeout=2):
+    deadline = time.monotonic() + timeout
+    while httpd.stats()['queued'] != count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return httpd.stats()['queued']
+
+def test_full_queue_gets_503_with_retry_after(start_server):
+    httpd = start_server(threads=1, queue_depth=1, retry_after=7)
+    address = httpd.server_address
+
+    # The only worker waits for a body that doesn't come...
+    busy = socket.create_connection(address, timeout=5)
+    busy.sendall(b"POST /contact HTTP/1.1\r\nHost: test\r\nContent-Type: application/json\r\n"
+                 b"Content-Length: 100\r\n\r\n")
+    waiting = None
+    try:
+        # (a connection is only served once it has sent something; until
+        # then it waits with the idle connections)
+        time.sleep(0.2)
+        assert httpd.stats()['idle'] == 0
+        # ...and the next connection fills the queue
+        waiting = socket.create_connection(address, timeout=5)
+        assert _wait_for_queued(httpd, 1) == 1
+
+        rejected = socket.create_connection(address, timeout=5)
+        started = time.monotonic()
+        try:
+            rejected.sendall(b"GET /artworks HTTP/1.1\r\nHost: test\r\n\r\n")
+            response = b""
+            while True:
+                data = rejected.recv(65536)
+                if not data:
+                    break
+                response += data
+        finally:
+            rejected.close()
+        elapsed = time.monotonic() - started
+
+        head, _, body = response.partition(b"\r\n\r\n")
+        lines = head.split(b"\r\n")
+        assert lines[0] == b"HTTP/1.1 503 Service Unavailable"
+        assert b"Retry-After: 7" in lines
+        assert b"Connection: close" in lines
+        assert b"error" in body
+        # Answered and closed at once, not after waiting for the worker
+        assert elapsed < 1
+        assert httpd.stats()['rejected'] == 1
+    finally:
+        busy.close()
+        if waiting is not None:
+            waiting.close()
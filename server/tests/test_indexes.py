@@ -0,0 +1,19 @@
+import pytest
+from check_indexes import hot_queries, explain_problems
+from database import get_db_connection
+
+HOT_QUERIES = hot_queries()
+
+@pytest.fixture(scope='module')
+def cursor(test_database):
+    connection = get_db_connection()
+    if connection is None:
+        pytest.skip("database not available")
+    cursor = connection.cursor()
+    yield cursor
+    cursor.close()
+    connection.close()
+
+@pytest.mark.parametrize('name, query, params, options', HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_an_index(cursor, name, query, params, options):
+    assert explain_problems(cursor, query, params, **options) == []
@@ -0,0 +1,72 @@
+import http.client
+import time
+
+import server
+
+THREADS = 2
+IDLE_CONNECTIONS = 8
+
+def _get(connection, path="/artworks"):
+    connection.request("GET", path)
+    response = connection.getresponse()
+    body = response.read()
+    assert response.getheader('Content-Length') == str(len(body))
+    return response.status, response.getheader('Connection')
+
+def _wait_for_idle(httpd, count, timeout=2):
+    deadline = time.monotonic() + timeout
+    while httpd.stats()['idle'] != count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return httpd.stats()['idle']
+
+def test_idle_connections_do_not_hold_workers(start_server):
+    # Room in the queue for the request in flight and one more, far fewer
+    # than the idle connections: pinned workers would show up as 503s
+    httpd = start_server(threads=THREADS, queue_depth=2)
+    port = httpd.server_address[1]
+    idle = [http.client.HTTPConnection("127.0.0.1", port, timeout=5) for _ in range(IDLE_CONNECTIONS)]
+    try:
+        for connection in idle:
+            assert _get(connection) == (200, None)
+        assert _wait_for_idle(httpd, IDLE_CONNECTIONS) == IDLE_CONNECTIONS
+
+        fresh = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        started = time.monotonic()
+        status = _get(fresh)[0]
+        elapsed = time.monotonic() - started
+        fresh.close()
+        assert status == 200
+        assert elapsed < 1
+
+        # The parked connections are still served when they send again
+        for connection in idle:
+            assert _get(connection) == (200, None)
+        assert httpd.stats()['rejected'] == 0
+    finally:
+        for connection in idle:
+            connection.close()
+
+def test_idle_connection_is_closed_after_timeout(start_server, monkeypatch):
+    monkeypatch.setattr(server.RequestHandler, 'timeout', 0.5)
+    httpd = start_server(threads=THREADS)
+    connection = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+    try:
+        assert _get(connection) == (200, None)
+        started = time.monotonic()
+        assert connection.sock.recv(1) == b""
+        assert time.monotonic() - started < 2
+    finally:
+        connection.close()
+    assert _wait_for_idle(httpd, 0) == 0
+
+def test_connection_is_closed_after_max_requests(start_server, monkeypatch):
+    monkeypatch.setattr(server, 'HTTP_MAX_REQUESTS_PER_CONNECTION', 3)
+    httpd = start_server(threads=THREADS)
+    connection = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+    try:
+        assert _get(connection) == (200, None)
+        assert _get(connection) == (200, None)
+        assert _get(connection) == (200, 'close')
+        assert connection.sock is None
+    finally:
+        connection.close()
@@ -0,0 +1,64 @@
+import http.client
+import json
+
+from database import get_db_connection
+
+def _get(port, path, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.headers, response.read()
+    finally:
+        connection.close()
+
+def test_error_response_has_no_validators(start_server):
+    port = start_server().server_address[1]
+
+    status, headers, body = _get(port, "/artworks/999999")
+    assert status == 200
+    assert "error" in json.loads(body)
+    assert headers["ETag"] is None
+    assert headers["Last-Modified"] is None
+
+    # Neither a tag the table's other responses carry nor * turns it into a 304
+    _, listing_headers, _ = _get(port, "/artworks")
+    for tag in (listing_headers["ETag"], "*"):
+        status, headers, body = _get(port, "/artworks/999999", {"If-None-Match": tag})
+        assert status == 200
+        assert headers["ETag"] is None
+        assert "error" in json.loads(body)
+
+def test_small_body_is_tagged_as_sent_uncompressed(start_server):
+    port = start_server().server_address[1]
+
+    _, plain, _ = _get(port, "/artworks?limit=1")
+    _, negotiated, _ = _get(port, "/artworks?limit=1", {"Accept-Encoding": "gzip"})
+    assert negotiated["Content-Encoding"] is None
+    assert negotiated["ETag"] == plain["ETag"]
+
+    status, _, body = _get(port, "/artworks?limit=1", {"Accept-Encoding": "gzip", "If-None-Match": plain["ETag"]})
+    assert status == 304
+    assert body == b""
+
+def test_compressed_body_has_its_own_tag(start_server):
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    for index in range(40):
+        cursor.execute("INSERT INTO artworks (title, artist, description, price) VALUES (%s, %s, %s, %s)",
+                       (f"Artwork {index}", "Artist", "A description long enough to fill the page " * 2, 100))
+    connection.commit()
+    cursor.close()
+    connection.close()
+    port = start_server().server_address[1]
+
+    _, plain, _ = _get(port, "/artworks?limit=40")
+    _, compressed, _ = _get(port, "/artworks?limit=40", {"Accept-Encoding": "gzip"})
+    assert plain["Content-Encoding"] is None
+    assert compressed["Content-Encoding"] == "gzip"
+    assert compressed["ETag"] != plain["ETag"]
+
+    status, _, _ = _get(port, "/artworks?limit=40", {"Accept-Encoding": "gzip", "If-None-Match": compressed["ETag"]})
+    assert status == 304
+    status, _, _ = _get(port, "/artworks?limit=40", {"Accept-Encoding": "gzip", "If-None-Match": plain["ETag"]})
+    assert status == 200
@@ -0,0 +1,290 @@
+import os
+import time
+import queue
+import socket
+import selectors
+import socketserver
+import threading
+
+# HTTP server with a fixed pool of worker threads.
+#
+# socketserver.ThreadingTCPServer starts a thread per connection, so a burst
+# of traffic turns into hundreds of threads all checking out database
+# connections at once. Here the accept loop hands connections to a bounded
+# queue served by SERVER_THREADS workers. When SERVER_QUEUE_DEPTH connections
+# are already waiting, new ones are answered at once with 503 and Retry-After
+# instead of piling up behind the others.
+#
+# Kept-alive connections don't hold a worker between requests. Once a
+# worker has answered everything a client sent, it parks the connection with
+# an idle watcher thread that selects on all parked connections. A
+# connection that becomes readable goes back through the queue, and gets
+# the 503 if the queue is full. One left idle for the handler's timeout
+# (HTTP_KEEPALIVE_TIMEOUT) is closed.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'pool')  # 'pool', 'asyncio' or 'threading'
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 16))
+SERVER_QUEUE_DEPTH = int(os.environ.get('SERVER_QUEUE_DEPTH', 64))
+SERVER_RETRY_AFTER = int(os.environ.get('SERVER_RETRY_AFTER', 1))
+
+_OVERLOADED_BODY = b'{"error":"Server busy, please retry"}'
+
+def overloaded_response(retry_after):
+    return (
+        b'HTTP/1.1 503 Service Unavailable\r\n'
+        b'Content-Type: application/json\r\n'
+        b'Access-Control-Allow-Origin: *\r\n'
+        b'Retry-After: %d\r\n'
+        b'Content-Length: %d\r\n'
+        b'Connection: close\r\n'
+        b'\r\n' % (retry_after, len(_OVERLOADED_BODY))
+    ) + _OVERLOADED_BODY
+
+class WorkerPoolServer(socketserver.TCPServer):
+    """TCPServer that serves connections from a fixed set of worker threads
+
+    threads:     number of worker threads
+    queue_depth: accepted connections allowed to wait for a worker
+    retry_after: seconds sent in Retry-After when a connection is turned away
+    """
+
+    allow_reuse_address = True
+    # Listen backlog; connections beyond the queue are refused by the kernel
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, threads=SERVER_THREADS,
+                 queue_depth=SERVER_QUEUE_DEPTH, retry_after=SERVER_RETRY_AFTER,
+                 bind_and_activate=True):
+        if threads < 1:
+            raise ValueError("threads must be at least 1")
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self.retry_after = retry_after
+        # Connections (request, client_address) and resumed handlers waiting for a worker
+        self._queue = queue.Queue(maxsize=max(queue_depth, 1))
+        self._stats_lock = threading.Lock()
+        self.served = 0
+        self.rejected = 0
+        # Idle connections: handler -> deadline, watched by _watch_idle()
+        self._selector = selectors.DefaultSelector()
+        self._idle = {}
+        self._to_park = []
+        self._idle_lock = threading.Lock()
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ)
+        self._closing = False
+        self._watcher = threading.Thread(target=self._watch_idle, name="http-idle-watcher", daemon=True)
+        self._watcher.start()
+        self._workers = []
+        for index in range(threads):
+            worker = threading.Thread(target=self._work, name=f"http-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def process_request(self, request, client_address):
+        """Queue the connection for a worker, or turn it away if the queue is full"""
+        self._enqueue((request, client_address), request)
+
+    def _enqueue(self, item, request):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.reject_request(request)
+            if not isinstance(item, tuple):
+                self._close_handler(item, shutdown=False)
+
+    def reject_request(self, request):
+        with self._stats_lock:
+            self.rejected += 1
+        try:
+            request.setblocking(False)
+            # Read whatever the client already sent so closing doesn't reset
+            # the connection before it sees the 503
+            try:
+                request.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                pass
+            request.sendall(overloaded_response(self.retry_after))
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(request)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, tuple):
+                handler = self._open_handler(*item)
+                if handler is None:
+                    continue
+                readable = False
+            else:
+                # Resumed by the idle watcher, which saw it readable
+                handler, readable = item, True
+            try:
+                park = self._serve(handler, readable)
+            except Exception:
+                self.handle_error(handler.request, handler.client_address)
+                park = False
+            if park:
+                self._park(handler)
+            else:
+                self._close_handler(handler)
+
+    def _open_handler(self, request, client_address):
+        # The handler is set up here and its requests are served one by one
+        # (_serve), instead of through its constructor, which serves the
+        # whole connection before returning
+        handler = self.RequestHandlerClass.__new__(self.RequestHandlerClass)
+        handler.request = request
+        handler.client_address = client_address
+        handler.server = self
+        try:
+            handler.setup()
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            return None
+        handler.close_connection = True
+        return handler
+
+    def _serve(self, handler, readable):
+        """Answer the requests a connection has sent; True if it should be parked"""
+        while readable or self._has_input(handler):
+            readable = False
+            handler.handle_one_request()
+            if handler.close_connection:
+                return False
+        return not self._closing
+
+    @staticmethod
+    def _has_input(handler):
+        # Without blocking: is part of a request buffered or readable? Only
+        # once the client has sent everything is the connection parked, so
+        # pipelined requests buffered in rfile aren't stranded. (EOF reads
+        # as nothing too; the watcher then finds the connection readable.)
+        sock = handler.connection
+        sock.setblocking(False)
+        try:
+            return bool(handler.rfile.peek(1))
+        except OSError:
+            return True  # Let the handler read the error
+        finally:
+            sock.settimeout(handler.timeout)
+
+    def _park(self, handler):
+        deadline = time.monotonic() + handler.timeout if handler.timeout else None
+        with self._idle_lock:
+            self._to_park.append((handler, deadline))
+        self._wakeup()
+
+    def _wakeup(self):
+        try:
+            self._wakeup_send.send(b'\0')
+        except OSError:
+            pass
+
+    def _watch_idle(self):
+        while True:
+            with self._idle_lock:
+                to_park, self._to_park = self._to_park, []
+                closing = self._closing
+            if closing:
+                for handler, _ in to_park:
+                    self._close_handler(handler)
+                for handler in list(self._idle):
+                    self._selector.unregister(handler.connection)
+                    self._close_handler(handler)
+                self._idle.clear()
+                return
+            for handler, deadline in to_park:
+                self._selector.register(handler.connection, selectors.EVENT_READ, handler)
+                self._idle[handler] = deadline
+
+            deadlines = [deadline for deadline in self._idle.values() if deadline is not None]
+            timeout = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj is self._wakeup_recv:
+                    try:
+                        while self._wakeup_recv.recv(4096):
+                            pass
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                    continue
+                # A request (or EOF) arrived: back to a worker
+                handler = key.data
+                self._selector.unregister(key.fileobj)
+                del self._idle[handler]
+                self._enqueue(handler, handler.request)
+
+            now = time.monotonic()
+            for handler, deadline in list(self._idle.items()):
+                if deadline is not None and deadline <= now:
+                    self._selector.unregister(handler.connection)
+                    del self._idle[handler]
+                    self._close_handler(handler)
+
+    def _close_handler(self, handler, shutdown=True):
+        try:
+            handler.finish()
+        except Exception:
+            pass
+        if shutdown:
+            self.shutdown_request(handler.request)
+        with self._stats_lock:
+            self.served += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'threads': len(self._workers),
+                'queued': self._queue.qsize(),
+                'queue_depth': self._queue.maxsize,
+                'idle': len(self._idle),
+                'served': self.served,
+                'rejected': self.rejected,
+            }
+
+    def server_close(self):
+        super().server_close()
+        # Let workers finish what is queued, then stop them
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+        # Close the connections still parked
+        with self._idle_lock:
+            self._closing = True
+        self._wakeup()
+        self._watcher.join(timeout=5)
+        self._selector.close()
+        self._wakeup_recv.close()
+        self._wakeup_send.close()
+
+def create_server(server_address, handler_class, reuse_port=False):
+    """HTTP server for SERVER_MODE.
+
+    With reuse_port the socket is bound with SO_REUSEPORT, so several
+    processes can listen on the same port and the kernel spreads incoming
+    connections across them (see prefork.py).
+    """
+    if SERVER_MODE == 'asyncio':
+        from async_server import AsyncHTTPServer
+        return AsyncHTTPServer(server_address, handler_class, reuse_port=reuse_port)
+    if SERVER_MODE == 'threading':
+        server = socketserver.ThreadingTCPServer(server_address, handler_class, bind_and_activate=False)
+    elif SERVER_MODE == 'pool':
+        server = WorkerPoolServer(server_address, handler_class, bind_and_activate=False)
+    else:
+        raise ValueError("SERVER_MODE must be 'pool', 'asyncio' or 'threading'")
+    
+    try:
+        if reuse_port:
+            server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server.server_bind()
+        server.server_activate()
+    except BaseException:
+        server.server_close()
+        raise
+    return server
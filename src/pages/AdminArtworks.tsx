@@ -1,6 +1,6 @@
 
 import React, { useState, useEffect } from 'react';
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { getAllArtworks, createArtwork, updateArtwork, deleteArtwork, ArtworkData } from '@/services/api';
 import { createImageSrc, handleImageError } from '@/utils/imageUtils';
 import { Button } from "@/components/ui/button";
@@ -78,16 +78,19 @@ const AdminArtworks = () => {
   const [artworkToDelete, setArtworkToDelete] = useState<ArtworkData | null>(null);
   const [offlineMode, setOfflineMode] = useState(false);
   
-  // Fetch all artworks - using valid options for this version of react-query
-  const { data, isLoading, error } = useQuery({
+  // Fetch artworks a page at a time; "Load more" fetches the next one
+  const { data, isLoading, error, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
     queryKey: ['artworks'],
-    queryFn: getAllArtworks
+    queryFn: ({ pageParam }) => getAllArtworks(pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next ?? undefined,
   });
+  const artworks: ArtworkData[] = data ? data.pages.flatMap((page) => page.artworks) : [];
 
   // Handle success/error effects separately
   useEffect(() => {
     if (data) {
-      console.log("Successfully fetched artworks:", data);
+      console.log("Successfully fetched artworks:", artworks.length);
     }
   }, [data]);
 
@@ -219,8 +222,8 @@ const AdminArtworks = () => {
   useEffect(() => {
     if (data) {
       console.log("Artworks data received:", data);
-      // Check image URLs
-      data.forEach((artwork: ArtworkData) => {
+      // Check image URLs of the newest page
+      data.pages[data.pages.length - 1].artworks.forEach((artwork: ArtworkData) => {
         const processedUrl = createImageSrc(artwork.imageUrl);
         console.log(`Artwork: ${artwork.title}, Original URL: ${artwork.imageUrl}, Processed URL: ${processedUrl}`);
       });
@@ -228,7 +231,7 @@ const AdminArtworks = () => {
   }, [data]);
 
   // Determine which artworks to display (real or mock)
-  const artworksToDisplay = offlineMode ? mockArtworks : (data || []);
+  const artworksToDisplay = offlineMode ? mockArtworks : artworks;
 
   if (isLoading) {
     return (
@@ -325,6 +328,14 @@ const AdminArtworks = () => {
         </div>
       </Card>
 
+      {!offlineMode && hasNextPage && (
+        <div className="flex justify-center mt-6">
+          <Button variant="outline" onClick={() => fetchNextPage()} disabled={isFetchingNextPage}>
+            {isFetchingNextPage ? "Loading..." : "Load more artworks"}
+          </Button>
+        </div>
+      )}
+
       {/* Artwork Form Dialog */}
       <Dialog open={isDialogOpen} onOpenChange={setIsDialogOpen}>
         <DialogContent className="sm:max-w-[600px] max-h-[90vh] overflow-y-auto">
@@ -1,6 +1,6 @@
 
 import React, { useState } from 'react';
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { getAllExhibitions, createExhibition, updateExhibition, deleteExhibition, ExhibitionData } from '@/services/api';
 import { Button } from "@/components/ui/button";
 import { Card } from "@/components/ui/card";
@@ -37,10 +37,12 @@ const AdminExhibitions = () => {
   const [selectedExhibition, setSelectedExhibition] = useState<ExhibitionData | null>(null);
   const [exhibitionToDelete, setExhibitionToDelete] = useState<ExhibitionData | null>(null);
   
-  // Fetch all exhibitions
-  const { data, isLoading, error } = useQuery({
+  // Fetch exhibitions a page at a time; "Load more" fetches the next one
+  const { data, isLoading, error, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
     queryKey: ['exhibitions'],
-    queryFn: getAllExhibitions,
+    queryFn: ({ pageParam }) => getAllExhibitions(pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next ?? undefined,
   });
 
   // Create exhibition mutation
@@ -201,7 +203,7 @@ const AdminExhibitions = () => {
     );
   }
 
-  const exhibitions = data || [];
+  const exhibitions: ExhibitionData[] = data ? data.pages.flatMap((page) => page.exhibitions) : [];
   console.log("Rendered exhibitions:", exhibitions);
 
   return (
@@ -284,6 +286,14 @@ const AdminExhibitions = () => {
         </div>
       </Card>
 
+      {hasNextPage && (
+        <div className="flex justify-center mt-6">
+          <Button variant="outline" onClick={() => fetchNextPage()} disabled={isFetchingNextPage}>
+            {isFetchingNextPage ? "Loading..." : "Load more exhibitions"}
+          </Button>
+        </div>
+      )}
+
       {/* Exhibition Form Dialog */}
       <Dialog open={isDialogOpen} onOpenChange={setIsDialogOpen}>
         <DialogContent className="sm:max-w-[600px] max-h-[90vh] overflow-y-auto">
@@ -1,8 +1,8 @@
 
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
-import { isAdmin, getAllContactMessages, updateMessageStatus } from '@/services/api';
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { isAdmin, getAllContactMessages, getUnreadMessageCount, updateMessageStatus } from '@/services/api';
 import { Badge } from "@/components/ui/badge";
 import { Button } from "@/components/ui/button";
 import { Card } from "@/components/ui/card";
@@ -28,6 +28,10 @@ interface Message {
   source?: 'contact_form' | 'chat_bot';
 }
 
+type StatusFilter = 'all' | 'new' | 'read' | 'replied';
+
+const STATUS_FILTERS: StatusFilter[] = ['all', 'new', 'read', 'replied'];
+
 const getStatusColor = (status: string) => {
   switch (status) {
     case 'new':
@@ -56,6 +60,7 @@ const AdminMessages = () => {
   const queryClient = useQueryClient();
   const { toast } = useToast();
   const [selectedMessage, setSelectedMessage] = useState<Message | null>(null);
+  const [statusFilter, setStatusFilter] = useState<StatusFilter>('all');
 
   // Check if user is an admin
   useEffect(() => {
@@ -72,13 +77,14 @@ const AdminMessages = () => {
     checkAdmin();
   }, [navigate]);
 
-  // Fetch all contact messages
-  const { data, isLoading, error, refetch } = useQuery({
-    queryKey: ['contactMessages'],
-    queryFn: async () => {
+  // Fetch the inbox a page at a time, filtered by status on the server;
+  // "Load more" fetches the next page
+  const { data, isLoading, error, refetch, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
+    queryKey: ['contactMessages', statusFilter],
+    queryFn: async ({ pageParam }) => {
       console.log('Fetching contact messages');
       try {
-        const result = await getAllContactMessages();
+        const result = await getAllContactMessages(pageParam, statusFilter === 'all' ? undefined : statusFilter);
         console.log('Messages fetched:', result);
         return result;
       } catch (err) {
@@ -86,16 +92,28 @@ const AdminMessages = () => {
         throw err;
       }
     },
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next ?? undefined,
     refetchOnWindowFocus: true,
     refetchInterval: 30000, // Refetch every 30 seconds
   });
 
+  // Unread badge, counted by the server rather than from the loaded pages
+  const { data: unreadData, refetch: refetchUnread } = useQuery({
+    queryKey: ['unreadMessageCount'],
+    queryFn: getUnreadMessageCount,
+    refetchOnWindowFocus: true,
+    refetchInterval: 30000,
+  });
+  const unreadCount: number = unreadData?.unread ?? 0;
+
   // Mutation for updating message status
   const updateStatusMutation = useMutation({
     mutationFn: ({ id, status }: { id: string, status: 'new' | 'read' | 'replied' }) => 
       updateMessageStatus(id, status),
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['contactMessages'] });
+      queryClient.invalidateQueries({ queryKey: ['unreadMessageCount'] });
       refetch(); // Explicitly refetch after successful update
       toast({
         title: "Status updated",
@@ -147,7 +165,7 @@ const AdminMessages = () => {
     );
   }
 
-  const messages = data?.messages || [];
+  const messages: Message[] = data ? data.pages.flatMap((page) => page.messages || []) : [];
   console.log('Rendering messages:', messages);
 
   return (
@@ -157,8 +175,24 @@ const AdminMessages = () => {
       <div className="grid gap-6 md:grid-cols-[1fr_1fr]">
         <Card className="p-4">
           <div className="flex justify-between items-center mb-4">
-            <h2 className="text-xl font-semibold">Messages ({messages.length})</h2>
-            <Button size="sm" onClick={() => refetch()}>Refresh</Button>
+            <h2 className="text-xl font-semibold">
+              Messages
+              {unreadCount > 0 && <Badge className="bg-blue-500 ml-2">{unreadCount} unread</Badge>}
+            </h2>
+            <Button size="sm" onClick={() => { refetch(); refetchUnread(); }}>Refresh</Button>
+          </div>
+          
+          <div className="flex space-x-2 mb-4">
+            {STATUS_FILTERS.map((status) => (
+              <Button
+                key={status}
+                size="sm"
+                variant={statusFilter === status ? 'default' : 'outline'}
+                onClick={() => setStatusFilter(status)}
+              >
+                {status.charAt(0).toUpperCase() + status.slice(1)}
+              </Button>
+            ))}
           </div>
           
           {messages.length === 0 ? (
@@ -201,6 +235,13 @@ const AdminMessages = () => {
                   ))}
                 </TableBody>
               </Table>
+              {hasNextPage && (
+                <div className="flex justify-center mt-4">
+                  <Button variant="outline" size="sm" onClick={() => fetchNextPage()} disabled={isFetchingNextPage}>
+                    {isFetchingNextPage ? "Loading..." : "Load more messages"}
+                  </Button>
+                </div>
+              )}
             </div>
           )}
         </Card>
@@ -31,9 +31,9 @@ const ArtworkDetail = () => {
         console.log("Artwork data received:", data);
         setArtwork(data);
         
-        // Fetch all artworks to get related ones by the same artist
-        const allArtworks = await getAllArtworks();
-        const related = allArtworks
+        // Related artworks by the same artist, from the newest page
+        const { artworks: recentArtworks } = await getAllArtworks();
+        const related = recentArtworks
           .filter((a: Artwork) => a.id !== id && a.artist === data.artist)
           .slice(0, 3);
         
@@ -6,6 +6,7 @@ import { Label } from '@/components/ui/label';
 import { Slider } from '@/components/ui/slider';
 import { formatPrice } from '@/utils/formatters';
 import { Search } from 'lucide-react';
+import { Button } from '@/components/ui/button';
 import { getAllArtworks } from '@/services/api';
 import { Artwork } from '@/types';
 import { useToast } from '@/hooks/use-toast';
@@ -14,34 +15,35 @@ const ArtworksPage = () => {
   const [searchTerm, setSearchTerm] = useState('');
   const [priceRange, setPriceRange] = useState([0, 100000]);
   const [artworks, setArtworks] = useState<Artwork[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const { toast } = useToast();
   
   // Get min and max prices from artwork data
   const minPrice = 0;
   const maxPrice = 100000;
 
+  const showLoadError = (error: unknown) => {
+    console.error('Failed to fetch artworks:', error);
+    toast({
+      title: "Error",
+      description: "Failed to load artworks. Please try again later.",
+      variant: "destructive",
+    });
+  };
+
+  // The first page on load; more as the visitor asks for them
   useEffect(() => {
     const fetchArtworks = async () => {
       try {
         setLoading(true);
         const data = await getAllArtworks();
-        console.log("Artworks loaded successfully:", data.length);
-        
-        // Log image URLs for debugging
-        data.forEach((artwork: Artwork) => {
-          const imageSource = artwork.image_url || artwork.imageUrl;
-          console.log(`Artwork ${artwork.id} (${artwork.title}) image source: ${imageSource}`);
-        });
-        
-        setArtworks(data);
+        console.log("Artworks loaded successfully:", data.artworks.length);
+        setArtworks(data.artworks);
+        setNextCursor(data.next);
       } catch (error) {
-        console.error('Failed to fetch artworks:', error);
-        toast({
-          title: "Error",
-          description: "Failed to load artworks. Please try again later.",
-          variant: "destructive",
-        });
+        showLoadError(error);
       } finally {
         setLoading(false);
       }
@@ -50,6 +52,20 @@ const ArtworksPage = () => {
     fetchArtworks();
   }, [toast]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const data = await getAllArtworks(nextCursor);
+      setArtworks((loaded) => [...loaded, ...data.artworks]);
+      setNextCursor(data.next);
+    } catch (error) {
+      showLoadError(error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Filter artworks based on search term and price range
   const filteredArtworks = artworks.filter((artwork) => {
     const matchesSearch = 
@@ -133,12 +149,25 @@ const ArtworksPage = () => {
               <ArtworkCard key={artwork.id} artwork={artwork} />
             ))}
           </div>
+        ) : nextCursor ? (
+          <div className="text-center py-16">
+            <h3 className="text-2xl font-medium mb-2">No matching artworks loaded yet</h3>
+            <p className="text-gray-600">Load more artworks to keep searching</p>
+          </div>
         ) : (
           <div className="text-center py-16">
             <h3 className="text-2xl font-medium mb-2">No artworks found</h3>
             <p className="text-gray-600">Try adjusting your filters to see more results</p>
           </div>
         )}
+        
+        {!loading && nextCursor && (
+          <div className="text-center mt-10">
+            <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? "Loading..." : "Load more artworks"}
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -32,9 +32,9 @@ const ExhibitionDetail = () => {
         const data = await getExhibition(id);
         setExhibition(data);
         
-        // Fetch all exhibitions to get related ones
-        const allExhibitions = await getAllExhibitions();
-        const related = allExhibitions
+        // Related exhibitions from the first page (3, in case one is this one)
+        const { exhibitions: firstExhibitions } = await getAllExhibitions(null, 3);
+        const related = firstExhibitions
           .filter((e: Exhibition) => e.id !== id)
           .slice(0, 2);
         
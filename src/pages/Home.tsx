@@ -25,14 +25,14 @@ const Home = () => {
     const fetchData = async () => {
       try {
         setLoading(true);
-        const artworksData = await getAllArtworks();
-        const exhibitionsData = await getAllExhibitions();
+        const artworksData = await getAllArtworks(null, 3);
+        const exhibitionsData = await getAllExhibitions(null, 2);
         
-        // Get first 3 artworks
-        setFeaturedArtworks(artworksData.slice(0, 3));
+        // The 3 newest artworks
+        setFeaturedArtworks(artworksData.artworks);
         
-        // Get first 3 exhibitions
-        setFeaturedExhibitions(exhibitionsData.slice(0, 2));
+        // The first 2 exhibitions
+        setFeaturedExhibitions(exhibitionsData.exhibitions);
       } catch (error) {
         console.error('Failed to fetch data:', error);
         toast({
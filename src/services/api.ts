@@ -346,15 +346,32 @@ export const deleteExhibition = async (id: string) => {
   });
 };
 
-// Get all artworks
-export const getAllArtworks = async () => {
-  try {
-    const response = await fetch(`${API_URL}/artworks`);
-    if (!response.ok) {
-      throw new Error('Failed to fetch artworks');
+// Public GET of one page of a list endpoint
+const fetchPage = (errorMessage: string) => async (url: string) => {
+  const response = await fetch(`${API_URL}${url}`);
+  if (!response.ok) {
+    throw new Error(errorMessage);
+  }
+  return await response.json();
+};
+
+// Path of one page of a list endpoint; params left empty are omitted
+const pagePath = (path: string, params: Record<string, string | number | null | undefined>) => {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([name, value]) => {
+    if (value !== null && value !== undefined && value !== '') {
+      query.set(name, String(value));
     }
-    const data = await response.json();
-    return data.artworks || [];
+  });
+  const search = query.toString();
+  return search ? `${path}?${search}` : path;
+};
+
+// Get one page of artworks, newest first: { artworks, next }.
+// Pass `next` as `after` for the following page; it is null on the last one.
+export const getAllArtworks = async (after: string | null = null, limit?: number) => {
+  try {
+    return await fetchPage('Failed to fetch artworks')(pagePath('/artworks', { after, limit }));
   } catch (error) {
     console.error('Error fetching artworks:', error);
     throw error;
@@ -375,15 +392,11 @@ export const getArtwork = async (id: string) => {
   }
 };
 
-// Get all exhibitions
-export const getAllExhibitions = async () => {
+// Get one page of exhibitions, by start date: { exhibitions, next }.
+// Pass `next` as `after` for the following page; it is null on the last one.
+export const getAllExhibitions = async (after: string | null = null, limit?: number) => {
   try {
-    const response = await fetch(`${API_URL}/exhibitions`);
-    if (!response.ok) {
-      throw new Error('Failed to fetch exhibitions');
-    }
-    const data = await response.json();
-    return data.exhibitions || [];
+    return await fetchPage('Failed to fetch exhibitions')(pagePath('/exhibitions', { after, limit }));
   } catch (error) {
     console.error('Error fetching exhibitions:', error);
     throw error;
@@ -427,11 +440,13 @@ export const submitContactMessage = async (messageData: ContactMessage) => {
   }
 };
 
-// Get all contact messages (admin only)
-export const getAllContactMessages = async () => {
-  console.log("Fetching all contact messages with auth token");
+// Get one page of contact messages, newest first (admin only): { messages, next }.
+// Pass `next` as `after` for the following page; status ('new', 'read' or
+// 'replied') filters the inbox on the server.
+export const getAllContactMessages = async (after: string | null = null, status?: string) => {
+  console.log("Fetching contact messages with auth token");
   try {
-    const result = await authFetch('/messages');
+    const result = await authFetch(pagePath('/messages', { after, status }));
     console.log("Contact messages result:", result);
     return result;
   } catch (error) {
@@ -440,6 +455,11 @@ export const getAllContactMessages = async () => {
   }
 };
 
+// Number of messages not read yet, for the inbox badge (admin only): { unread }
+export const getUnreadMessageCount = async () => {
+  return await authFetch('/messages/unread-count');
+};
+
 // Update message status (admin only)
 export const updateMessageStatus = async (id: string, status: 'new' | 'read' | 'replied') => {
   console.log(`Updating message ${id} status to ${status}`);